@@ -5,6 +5,13 @@ import requests
 import re
 from datetime import datetime
 from database import get_db_connection
+from background import run_in_background, get_executor
+from search_index import get_search_index, fold_turkish
+from search_controller import DebouncedSearch, NarrowingResults, text_matches
+from tree_model import KeyedTreeModel
+from paged_table import PagedTreeView, fetch_keyset_page
+from isbn_service import get_isbn_service, clean_isbn, is_valid_isbn
+from catalog import get_dimension_cache, import_isbns, link_dimensions
 
 # --- ISBN Formatting Functions ---
 def format_isbn_for_display(isbn):
@@ -19,30 +26,6 @@ def format_isbn_for_display(isbn):
         return isbn
 
 
-def clean_isbn(isbn):
-    """ISBN'den formatlama karakterlerini temizler"""
-    return re.sub(r'[^\dX]', '', isbn.upper())
-
-
-def is_valid_isbn(isbn):
-    """ISBN'in geçerli olup olmadığını kontrol eder"""
-    if not isbn:
-        return False
-
-    cleaned = clean_isbn(isbn)
-
-    if len(cleaned) == 10:
-        if not cleaned[:-1].isdigit() and not (cleaned[:-1].isdigit() and cleaned[-1].upper() == 'X'):
-            return False
-        return True
-    elif len(cleaned) == 13:
-        if not cleaned.isdigit():
-            return False
-        return True
-
-    return False
-
-
 # --- Modern Düğme Sınıfı ---
 class ModernButton(ctk.CTkButton):
     def __init__(self, master, **kwargs):
@@ -181,6 +164,7 @@ class BookEditorPopup(ctk.CTkToplevel):
                 cursor.execute("DELETE FROM kitap WHERE kitap_id=?", (self.book_id,))
 
                 conn.commit()
+                get_search_index().remove(self.book_id)
                 messagebox.showinfo("Başarılı", "Kitap başarıyla silindi.", parent=self)
                 self.destroy()
                 if self.refresh_callback:
@@ -222,89 +206,50 @@ class BookEditorPopup(ctk.CTkToplevel):
                 return
 
         self.isbn_status_label.configure(text="⏳ Veriler alınıyor...", text_color="gray60")
-        self.update_idletasks()
-
-        try:
-            url = f"https://openlibrary.org/api/books?bibkeys=ISBN:{raw_isbn}&jscmd=data&format=json"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if not data or f"ISBN:{raw_isbn}" not in data:
-                messagebox.showerror("Hata", "Kitap bulunamadı.", parent=self)
-                self.isbn_status_label.configure(text="❌ Kitap bulunamadı.", text_color="#ef4444")
-                return
-
-            book_entry = data[f"ISBN:{raw_isbn}"]
+        run_in_background(self, "isbn", get_isbn_service().lookup, raw_isbn,
+                          on_success=self._on_isbn_loaded, on_error=self._on_isbn_error)
 
-            if 'details' in book_entry:
-                book_data = book_entry['details']
-            else:
-                book_data = book_entry
-
-            self.clear_other_fields()
-
-            title = book_data.get('title', 'Bilinmiyor')
-            self.entries['ad'].insert(0, title)
-
-            authors = book_data.get('authors', [])
-            author_names = [author.get('name', '') if isinstance(author, dict) else author for author in authors]
-            self.entries['yazar'].insert(0, ", ".join(author_names))
-
-            publishers = book_data.get('publishers', [])
-            publisher_names = [pub.get('name', '') if isinstance(pub, dict) else pub for pub in publishers]
-            self.entries['yayinevi'].insert(0, ", ".join(publisher_names))
-
-            publish_date = book_data.get('publish_date', '')
-            if publish_date:
-                # Tarih metninden sadece 4 haneli yılı bul ve al
-                year_match = re.search(r'\b(\d{4})\b', publish_date)
-                if year_match:
-                    self.entries['yayin_yili'].insert(0, year_match.group(1))
-
-            page_count = book_data.get('number_of_pages', book_data.get('pagination', ''))
-            if page_count:
-                self.entries['sayfa_sayisi'].insert(0, str(page_count))
-
-            description = book_data.get('description', '')
-            if isinstance(description, dict) and 'value' in description:
-                self.ozet_textbox.insert("1.0", description['value'])
-            elif isinstance(description, str):
-                self.ozet_textbox.insert("1.0", description)
-            else:
-                self.ozet_textbox.insert("1.0", "Özet bulunamadı.")
-
-            raw_subjects = book_data.get('subjects', [])
-            subject_names = []
-            for subject in raw_subjects:
-                name = subject.get('name', '') if isinstance(subject, dict) else subject
-                if name and len(name) <= 50 and len(name.split()) <= 5:
-                    subject_names.append(name)
-
-            subject_names = subject_names[:5]
-
-            self.entries['tur'].insert(0, ", ".join(subject_names))
+    def _on_isbn_loaded(self, book):
+        """ISBN servisinden gelen bilgileri alanlara doldurur (Tk thread'inde çalışır)."""
+        if self.is_destroyed: return
+        if book is None:
+            messagebox.showerror("Hata", "Kitap bulunamadı.", parent=self)
+            self.isbn_status_label.configure(text="❌ Kitap bulunamadı.", text_color="#ef4444")
+            return
 
-            cover_url = f"https://covers.openlibrary.org/b/isbn/{raw_isbn}-M.jpg"
-            self.entries['kapak_resmi_url'].insert(0, cover_url)
+        self.clear_other_fields()
 
-            self.entries['adet'].insert(0, "1")
+        self.entries['ad'].insert(0, book['ad'])
+        self.entries['yazar'].insert(0, ", ".join(book['yazarlar']))
+        self.entries['yayinevi'].insert(0, book['yayinevi'])
+        if book['yayin_yili']:
+            self.entries['yayin_yili'].insert(0, book['yayin_yili'])
+        if book['sayfa_sayisi']:
+            self.entries['sayfa_sayisi'].insert(0, book['sayfa_sayisi'])
+        self.ozet_textbox.insert("1.0", book['ozet'] or "Özet bulunamadı.")
+        self.entries['tur'].insert(0, ", ".join(book['turler']))
+        self.entries['kapak_resmi_url'].insert(0, book['kapak_resmi_url'])
+        self.entries['adet'].insert(0, "1")
 
-            self.isbn_status_label.configure(text="✅ Veriler başarıyla dolduruldu.", text_color="#22c55e")
+        self.isbn_status_label.configure(text="✅ Veriler başarıyla dolduruldu.", text_color="#22c55e")
 
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
+    def _on_isbn_error(self, error):
+        if self.is_destroyed: return
+        if isinstance(error, requests.exceptions.HTTPError):
+            if error.response is not None and error.response.status_code == 404:
                 messagebox.showerror("Hata", "Kitap bulunamadı.", parent=self)
                 self.isbn_status_label.configure(text="❌ Kitap bulunamadı.", text_color="#ef4444")
             else:
-                messagebox.showerror("Hata", f"API hatası: HTTP {e.response.status_code}", parent=self)
+                status = error.response.status_code if error.response is not None else "?"
+                messagebox.showerror("Hata", f"API hatası: HTTP {status}", parent=self)
                 self.isbn_status_label.configure(text="❌ API hatası.", text_color="#ef4444")
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Hata", f"Ağ hatası: {e}", parent=self)
+        elif isinstance(error, requests.exceptions.RequestException):
+            messagebox.showerror("Hata", f"Ağ hatası: {error}", parent=self)
             self.isbn_status_label.configure(text="❌ Ağ hatası.", text_color="#ef4444")
-        except Exception as e:
-            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}", parent=self)
+        else:
+            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {error}", parent=self)
             self.isbn_status_label.configure(text="❌ Bir hata oluştu.", text_color="#ef4444")
+
     def clear_other_fields(self):
         if self.is_destroyed: return
         for entry in self.entries.values():
@@ -319,20 +264,27 @@ class BookEditorPopup(ctk.CTkToplevel):
             cursor = conn.cursor()
             cursor.execute("""
                            SELECT k.ad,
-                                  y.ad,
-                                  t.ad,
+                                  -- Tüm yazarlar ve türler, kaydederken link_dimensions'ın ayırdığı biçimde
+                                  (SELECT STRING_AGG(y.ad, ', ')
+                                   FROM kitap_yazar ky
+                                            JOIN yazar y ON y.yazar_id = ky.yazar_id
+                                   WHERE ky.kitap_id = k.kitap_id),
+                                  (SELECT STRING_AGG(t.ad, ', ')
+                                   FROM kitap_tur kt
+                                            JOIN tur t ON t.tur_id = kt.tur_id
+                                   WHERE kt.kitap_id = k.kitap_id),
                                   k.yayin_yili,
-                                  k.adet,
+                                  -- kitap.adet raftaki kopya sayısıdır; formda toplam adet gösterilir
+                                  k.adet + (SELECT COUNT(*)
+                                            FROM kitap_rezervasyon
+                                            WHERE kitap_id = k.kitap_id
+                                              AND teslim_edildi_mi = 0),
                                   k.yayinevi,
                                   k.kapak_resmi_url,
                                   k.sayfa_sayisi,
                                   k.isbn,
                                   k.ozet
                            FROM kitap k
-                                    LEFT JOIN kitap_yazar ky ON k.kitap_id = ky.kitap_id
-                                    LEFT JOIN yazar y ON ky.yazar_id = y.yazar_id
-                                    LEFT JOIN kitap_tur kt ON k.kitap_id = kt.kitap_id
-                                    LEFT JOIN tur t ON kt.tur_id = t.tur_id
                            WHERE k.kitap_id = ?
                            """, (self.book_id,))
 
@@ -344,7 +296,7 @@ class BookEditorPopup(ctk.CTkToplevel):
                 self.entries['yazar'].insert(0, yazar_ad or "")
                 self.entries['tur'].insert(0, tur_ad or "")
                 self.entries['yayin_yili'].insert(0, yayin_yili or "")
-                self.entries['adet'].insert(0, adet or "")
+                self.entries['adet'].insert(0, adet if adet is not None else "")
                 self.entries['yayinevi'].insert(0, yayinevi or "")
                 self.entries['kapak_resmi_url'].insert(0, kapak or "")
                 self.entries['sayfa_sayisi'].insert(0, sayfa or "")
@@ -426,40 +378,32 @@ class BookEditorPopup(ctk.CTkToplevel):
             messagebox.showerror("Hata", "Veritabanına bağlanılamadı.", parent=self)
             return
 
+        toplam_adet = int(adet) if adet.isdigit() else 1
+
         try:
             cursor = conn.cursor()
 
-            cursor.execute("SELECT yazar_id FROM yazar WHERE ad=?", (yazar_ad,))
-            res = cursor.fetchone()
-            if res:
-                yazar_id = res[0]
-            else:
-                cursor.execute("INSERT INTO yazar (ad) VALUES (?)", (yazar_ad,))
-                cursor.execute("SELECT @@IDENTITY")
-                yazar_id = cursor.fetchone()[0]
-
-            cursor.execute("SELECT tur_id FROM tur WHERE ad=?", (tur_ad,))
-            res = cursor.fetchone()
-            if res:
-                tur_id = res[0]
-            else:
-                cursor.execute("INSERT INTO tur (ad) VALUES (?)", (tur_ad,))
-                cursor.execute("SELECT @@IDENTITY")
-                tur_id = cursor.fetchone()[0]
-
             if self.is_editing:
                 cursor.execute("""
                                UPDATE kitap
                                SET ad=?,
                                    yayin_yili=?,
-                                   adet=?,
+                                   -- Formdaki toplam adetten ödünçteki kopyalar düşülerek raftaki sayı tutulur
+                                   adet=CASE
+                                            WHEN ? > odunc.sayi THEN ? - odunc.sayi
+                                            ELSE 0 END,
                                    yayinevi=?,
                                    kapak_resmi_url=?,
                                    sayfa_sayisi=?,
                                    isbn=?,
                                    ozet=?
-                               WHERE kitap_id = ?
-                               """, (ad, yayin_yili or None, int(adet) if adet.isdigit() else 1,
+                               FROM kitap
+                                        CROSS APPLY (SELECT COUNT(*) AS sayi
+                                                     FROM kitap_rezervasyon
+                                                     WHERE kitap_id = kitap.kitap_id
+                                                       AND teslim_edildi_mi = 0) AS odunc
+                               WHERE kitap.kitap_id = ?
+                               """, (ad, yayin_yili or None, toplam_adet, toplam_adet,
                                      yayinevi or None, kapak_resmi_url or None,
                                      int(sayfa_sayisi) if sayfa_sayisi.isdigit() else None,
                                      isbn or None, ozet or None, self.book_id))
@@ -467,25 +411,29 @@ class BookEditorPopup(ctk.CTkToplevel):
                 kitap_id = self.book_id
                 cursor.execute("DELETE FROM kitap_yazar WHERE kitap_id=?", (kitap_id,))
                 cursor.execute("DELETE FROM kitap_tur WHERE kitap_id=?", (kitap_id,))
-
-                messagebox.showinfo("Başarılı", "Kitap güncellendi.", parent=self)
+                success_message = "Kitap güncellendi."
             else:
                 cursor.execute("""
                                INSERT INTO kitap (ad, yayin_yili, adet, yayinevi,
                                                   kapak_resmi_url, sayfa_sayisi, isbn, ozet) OUTPUT INSERTED.kitap_id
                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                               """, (ad, yayin_yili or None, int(adet) if adet.isdigit() else 1,
+                               """, (ad, yayin_yili or None, toplam_adet,
                                      yayinevi or None, kapak_resmi_url or None,
                                      int(sayfa_sayisi) if sayfa_sayisi.isdigit() else None,
                                      isbn or None, ozet or None))
 
                 kitap_id = cursor.fetchone()[0]
-                messagebox.showinfo("Başarılı", "Kitap başarıyla eklendi.", parent=self)
+                success_message = "Kitap başarıyla eklendi."
 
-            cursor.execute("INSERT INTO kitap_yazar (kitap_id,yazar_id) VALUES (?,?)", (kitap_id, yazar_id))
-            cursor.execute("INSERT INTO kitap_tur (kitap_id,tur_id) VALUES (?,?)", (kitap_id, tur_id))
+            # Virgülle ayrılmış her yazar ve tür ayrı bağlanır; bilinen adlar için sorgu yapılmaz
+            pending = []
+            link_dimensions(cursor, kitap_id, yazar_ad, tur_ad, pending)
 
             conn.commit()
+            get_dimension_cache().publish(pending)
+            get_search_index().upsert(kitap_id, ad, yazar_ad, tur_ad, yayinevi, isbn)
+            # Mesaj commit'ten sonra gösterilir; açık işlem ve satır kilitleri pencere beklerken tutulmaz
+            messagebox.showinfo("Başarılı", success_message, parent=self)
             self.destroy()
             if self.refresh_callback:
                 self.refresh_callback()
@@ -500,13 +448,121 @@ class BookEditorPopup(ctk.CTkToplevel):
             conn.close()
 
 
+# --- Toplu ISBN İçe Aktarma Penceresi ---
+class BulkIsbnImportPopup(ctk.CTkToplevel):
+    """Barkod okuyucuyla taranan veya yapıştırılan ISBN listesini tek seferde kataloğa ekler."""
+
+    def __init__(self, master, refresh_callback=None):
+        super().__init__(master)
+        self.master = master
+        self.refresh_callback = refresh_callback
+
+        self.title("📦 Toplu ISBN Ekle")
+        self.geometry("500x600")
+        self.transient(self.master)
+        self.grab_set()
+
+        main_frame = ctk.CTkFrame(self, fg_color="transparent")
+        main_frame.pack(fill="both", expand=True, padx=40, pady=40)
+
+        ctk.CTkLabel(main_frame, text="Toplu ISBN Ekle",
+                     font=ctk.CTkFont(size=28, weight="bold")).pack(pady=(0, 10))
+        ctk.CTkLabel(main_frame,
+                     text="Her satıra bir ISBN yazın veya barkod okuyucuyla tarayın.",
+                     font=ctk.CTkFont(size=14), text_color="gray70").pack(pady=(0, 15))
+
+        self.isbn_textbox = ctk.CTkTextbox(main_frame, font=ctk.CTkFont(size=12))
+        self.isbn_textbox.pack(fill="both", expand=True)
+
+        options_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        options_frame.pack(fill="x", pady=(15, 0))
+        ctk.CTkLabel(options_frame, text="🔢 Kitap başına adet:",
+                     font=ctk.CTkFont(size=14, weight="bold")).pack(side="left")
+        self.adet_entry = ctk.CTkEntry(options_frame, width=80, font=ctk.CTkFont(size=12))
+        self.adet_entry.insert(0, "1")
+        self.adet_entry.pack(side="left", padx=(10, 0))
+
+        self.import_button = ModernButton(options_frame, text="📥 İçe Aktar",
+                                          fg_color="#22c55e", hover_color="#15803d",
+                                          command=self.start_import)
+        self.import_button.pack(side="right")
+
+        self.status_label = ctk.CTkLabel(main_frame, text="", font=ctk.CTkFont(size=12),
+                                         text_color="gray60", justify="left")
+        self.status_label.pack(anchor="w", pady=(10, 0))
+
+    def start_import(self):
+        isbns = re.split(r"[\s,;]+", self.isbn_textbox.get("1.0", "end"))
+        isbns = [isbn for isbn in isbns if isbn]
+        if not isbns:
+            messagebox.showwarning("Uyarı", "Lütfen en az bir ISBN girin.", parent=self)
+            return
+        adet = self.adet_entry.get().strip()
+        adet = int(adet) if adet.isdigit() and int(adet) > 0 else 1
+
+        self.import_button.configure(state="disabled")
+        self.status_label.configure(text=f"⏳ {len(isbns)} ISBN işleniyor...")
+        run_in_background(self, "import", import_isbns, isbns, adet,
+                          on_success=self._on_import_done, on_error=self._on_import_error)
+
+    def _on_import_done(self, report):
+        self.import_button.configure(state="normal")
+        lines = [f"✅ Eklenen: {len(report['eklenen'])}",
+                 f"📚 Zaten kayıtlı: {len(report['kayitli'])}",
+                 f"❌ Bulunamadı: {len(report['bulunamadi'])}"]
+        if report['gecersiz']:
+            lines.append(f"⚠️ Geçersiz: {', '.join(report['gecersiz'][:10])}")
+        if report['hatali']:
+            lines.append(f"⚠️ Kaydedilemedi: {', '.join(isbn for isbn, _ in report['hatali'][:10])}")
+        if report['bulunamadi']:
+            lines.append(f"Bulunamayanlar: {', '.join(report['bulunamadi'][:10])}")
+        self.status_label.configure(text="\n".join(lines))
+
+        # Bulunamayan ve hatalı ISBN'ler elle düzeltilmek üzere kutuda bırakılır
+        remaining = report['bulunamadi'] + report['gecersiz'] + [isbn for isbn, _ in report['hatali']]
+        self.isbn_textbox.delete("1.0", "end")
+        self.isbn_textbox.insert("1.0", "\n".join(remaining))
+
+        if report['eklenen'] and self.refresh_callback:
+            self.refresh_callback()
+
+    def _on_import_error(self, error):
+        self.import_button.configure(state="normal")
+        self.status_label.configure(text="❌ İçe aktarma başarısız.")
+        if isinstance(error, requests.exceptions.RequestException):
+            messagebox.showerror("Hata", f"Ağ hatası: {error}", parent=self)
+        elif isinstance(error, pyodbc.Error):
+            messagebox.showerror("Hata", f"Veritabanı hatası: {error}", parent=self)
+        else:
+            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {error}", parent=self)
+
+
 # --- Rezervasyon Yönetim Çerçevesi ---
 class ReservationManagerFrame(ctk.CTkFrame):
+    BOOK_STATUSES = ["Tümü", "aktif", "gecikti", "tamamlandı", "Ceza"]
+    TABLE_STATUSES = ["Tümü", "Aktif", "Tamamlandı", "İptal Edildi", "Ceza"]
+
+    # Başlık tıklamasıyla seçilebilen sıralamalar: sütun -> SQL ifadesi.
+    # Tarih/saat anahtarları, sonraki sayfa sorgusunda Python'dan geri gönderilen değerle
+    # birebir eşleşebilmesi için milisaniye hassasiyetine çevrilir.
+    BOOK_SORT_COLUMNS = {
+        "Kitap Adı": "ISNULL(k.ad, N'')",
+        "Üye": "ISNULL(u.isim, N'')",
+        "Alış Tarihi": "CAST(ISNULL(kr.alis_tarihi, '19000101') AS DATETIME2(3))",
+        "Son İade Tarihi": "CAST(ISNULL(kr.son_iade_tarihi, '19000101') AS DATETIME2(3))",
+        "Durum": "ISNULL(kr.durum, N'')",
+    }
+    TABLE_SORT_COLUMNS = {
+        "Masa": "ISNULL(m.numara, N'')",
+        "Üye": "ISNULL(u.isim, N'')",
+        "Tarih": "CAST(ISNULL(mr.tarih, '19000101') AS DATETIME2(3))",
+        "Saat Aralığı": "CAST(ISNULL(mr.saat_baslangic, '00:00') AS TIME(3))",
+        "Durum": "d.durum_gosterim",
+    }
+
     def __init__(self, master, switch_callback):
         super().__init__(master)
         self.switch_callback = switch_callback
-        self.all_book_reservations = []
-        self.all_table_reservations = []
         self.active_filters = {}
         self.after_id = None
         self.is_destroyed = False
@@ -535,7 +591,7 @@ class ReservationManagerFrame(ctk.CTkFrame):
                                          font=ctk.CTkFont(size=14),
                                          width=300)
         self.search_entry.pack(side="left", padx=(0, 10))
-        self.search_entry.bind("<KeyRelease>", self.on_search_key_release)
+        self.search = DebouncedSearch(self.search_entry, lambda term: self.filter_reservations_by_search())
 
         ModernButton(search_frame, text="🔄 Yenile", command=self.fetch_all_reservations, width=100).pack(side="left")
 
@@ -557,13 +613,14 @@ class ReservationManagerFrame(ctk.CTkFrame):
         # Kitap rezervasyonları için Treeview
         columns_book = ("ID", "Kitap Adı", "Üye", "Alış Tarihi", "Son İade Tarihi", "Durum")
         self.book_tree = ttk.Treeview(self.book_tab, columns=columns_book, show="headings")
-        self.book_tree.grid(row=0, column=0, sticky="nsew", padx=10, pady=5)
+        self.book_tree.grid(row=0, column=0, sticky="nsew", padx=(10, 0), pady=5)
+        book_scroll = ttk.Scrollbar(self.book_tab, orient="vertical", command=self.book_tree.yview)
+        book_scroll.grid(row=0, column=1, sticky="ns", padx=(0, 10), pady=5)
+        self.book_model = KeyedTreeModel(self.book_tree)  # Satırlar kitap_rezervasyon_id ile eşlenir
 
-        self.book_tree.heading("Kitap Adı", text="Kitap Adı")
-        self.book_tree.heading("Üye", text="Üye")
-        self.book_tree.heading("Alış Tarihi", text="Alış Tarihi")
-        self.book_tree.heading("Son İade Tarihi", text="Son İade Tarihi")
-        self.book_tree.heading("Durum", text="Durum")
+        # Başlığa tıklamak o sütuna göre sıralar (sıralama veritabanında yapılır)
+        for col in columns_book[1:]:
+            self.book_tree.heading(col, text=col, command=lambda c=col: self.book_view.sort_by(c))
 
         # ID sütununu gizlemek için genişliği 0 yapın.
         self.book_tree.column("ID", width=0, stretch=False)
@@ -574,13 +631,13 @@ class ReservationManagerFrame(ctk.CTkFrame):
         # Masa rezervasyonları için Treeview - DEĞİŞTİRİLDİ
         columns_table = ("ID", "Masa", "Üye", "Tarih", "Saat Aralığı", "Durum")  # "Masa No" yerine "Masa"
         self.table_tree = ttk.Treeview(self.table_tab, columns=columns_table, show="headings")
-        self.table_tree.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        self.table_tree.grid(row=0, column=0, sticky="nsew", padx=(10, 0), pady=10)
+        table_scroll = ttk.Scrollbar(self.table_tab, orient="vertical", command=self.table_tree.yview)
+        table_scroll.grid(row=0, column=1, sticky="ns", padx=(0, 10), pady=10)
+        self.table_model = KeyedTreeModel(self.table_tree)  # Satırlar masa_rezervasyon_id ile eşlenir
 
-        self.table_tree.heading("Masa", text="Masa")  # "Masa No" yerine "Masa"
-        self.table_tree.heading("Üye", text="Üye")
-        self.table_tree.heading("Tarih", text="Tarih")
-        self.table_tree.heading("Saat Aralığı", text="Saat Aralığı")
-        self.table_tree.heading("Durum", text="Durum")
+        for col in columns_table[1:]:
+            self.table_tree.heading(col, text=col, command=lambda c=col: self.table_view.sort_by(c))
 
         # ID sütununu gizlemek için genişliği 0 yapın.
         self.table_tree.column("ID", width=0, stretch=False)
@@ -602,6 +659,12 @@ class ReservationManagerFrame(ctk.CTkFrame):
                                             hover_color="#dc2626", command=self.delete_book_reservation)
         self.delete_book_btn.pack(side="left")
 
+        self.book_status_menu = ctk.CTkOptionMenu(self.button_frame_book, values=self.BOOK_STATUSES,
+                                                  command=lambda value: self._on_status_filter('book_status', value))
+        self.book_status_menu.set("Tümü")
+        self.book_status_menu.pack(side="right")
+        ctk.CTkLabel(self.button_frame_book, text="Durum:").pack(side="right", padx=(0, 8))
+
         self.button_frame_table = ctk.CTkFrame(self.table_tab, fg_color="transparent")
         self.button_frame_table.grid(row=3, column=0, sticky="ew", padx=10, pady=5)
         self.button_frame_table.grid_columnconfigure(0, weight=1)
@@ -618,9 +681,30 @@ class ReservationManagerFrame(ctk.CTkFrame):
                                              hover_color="#4b5563", command=self.delete_table_reservation)
         self.delete_table_btn.pack(side="left")
 
+        self.table_status_menu = ctk.CTkOptionMenu(self.button_frame_table, values=self.TABLE_STATUSES,
+                                                   command=lambda value: self._on_status_filter('table_status', value))
+        self.table_status_menu.set("Tümü")
+        self.table_status_menu.pack(side="right")
+        ctk.CTkLabel(self.button_frame_table, text="Durum:").pack(side="right", padx=(0, 8))
+
+        # Yükleme durumu etiketi
+        self.status_label = ctk.CTkLabel(self, text="", font=ctk.CTkFont(size=14),
+                                         text_color="gray60", height=20)
+        self.status_label.grid(row=2, column=0, pady=(0, 10), sticky="ew")
+
+        # Listeler sayfa sayfa, kaydırdıkça yüklenir
+        self.book_view = PagedTreeView(self, "book_reservations", self.book_tree, self._query_book_reservations,
+                                       self.display_book_reservations, scrollbar=book_scroll,
+                                       on_loaded=self._on_page_loaded, on_error=self._on_reservations_error)
+        self.table_view = PagedTreeView(self, "table_reservations", self.table_tree, self._query_table_reservations,
+                                        self.display_table_reservations, scrollbar=table_scroll,
+                                        on_loaded=self._on_page_loaded, on_error=self._on_reservations_error)
+
         # Buton durumunu ayarla ve veri çek
         self.update_buttons()
-        self.fetch_all_reservations()
+        self.status_label.configure(text="⏳ Rezervasyonlar yükleniyor...")
+        self.book_view.reload(self._book_filters())
+        self.table_view.reload(self._table_filters())
 
         self.after_id = self.master.after(1000, self.check_alive)
 
@@ -749,7 +833,14 @@ class ReservationManagerFrame(ctk.CTkFrame):
                                teslim_edildi_mi = 1,
                                iade_tarihi      = ?
                            WHERE kitap_rezervasyon_id = ?
+                             AND teslim_edildi_mi = 0
                            """, (new_status, iade_tarihi, res_id))
+            if cursor.rowcount == 0:
+                # Başka bir oturumda zaten teslim alınmış; adet ikinci kez artırılmamalı
+                conn.rollback()
+                messagebox.showinfo("Bilgi", "Bu rezervasyon zaten teslim alınmış.")
+                self.fetch_all_reservations()
+                return
 
             # Kitabın stok adedini güncelle
             cursor.execute("""
@@ -857,7 +948,31 @@ class ReservationManagerFrame(ctk.CTkFrame):
 
     def apply_filters(self, filters):
         self.active_filters = filters
-        self.fetch_all_reservations()
+        self.book_view.reload(self._book_filters())
+        self.table_view.reload(self._table_filters())
+
+    def _on_status_filter(self, name, value):
+        self.active_filters[name] = value
+        if name == 'book_status':
+            self.book_view.reload(self._book_filters())
+        else:
+            self.table_view.reload(self._table_filters())
+
+    def _book_filters(self):
+        return {
+            'search': self.search_entry.get().strip(),
+            'status': self.active_filters.get('book_status') or "Tümü",
+        }
+
+    def _table_filters(self):
+        date_filter = self.active_filters.get('date')
+        if isinstance(date_filter, datetime):
+            date_filter = date_filter.date()
+        return {
+            'search': self.search_entry.get().strip(),
+            'status': self.active_filters.get('table_status') or "Tümü",
+            'date': date_filter,
+        }
 
     def check_alive(self):
         if not self.master.is_alive:
@@ -872,55 +987,73 @@ class ReservationManagerFrame(ctk.CTkFrame):
             self.after_id = None
 
     def fetch_all_reservations(self):
-        self.fetch_book_reservations()
-        self.fetch_table_reservations()
-
-    def fetch_book_reservations(self):
-        self.book_tree.delete(*self.book_tree.get_children())
-        conn = get_db_connection()
-        if not conn: return
-        try:
-            cursor = conn.cursor()
-            query = """
-                    SELECT kr.kitap_rezervasyon_id,
-                           k.ad,
-                           u.isim,
-                           kr.alis_tarihi,
-                           kr.son_iade_tarihi,
-                           kr.durum -- Yeni durum sütunu
-                    FROM kitap_rezervasyon kr
-                             JOIN kitap k ON kr.kitap_id = k.kitap_id
-                             JOIN kullanici u ON kr.kullanici_id = u.kullanici_id
-                    ORDER BY CASE
+        """Yüklenmiş rezervasyon sayfalarını arka planda yeniler; yalnızca değişen satırlar güncellenir."""
+        self.status_label.configure(text="⏳ Rezervasyonlar yükleniyor...")
+        self.book_view.refresh()
+        self.table_view.refresh()
+
+    def _on_page_loaded(self, view=None):
+        active_view = self.book_view if self.tab_view.get() == "📖 Kitap Rezervasyonları" else self.table_view
+        text = f"{len(active_view.rows)} rezervasyon gösteriliyor"
+        if active_view.has_more:
+            text += " - devamı için aşağı kaydırın"
+        self.status_label.configure(text=text)
+
+    def _on_reservations_error(self, error):
+        self.status_label.configure(text="")
+        messagebox.showerror("Hata", f"Rezervasyonlar yüklenirken hata: {error}")
+
+    @classmethod
+    def _query_book_reservations(cls, filters, sort, limit, after):
+        """Kitap rezervasyonlarının bir sayfasını çeker (işçi thread'de çalışır)."""
+        if sort is None:
+            # Varsayılan: önce aktif ve gecikmiş olanlar, sonra en yeniler
+            sort_keys = [("""CASE
                                  WHEN kr.durum = 'aktif' THEN 0
                                  WHEN kr.durum = 'gecikti' THEN 1
                                  WHEN kr.durum = 'ceza' THEN 2
-                                 ELSE 3 END,
-                             kr.alis_tarihi DESC
-                    """
-            cursor.execute(query)
-            self.all_book_reservations = cursor.fetchall()
-
-            # Uygulanan filtreleri kullanarak veriyi filtrele
-            filtered_list = self.all_book_reservations
-            book_status_filter = self.active_filters.get('book_status')
-            if book_status_filter and book_status_filter != "Tümü":
-                filtered_list = [r for r in filtered_list if r[5] == book_status_filter]
-
-            self.display_book_reservations(filtered_list)
-            self.on_search_key_release()
+                                 ELSE 3 END""", "ASC"),
+                         ("CAST(ISNULL(kr.alis_tarihi, '19000101') AS DATETIME2(3))", "DESC"),
+                         ("kr.kitap_rezervasyon_id", "DESC")]
+        else:
+            column, descending = sort
+            direction = "DESC" if descending else "ASC"
+            sort_keys = [(cls.BOOK_SORT_COLUMNS[column], direction),
+                         ("kr.kitap_rezervasyon_id", direction)]
+
+        search_like = f"%{filters.get('search', '')}%"
+        status = filters.get('status') or "Tümü"
+        key_columns = ", ".join(f"{expr} AS s{i}" for i, (expr, _) in enumerate(sort_keys))
+        query = f"""
+                SELECT kr.kitap_rezervasyon_id,
+                       k.ad,
+                       u.isim,
+                       kr.alis_tarihi,
+                       kr.son_iade_tarihi,
+                       kr.durum,
+                       {key_columns}
+                FROM kitap_rezervasyon kr
+                         JOIN kitap k ON kr.kitap_id = k.kitap_id
+                         JOIN kullanici u ON kr.kullanici_id = u.kullanici_id
+                WHERE (k.ad LIKE ? OR u.isim LIKE ?)
+                  AND (? = 'Tümü' OR kr.durum = ?)
+                """
 
-        except Exception as e:
-            messagebox.showerror("Hata", f"Kitap rezervasyonları yüklenirken hata: {e}")
+        conn = get_db_connection()
+        if not conn:
+            raise ConnectionError("Veritabanına bağlanılamadı.")
+        try:
+            return fetch_keyset_page(conn.cursor(), query, [search_like, search_like, status, status],
+                                     [direction for _, direction in sort_keys], limit, after)
         finally:
             conn.close()
 
     def display_book_reservations(self, reservations):
-        self.book_tree.delete(*self.book_tree.get_children())
         if not reservations:
-            self.book_tree.insert("", "end", values=("", "Kayıtlı kitap rezervasyonu bulunamadı.", "", "", "", ""))
+            self.book_model.show_message(("", "Kayıtlı kitap rezervasyonu bulunamadı.", "", "", "", ""))
             return
 
+        rows = []
         for r in reservations:
             alis_tarihi_str = r[3].strftime("%d.%m.%Y") if r[3] else "Bilinmiyor"
             son_iade_tarihi_str = r[4].strftime("%d.%m.%Y") if r[4] else "Bilinmiyor"
@@ -928,7 +1061,10 @@ class ReservationManagerFrame(ctk.CTkFrame):
             # Durumu doğrudan veritabanından al
             durum = r[5]
 
-            self.book_tree.insert("", "end", values=(r[0], r[1], r[2], alis_tarihi_str, son_iade_tarihi_str, durum))
+            rows.append((r[0], (r[0], r[1], r[2], alis_tarihi_str, son_iade_tarihi_str, durum), ()))
+
+        # Yalnızca değişen satırlar güncellenir; seçim ve kaydırma konumu korunur
+        self.book_model.sync(rows)
 
 
     def format_masa_adi(self, masa_no):
@@ -948,105 +1084,92 @@ class ReservationManagerFrame(ctk.CTkFrame):
 
         return str(masa_no).replace('_', '')
 
-    def fetch_table_reservations(self):
-        """Veritabanından tüm masa rezervasyonlarını çeker ve görüntüler."""
-        self.table_tree.delete(*self.table_tree.get_children())
-        conn = get_db_connection()
-        if not conn:
-            return
-        try:
-            cursor = conn.cursor()
-            query = """
-                    SELECT mr.masa_rezervasyon_id,
-                           m.numara,
-                           u.isim,
-                           mr.tarih,
-                           mr.saat_baslangic,
-                           mr.saat_bitis,
-                           mr.iptal_durumu,
-                           mr.durum
-                    FROM masa_rezervasyon mr
-                             JOIN masa m ON mr.masa_id = m.masa_id
-                             JOIN kullanici u ON mr.kullanici_id = u.kullanici_id
-                    ORDER BY CASE
+    @classmethod
+    def _query_table_reservations(cls, filters, sort, limit, after):
+        """Masa rezervasyonlarının bir sayfasını çeker (işçi thread'de çalışır)."""
+        if sort is None:
+            # Varsayılan: önce süresi dolmamış aktif rezervasyonlar, sonra en yeniler
+            sort_keys = [("""CASE
                                  WHEN mr.iptal_durumu = 0 AND (mr.tarih > GETDATE() OR
                                                                (mr.tarih = CAST(GETDATE() AS DATE) AND
                                                                 mr.saat_bitis > CAST(GETDATE() AS TIME))) THEN 0
                                  WHEN mr.iptal_durumu = 0 THEN 1
-                                 ELSE 2 END,
-                             mr.tarih DESC, mr.saat_baslangic DESC
-                    """
-            cursor.execute(query)
-            raw_reservations = cursor.fetchall()
-
-            # Rezervasyon durumlarını manuel olarak hesapla ve tek bir döngüde liste oluştur
-            self.all_table_reservations = []
-            for reservation in raw_reservations:
-                reservation_id, masa_no, uye, tarih, baslangic, bitis, iptal_durumu, durum_from_db = reservation
-
-                # Masa adını formatla
-                masa_adi = self.format_masa_adi(masa_no)
-
-                # Durumu belirle
-                if durum_from_db and durum_from_db.strip():
-                    durum_to_display = durum_from_db
-                elif iptal_durumu:
-                    durum_to_display = "İptal Edildi"
-                else:
-                    now = datetime.now()
-                    rezervasyon_bitis = datetime.combine(tarih, bitis) if tarih and bitis else None
-
-                    if rezervasyon_bitis and rezervasyon_bitis < now:
-                        durum_to_display = "Tamamlandı"
-                    else:
-                        durum_to_display = "Aktif"
-
-                # Güncellenmiş rezervasyon bilgilerini sakla
-                self.all_table_reservations.append((
-                    reservation_id, masa_adi, uye, tarih, baslangic, bitis, durum_to_display
-                ))
-
-            # Filtreleme ve görüntüleme
-            filtered_list = self.all_table_reservations
-            table_status_filter = self.active_filters.get('table_status')
-            table_date_filter = self.active_filters.get('date')
-
-            if table_status_filter and table_status_filter != "Tümü":
-                if table_status_filter == "Aktif":
-                    filtered_list = [r for r in filtered_list if r[6] == "Aktif"]
-                elif table_status_filter == "İptal Edildi":
-                    filtered_list = [r for r in filtered_list if r[6] == "İptal Edildi"]
-                elif table_status_filter == "Tamamlandı":
-                    filtered_list = [r for r in filtered_list if r[6] == "Tamamlandı"]
-                elif table_status_filter == "Ceza":
-                    filtered_list = [r for r in filtered_list if r[6] == "Ceza"]
-
-            if table_date_filter:
-                filtered_list = [r for r in filtered_list if r[3] and r[3].date() == table_date_filter]
-
-            self.display_table_reservations(filtered_list)
-            self.on_search_key_release()
+                                 ELSE 2 END""", "ASC"),
+                         ("CAST(ISNULL(mr.tarih, '19000101') AS DATETIME2(3))", "DESC"),
+                         ("CAST(ISNULL(mr.saat_baslangic, '00:00') AS TIME(3))", "DESC"),
+                         ("mr.masa_rezervasyon_id", "DESC")]
+        else:
+            column, descending = sort
+            direction = "DESC" if descending else "ASC"
+            sort_keys = [(cls.TABLE_SORT_COLUMNS[column], direction),
+                         ("mr.masa_rezervasyon_id", direction)]
+
+        search_like = f"%{filters.get('search', '')}%"
+        status = filters.get('status') or "Tümü"
+        date_filter = filters.get('date')
+        key_columns = ", ".join(f"{expr} AS s{i}" for i, (expr, _) in enumerate(sort_keys))
+        # Görüntülenen durum: veritabanındaki durum, yoksa iptal / süre bilgisinden türetilir
+        query = f"""
+                SELECT mr.masa_rezervasyon_id,
+                       m.numara,
+                       u.isim,
+                       mr.tarih,
+                       mr.saat_baslangic,
+                       mr.saat_bitis,
+                       d.durum_gosterim,
+                       {key_columns}
+                FROM masa_rezervasyon mr
+                         JOIN masa m ON mr.masa_id = m.masa_id
+                         JOIN kullanici u ON mr.kullanici_id = u.kullanici_id
+                         CROSS APPLY (SELECT CASE
+                                                 WHEN LTRIM(RTRIM(ISNULL(mr.durum, ''))) <> '' THEN mr.durum
+                                                 WHEN mr.iptal_durumu = 1 THEN N'İptal Edildi'
+                                                 WHEN CAST(mr.tarih AS DATETIME) + CAST(mr.saat_bitis AS DATETIME)
+                                                     < GETDATE() THEN N'Tamamlandı'
+                                                 ELSE N'Aktif' END AS durum_gosterim) d
+                         CROSS APPLY (SELECT LTRIM(RTRIM(REPLACE(CAST(m.numara AS NVARCHAR(100)), '_', ' ')))
+                                                 AS masa_str) n
+                         -- Listede gösterilen masa adı (bkz. format_masa_adi); arama bu ad üzerinde yapılır
+                         CROSS APPLY (SELECT CASE
+                                                 WHEN m.numara IS NULL THEN N'Bilinmeyen Masa'
+                                                 WHEN n.masa_str <> '' AND n.masa_str NOT LIKE '%[^0-9]%'
+                                                     THEN N'Masa ' + n.masa_str
+                                                 ELSE n.masa_str END AS masa_adi) a
+                WHERE (a.masa_adi LIKE ? OR u.isim LIKE ?)
+                  AND (? = N'Tümü' OR d.durum_gosterim = ?)
+                  AND (? IS NULL OR mr.tarih = ?)
+                """
 
-        except Exception as e:
-            messagebox.showerror("Hata", f"Masa rezervasyonları yüklenirken hata: {e}")
+        conn = get_db_connection()
+        if not conn:
+            raise ConnectionError("Veritabanına bağlanılamadı.")
+        try:
+            return fetch_keyset_page(conn.cursor(), query,
+                                     [search_like, search_like, status, status, date_filter, date_filter],
+                                     [direction for _, direction in sort_keys], limit, after)
         finally:
             conn.close()
+
     def display_table_reservations(self, reservations):
-        self.table_tree.delete(*self.table_tree.get_children())
         if not reservations:
-            self.table_tree.insert("", "end", values=("", "Kayıtlı masa rezervasyonu bulunamadı.", "", "", "", ""))
+            self.table_model.show_message(("", "Kayıtlı masa rezervasyonu bulunamadı.", "", "", "", ""))
             return
 
+        rows = []
         for r in reservations:
-            reservation_id, masa_adi, uye, tarih, baslangic, bitis, durum = r
+            reservation_id, masa_no, uye, tarih, baslangic, bitis, durum = r
+            masa_adi = self.format_masa_adi(masa_no)
 
             tarih_str = tarih.strftime("%d.%m.%Y") if tarih else "Bilinmiyor"
             saat_baslangic_str = baslangic.strftime("%H:%M") if baslangic else "Bilinmiyor"
             saat_bitis_str = bitis.strftime("%H:%M") if bitis else "Bilinmiyor"
 
-            self.table_tree.insert("", "end",
-                                   values=(reservation_id, masa_adi, uye, tarih_str,
-                                           f"{saat_baslangic_str} - {saat_bitis_str}", durum))
+            rows.append((reservation_id,
+                         (reservation_id, masa_adi, uye, tarih_str,
+                          f"{saat_baslangic_str} - {saat_bitis_str}", durum),
+                         ()))
+
+        self.table_model.sync(rows)
 
     # Diğer metodlar aynı kalacak...
     # ... (diğer metodlar burada kalacak)
@@ -1054,44 +1177,11 @@ class ReservationManagerFrame(ctk.CTkFrame):
         self.filter_reservations_by_search()
 
     def filter_reservations_by_search(self):
-        search_term = self.search_entry.get().strip().lower()
-        active_tab = self.tab_view.get()
-
-        if active_tab == "📖 Kitap Rezervasyonları":
-            filtered_list = [r for r in self.all_book_reservations if
-                             search_term in str(r[1]).lower() or  # Kitap adı
-                             search_term in str(r[2]).lower()]  # Üye
-
-            book_status_filter = self.active_filters.get('book_status')
-            if book_status_filter and book_status_filter != "Tümü":
-                if book_status_filter == "Aktif":
-                    filtered_list = [r for r in filtered_list if not r[5]]
-                elif book_status_filter == "Tamamlandı":
-                    filtered_list = [r for r in filtered_list if r[5]]
-                elif book_status_filter == "Gecikti":
-                    filtered_list = [r for r in filtered_list if
-                                     not r[5] and r[4] and r[4].date() < datetime.now().date()]
-
-            self.display_book_reservations(filtered_list)
-
-        elif active_tab == "🪑 Masa Rezervasyonları":
-            filtered_list = [r for r in self.all_table_reservations if
-                             search_term in str(r[1]).lower() or  # Masa no
-                             search_term in str(r[2]).lower()]  # Üye
-
-            table_status_filter = self.active_filters.get('table_status')
-            table_date_filter = self.active_filters.get('date')
-
-            if table_status_filter and table_status_filter != "Tümü":
-                if table_status_filter == "Aktif":
-                    filtered_list = [r for r in filtered_list if not r[6]]
-                elif table_status_filter == "İptal Edildi":
-                    filtered_list = [r for r in filtered_list if r[6]]
-
-            if table_date_filter:
-                filtered_list = [r for r in filtered_list if r[3] and r[3].date() == table_date_filter.date()]
-
-            self.display_table_reservations(filtered_list)
+        """Arama terimiyle etkin sekmedeki listeyi veritabanından yeniden yükler."""
+        if self.tab_view.get() == "📖 Kitap Rezervasyonları":
+            self.book_view.reload(self._book_filters())
+        else:
+            self.table_view.reload(self._table_filters())
 
     def delete_book_reservation(self):
         selected_item = self.book_tree.focus()
@@ -1105,6 +1195,15 @@ class ReservationManagerFrame(ctk.CTkFrame):
         if not conn: return
         try:
             cursor = conn.cursor()
+            # Teslim edilmemiş bir rezervasyon silinirse kopya rafa geri döner
+            cursor.execute("""
+                           UPDATE k
+                           SET k.adet = k.adet + 1
+                           FROM kitap k
+                                    JOIN kitap_rezervasyon kr ON kr.kitap_id = k.kitap_id
+                           WHERE kr.kitap_rezervasyon_id = ?
+                             AND kr.teslim_edildi_mi = 0
+                           """, (res_id,))
             cursor.execute("DELETE FROM kitap_rezervasyon WHERE kitap_rezervasyon_id=?", (res_id,))
             conn.commit()
             messagebox.showinfo("Başarılı", "Kitap rezervasyonu başarıyla silindi.")
@@ -1163,6 +1262,7 @@ class ReservationManagerFrame(ctk.CTkFrame):
         self.is_destroyed = True
         if self.after_id:
             self.master.after_cancel(self.after_id)
+        get_executor().cancel(self)
         super().destroy()
 
 
@@ -1197,6 +1297,9 @@ class BookListManagerFrame(ctk.CTkFrame):
         ModernButton(button_frame, text="➕ Yeni Kitap Ekle",
                      command=self.add_new_book, fg_color="#3b82f6", hover_color="#2563eb").pack(side="left", padx=5)
 
+        ModernButton(button_frame, text="📦 Toplu ISBN Ekle",
+                     command=self.import_isbn_list, fg_color="#8b5cf6", hover_color="#7c3aed").pack(side="left", padx=5)
+
         ModernButton(button_frame, text="🔄 Yenile",
                      command=self.fetch_and_display_books, fg_color="transparent", border_color="gray",
                      border_width=1).pack(side="left", padx=5)
@@ -1211,7 +1314,11 @@ class BookListManagerFrame(ctk.CTkFrame):
                                          font=ctk.CTkFont(size=14),
                                          height=40)
         self.search_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
-        self.search_entry.bind("<KeyRelease>", self.on_search_key_release)
+        self.search = DebouncedSearch(
+            self.search_entry, lambda term: self.filter_books(), min_length=2,
+            on_too_short=lambda term: self.status_label.configure(text="🔍 Daha fazla karakter girin..."))
+        self._search_results = NarrowingResults(
+            lambda books, term: [book for book in books if self._book_matches(book, term)])
 
         ModernButton(search_frame, text="🗑️ Temizle", width=100,
                      command=self.clear_search, fg_color="transparent",
@@ -1232,6 +1339,7 @@ class BookListManagerFrame(ctk.CTkFrame):
                                       yscrollcommand=tree_scroll.set)
         self.book_tree.pack(expand=True, fill="both")
         tree_scroll.config(command=self.book_tree.yview)
+        self.book_model = KeyedTreeModel(self.book_tree)  # Satırlar kitap_id ile eşlenir
 
         self.book_tree.bind("<Double-1>", self.on_book_double_click)
 
@@ -1275,32 +1383,31 @@ class BookListManagerFrame(ctk.CTkFrame):
         selected_item = self.book_tree.focus()
 
 
-    def on_search_key_release(self, event):
-        search_term = self.search_entry.get().strip()
-        if len(search_term) >= 2 or len(search_term) == 0:
-            self.filter_books()
-        elif len(search_term) == 1:
-            self.status_label.configure(text="🔍 Daha fazla karakter girin...")
-        else:
-            self.status_label.configure(text="")
-
     def clear_search(self):
         self.search_entry.delete(0, "end")
+        self.search.reset()
         self.filter_books()
         self.status_label.configure(text="")
 
     def add_new_book(self):
         BookEditorPopup(self.master, refresh_callback=self.fetch_and_display_books)
 
+    def import_isbn_list(self):
+        BulkIsbnImportPopup(self.master, refresh_callback=self.fetch_and_display_books)
+
     def fetch_and_display_books(self):
-        self.book_tree.delete(*self.book_tree.get_children())
+        """Kitap listesini arka planda çeker; bu sırada arayüz donmaz."""
         self.status_label.configure(text="⏳ Kitaplar yükleniyor...")
-        self.update()
+        run_in_background(self, "books", self._query_books,
+                          on_success=self._on_books_loaded,
+                          on_error=self._on_books_error)
 
+    @staticmethod
+    def _query_books():
+        """İşçi thread'de çalışır; kitap satırlarını döndürür."""
         conn = get_db_connection()
         if not conn:
-            self.status_label.configure(text="❌ Veritabanı bağlantı hatası.")
-            return
+            raise ConnectionError("Veritabanı bağlantı hatası.")
 
         try:
             cursor = conn.cursor()
@@ -1323,80 +1430,89 @@ class BookListManagerFrame(ctk.CTkFrame):
                                     LEFT JOIN tur t ON kt.tur_id = t.tur_id
                            ORDER BY k.ad
                            """)
+            return cursor.fetchall()
+        finally:
+            conn.close()
 
-            books = cursor.fetchall()
-            self.status_label.configure(text="")
-
-            self.all_books = []
-            book_dict = {}
-
-            for book in books:
-                kitap_id = book[0]
-                if kitap_id not in book_dict:
-                    book_dict[kitap_id] = {
-                        'kitap_id': kitap_id,
-                        'ad': book[1],
-                        'yayin_yili': book[2],
-                        'adet': book[3],
-                        'yayinevi': book[4],
-                        'kapak_resmi_url': book[5],
-                        'sayfa_sayisi': book[6],
-                        'isbn': book[7],
-                        'ozet': book[8],
-                        'yazar_ad': book[9] or 'Bilinmiyor',
-                        'tur_ad': book[10] or 'Bilinmiyor'
-                    }
-                else:
-                    if book[9] and book[9] not in book_dict[kitap_id]['yazar_ad']:
-                        book_dict[kitap_id]['yazar_ad'] += f", {book[9]}"
-                    if book[10] and book[10] not in book_dict[kitap_id]['tur_ad']:
-                        book_dict[kitap_id]['tur_ad'] += f", {book[10]}"
-
-            self.all_books = list(book_dict.values())
+    def _on_books_loaded(self, books):
+        self.status_label.configure(text="")
 
-            search_term = self.search_entry.get().strip().lower()
-            if search_term:
-                self.filter_books()
+        self.all_books = []
+        book_dict = {}
+
+        for book in books:
+            kitap_id = book[0]
+            if kitap_id not in book_dict:
+                book_dict[kitap_id] = {
+                    'kitap_id': kitap_id,
+                    'ad': book[1],
+                    'yayin_yili': book[2],
+                    'adet': book[3],
+                    'yayinevi': book[4],
+                    'kapak_resmi_url': book[5],
+                    'sayfa_sayisi': book[6],
+                    'isbn': book[7],
+                    'ozet': book[8],
+                    'yazar_ad': book[9] or 'Bilinmiyor',
+                    'tur_ad': book[10] or 'Bilinmiyor'
+                }
             else:
-                self.display_books(self.all_books)
+                if book[9] and book[9] not in book_dict[kitap_id]['yazar_ad']:
+                    book_dict[kitap_id]['yazar_ad'] += f", {book[9]}"
+                if book[10] and book[10] not in book_dict[kitap_id]['tur_ad']:
+                    book_dict[kitap_id]['tur_ad'] += f", {book[10]}"
 
-        except Exception as e:
-            self.status_label.configure(text=f"❌ Kitaplar yüklenirken hata: {e}")
-            messagebox.showerror("Hata", f"Kitaplar yüklenirken hata: {e}")
-        finally:
-            conn.close()
+        self.all_books = list(book_dict.values())
+        self._search_results.clear()
+
+        search_term = self.search_entry.get().strip().lower()
+        if search_term:
+            self.filter_books()
+        else:
+            self.display_books(self.all_books)
+
+    def _on_books_error(self, error):
+        if isinstance(error, ConnectionError):
+            self.status_label.configure(text="❌ Veritabanı bağlantı hatası.")
+            return
+        self.status_label.configure(text=f"❌ Kitaplar yüklenirken hata: {error}")
+        messagebox.showerror("Hata", f"Kitaplar yüklenirken hata: {error}")
 
     def display_books(self, books_to_display):
-        self.book_tree.delete(*self.book_tree.get_children())
         if not books_to_display:
+            self.book_model.clear()
             self.status_label.configure(text="🔍 Arama kriterlerine uygun kitap bulunamadı.")
             return
 
         self.status_label.configure(text="")
 
-        for book_info in books_to_display:
-            self.book_tree.insert("", "end",
-                                  values=(book_info['kitap_id'],
-                                          book_info['ad'],
-                                          book_info['yazar_ad'],
-                                          book_info['tur_ad'],
-                                          book_info['yayin_yili'],
-                                          book_info['adet']))
+        self.book_model.sync((book_info['kitap_id'],
+                              (book_info['kitap_id'],
+                               book_info['ad'],
+                               book_info['yazar_ad'],
+                               book_info['tur_ad'],
+                               book_info['yayin_yili'],
+                               book_info['adet']),
+                              ())
+                             for book_info in books_to_display)
+
+    @staticmethod
+    def _book_matches(book, search_term):
+        return text_matches(search_term, str(book['ad']), str(book['yazar_ad']), str(book['tur_ad']),
+                            str(book['isbn']), str(book['yayinevi']))
 
     def filter_books(self):
-        search_term = self.search_entry.get().strip().lower()
+        search_term = fold_turkish(self.search_entry.get().strip())
         if not search_term:
+            self._search_results.clear()
             self.display_books(self.all_books)
             return
 
-        filtered_books = []
-        for book in self.all_books:
-            if (search_term in str(book['ad']).lower() or
-                    search_term in str(book['yazar_ad']).lower() or
-                    search_term in str(book['tur_ad']).lower() or
-                    search_term in str(book['isbn']).lower() or
-                    search_term in str(book['yayinevi']).lower()):
-                filtered_books.append(book)
+        # Terim öncekini genişletiyorsa önceki sonuçlar içinde ara
+        filtered_books = self._search_results.narrow(search_term)
+        if filtered_books is None:
+            filtered_books = [book for book in self.all_books if self._book_matches(book, search_term)]
+        self._search_results.store(search_term, filtered_books)
 
         self.display_books(filtered_books)
         if not filtered_books:
@@ -1459,6 +1575,7 @@ class BookListManagerFrame(ctk.CTkFrame):
             cursor.execute("DELETE FROM kitap WHERE kitap_id=?", (book_id,))
 
             conn.commit()
+            get_search_index().remove(book_id)
             messagebox.showinfo("Başarılı", f"'{book_title}' kitabı silindi.")
             self.fetch_and_display_books()
 
@@ -0,0 +1,158 @@
+"""
+Kullanıcı girişi ve ceza puanı sıfırlama.
+
+Giriş tek bir sorguyla kullanıcıyı, son ceza tarihini ve ceza puanının sıfırlanıp
+sıfırlanmayacağını getirir. bcrypt doğrulaması yavaş olduğu (~250 ms) için authenticate()
+işçi thread'de çağrılmalıdır (bkz. background.run_in_background). Sıfırlama yalnızca şifre
+doğrulandıktan sonra, arada yeni bir ceza yazılmadıysa uygulanır. Eski algoritmayla veya
+düşük maliyetle saklanan şifreler başarılı girişte güncel politikayla yeniden hash'lenir.
+Şifre değiştirme ve kayıt da bcrypt çalıştırdığı için aynı şekilde işçi thread'de çağrılır.
+"""
+from enum import Enum
+
+from database import get_db_connection
+from password_policy import verify_sifre, needs_rehash, hash_sifre
+
+PENALTY_RESET_DAYS = 10  # Son cezadan bu kadar gün sonra ceza puanı sıfırlanır
+
+
+class PasswordChangeResult(Enum):
+    OK = "ok"
+    WRONG_PASSWORD = "hatali_sifre"
+    NOT_FOUND = "bulunamadi"
+
+
+class RegistrationResult(Enum):
+    OK = "ok"
+    NAME_TAKEN = "isim_kullaniliyor"
+    EMAIL_TAKEN = "eposta_kayitli"
+
+
+class AuthenticatedUser:
+    """Giriş yapan kullanıcının oturum boyunca kullanılan bilgileri."""
+
+    def __init__(self, kullanici_id, isim, rol, ceza_puani, son_ceza=None, sifirlanan_gun=None):
+        self.kullanici_id = kullanici_id
+        self.isim = isim
+        self.rol = rol
+        self.ceza_puani = ceza_puani
+        self.son_ceza = son_ceza
+        # Ceza puanı bu girişte sıfırlandıysa son cezadan bu yana geçen gün (kullanıcıya bildirilir)
+        self.sifirlanan_gun = sifirlanan_gun
+
+
+def _user_query(key_column):
+    return f"""
+           SELECT k.kullanici_id, k.isim, k.rol, k.ceza_puani, k.sifre, c.son_ceza,
+                  DATEDIFF(DAY, c.son_ceza, GETDATE()) AS gecen_gun,
+                  CASE
+                      WHEN k.ceza_puani > 0
+                          AND (c.son_ceza IS NULL OR DATEDIFF(DAY, c.son_ceza, GETDATE()) >= ?) THEN 1
+                      ELSE 0 END AS sifirla
+           FROM kullanici k
+                    OUTER APPLY (SELECT MAX(tarih) AS son_ceza
+                                 FROM cezalar
+                                 WHERE kullanici_id = k.kullanici_id) c
+           WHERE k.{key_column} = ?
+           """
+
+
+def _reset_penalty(cursor, kullanici_id):
+    """Ceza puanını sıfırlar; sorgudan sonra yeni bir ceza yazıldıysa dokunmaz. Sıfırlandıysa True döner."""
+    cursor.execute("""
+                   UPDATE kullanici
+                   SET ceza_puani = 0
+                   WHERE kullanici_id = ?
+                     AND ceza_puani > 0
+                     AND NOT EXISTS (SELECT 1
+                                     FROM cezalar
+                                     WHERE kullanici_id = ?
+                                       AND DATEDIFF(DAY, tarih, GETDATE()) < ?)
+                   """, (kullanici_id, kullanici_id, PENALTY_RESET_DAYS))
+    return cursor.rowcount > 0
+
+
+def _upgrade_hash(cursor, kullanici_id, old_hash, password):
+    """Şifreyi güncel politikayla yeniden hash'ler; bu arada şifre değiştiyse dokunmaz."""
+    cursor.execute("UPDATE kullanici SET sifre = ? WHERE kullanici_id = ? AND sifre = ?",
+                   (hash_sifre(password), kullanici_id, old_hash))
+
+
+def _load_user(key_column, key, password=None):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_user_query(key_column), (PENALTY_RESET_DAYS, key))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        kullanici_id, isim, rol, ceza_puani, sifre, son_ceza, gecen_gun, sifirla = row
+
+        if password is not None:
+            if not verify_sifre(password, sifre):
+                return None
+            if needs_rehash(sifre):
+                _upgrade_hash(cursor, kullanici_id, sifre, password)
+
+        user = AuthenticatedUser(kullanici_id, isim, rol, ceza_puani, son_ceza)
+        if sifirla and _reset_penalty(cursor, kullanici_id):
+            user.ceza_puani = 0
+            # Hiç ceza kaydı yoksa puan sessizce sıfırlanır
+            user.sifirlanan_gun = gecen_gun if son_ceza is not None else None
+        return user
+
+
+def authenticate(eposta, sifre):
+    """
+    E-posta ve şifreyi doğrular; başarılıysa AuthenticatedUser, değilse None döndürür.
+    Gerekirse ceza puanını sıfırlar. Bloklayan bir çağrıdır, işçi thread'de çalıştırılmalıdır.
+    """
+    return _load_user("eposta", eposta, password=sifre)
+
+
+def load_user_status(kullanici_id):
+    """Hatırlanan oturum için kullanıcıyı şifresiz yükler ve gerekirse ceza puanını sıfırlar."""
+    return _load_user("kullanici_id", kullanici_id)
+
+
+def change_password(kullanici_id, current_password, new_password):
+    """
+    Mevcut şifreyi doğrulayıp yenisini güncel politikayla kaydeder; PasswordChangeResult döndürür.
+    Doğrulama ile güncelleme arasında şifre değiştiyse güncelleme yapılmaz. Bloklayan bir çağrıdır.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT sifre FROM kullanici WHERE kullanici_id = ?", (kullanici_id,))
+        row = cursor.fetchone()
+    if row is None:
+        return PasswordChangeResult.NOT_FOUND
+    stored_hash = row[0]
+    if not verify_sifre(current_password, stored_hash):
+        return PasswordChangeResult.WRONG_PASSWORD
+
+    new_hash = hash_sifre(new_password)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE kullanici SET sifre = ? WHERE kullanici_id = ? AND sifre = ?",
+                       (new_hash, kullanici_id, stored_hash))
+        if cursor.rowcount == 0:
+            return PasswordChangeResult.WRONG_PASSWORD
+    return PasswordChangeResult.OK
+
+
+def register_user(eposta, sifre, isim):
+    """Yeni kullanıcıyı kaydeder; RegistrationResult döndürür. Bloklayan bir çağrıdır."""
+    # bcrypt bağlantı tutulmadan çalışır
+    hashed = hash_sifre(sifre)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM kullanici WHERE isim = ?", (isim,))
+        if cursor.fetchone()[0] > 0:
+            return RegistrationResult.NAME_TAKEN
+        cursor.execute("SELECT COUNT(*) FROM kullanici WHERE eposta = ?", (eposta,))
+        if cursor.fetchone()[0] > 0:
+            return RegistrationResult.EMAIL_TAKEN
+        cursor.execute(
+            "INSERT INTO kullanici (eposta, sifre, isim, rol, ceza_puani) VALUES (?, ?, ?, ?, ?)",
+            (eposta, hashed, isim, 'user', 0)
+        )
+    return RegistrationResult.OK
@@ -0,0 +1,173 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Arka plan işlerinin sonuçları Tk ana döngüsünde bu aralıkla (ms) teslim edilir
+POLL_INTERVAL_MS = 30
+
+
+class BackgroundTask:
+    """submit() tarafından döndürülen iş. cancel() ile sonucu yok sayılır."""
+
+    def __init__(self, executor, slot, generation):
+        self._executor = executor
+        self._slot = slot
+        self._generation = generation
+        self.future = None
+
+    @property
+    def is_current(self):
+        """Aynı anahtarla daha yeni bir iş gönderilmediyse True döner."""
+        return self._executor._generations.get(self._slot) == self._generation
+
+    def cancel(self):
+        self._executor._supersede(self._slot, self._generation)
+        if self.future is not None:
+            self.future.cancel()
+
+
+class BackgroundExecutor:
+    """
+    Veritabanı gibi bloklayan işleri işçi thread'lerde çalıştırır ve sonuçları
+    Tk ana döngüsüne geri taşır. Aynı widget ve anahtarla yeni bir iş gönderildiğinde
+    eski iş kuyruktaysa iptal edilir, çalışıyorsa sonucu yok sayılır.
+    Tk nesnelerine yalnızca on_success / on_error geri çağrılarında dokunulmalıdır.
+    """
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="arka-plan")
+        self._results = queue.Queue()
+        self._generations = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._pump_root = None
+
+    def submit(self, widget, key, func, *args, on_success=None, on_error=None, **kwargs):
+        """
+        func(*args, **kwargs) fonksiyonunu arka planda çalıştırır.
+        Sonuç on_success(sonuc), hata on_error(hata) ile Tk thread'inde teslim edilir.
+        """
+        task = self._start_task(widget, key)
+
+        def run():
+            if not task.is_current:
+                return
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                traceback.print_exc()
+                self._results.put((task, widget, on_error, e))
+            else:
+                self._results.put((task, widget, on_success, result))
+
+        task.future = self._executor.submit(run)
+        return task
+
+    def watch(self, widget, key, future, on_success=None, on_error=None):
+        """
+        Başka bir havuzda çalışan bir Future'ın sonucunu submit() ile aynı kurallarla
+        Tk thread'inde teslim eder. Görev iptal edilirse yalnızca sonuç yok sayılır;
+        Future paylaşılıyor olabileceği için iptal edilmez.
+        """
+        task = self._start_task(widget, key)
+
+        def done(finished):
+            if finished.cancelled():
+                return
+            error = finished.exception()
+            if error is not None:
+                self._results.put((task, widget, on_error, error))
+            else:
+                self._results.put((task, widget, on_success, finished.result()))
+
+        future.add_done_callback(done)
+        return task
+
+    def _start_task(self, widget, key):
+        """Anahtar için yeni bir görev açar; aynı anahtardaki eski görevi geçersiz kılar."""
+        slot = (str(widget), key)
+        with self._lock:
+            generation = self._generations.get(slot, 0) + 1
+            self._generations[slot] = generation
+            previous = self._tasks.get(slot)
+            task = BackgroundTask(self, slot, generation)
+            self._tasks[slot] = task
+
+        if previous is not None and previous.future is not None:
+            previous.future.cancel()
+
+        self._ensure_pump(widget)
+        return task
+
+    def run(self, func, *args, **kwargs):
+        """Sonucu beklenmeyen (ateşle ve unut) bir işi arka planda çalıştırır."""
+        return self._executor.submit(func, *args, **kwargs)
+
+    def cancel(self, widget, key=None):
+        """Widget'a ait (veya yalnızca verilen anahtardaki) bekleyen işleri iptal eder."""
+        prefix = str(widget)
+        with self._lock:
+            tasks = [task for slot, task in self._tasks.items()
+                     if slot[0] == prefix and (key is None or slot[1] == key)]
+        for task in tasks:
+            task.cancel()
+
+    def _supersede(self, slot, generation):
+        with self._lock:
+            if self._generations.get(slot) == generation:
+                self._generations[slot] = generation + 1
+                self._tasks.pop(slot, None)
+
+    def _ensure_pump(self, widget):
+        """Sonuç kuyruğunu boşaltan döngüyü uygulamanın kök penceresinde başlatır."""
+        root = widget._root()
+        if self._pump_root is root:
+            return
+        self._pump_root = root
+        root.after(POLL_INTERVAL_MS, self._pump)
+
+    def _pump(self):
+        root = self._pump_root
+        while True:
+            try:
+                task, widget, callback, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if not task.is_current:
+                continue
+            self._supersede(task._slot, task._generation)
+            if callback is None:
+                continue
+            try:
+                if not widget.winfo_exists():
+                    continue
+                callback(value)
+            except Exception:
+                traceback.print_exc()
+
+        try:
+            root.after(POLL_INTERVAL_MS, self._pump)
+        except Exception:
+            # Kök pencere yok edildi, döngü sona erer
+            if self._pump_root is root:
+                self._pump_root = None
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Uygulama genelinde paylaşılan arka plan yürütücüsünü döndürür."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = BackgroundExecutor()
+        return _executor
+
+
+def run_in_background(widget, key, func, *args, on_success=None, on_error=None, **kwargs):
+    """get_executor().submit(...) için kısayol."""
+    return get_executor().submit(widget, key, func, *args, on_success=on_success, on_error=on_error, **kwargs)
@@ -1,13 +1,17 @@
 import customtkinter as ctk
 from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import pyodbc
-from datetime import datetime, timedelta
-import requests
-from io import BytesIO
-import threading
+from datetime import datetime
 
 from database import get_db_connection
+from background import run_in_background, get_executor
+from search_index import get_search_index, MAX_RESULTS
+from search_controller import DebouncedSearch, NarrowingResults, text_matches
+from tree_model import KeyedTreeModel
+from penalty_sweeper import fetch_penalty_notices, mark_notices_shown, save_notices_seen
+from image_cache import get_cover_loader
+from reservations import reserve_book, ReservationResult, ACTIVE_RESERVATION_LIMIT, LOAN_DAYS
 
 # Renkler ve yazı boyutları
 DARK_BLUE = "#0a0a1a"
@@ -21,50 +25,45 @@ HEADING_FONT_SIZE = 18
 NORMAL_FONT_SIZE = 16
 LARGE_FONT_SIZE = 20
 
+# Kapak önceden yükleme: kaydırma durduktan sonraki bekleme (ms) ve görünür alanın üstü/altı için ek satır
+COVER_PREFETCH_DELAY_MS = 150
+COVER_PREFETCH_MARGIN = 5
 
-def get_image_from_url(url, callback=None):
-    """URL'den resmi arka planda yükler ve callback ile döndürür."""
 
-    def download_image():
-        try:
-            if not url:
-                if callback:
-                    callback(None)
-                return None
-
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            img_data = response.content
-            img = Image.open(BytesIO(img_data)).resize((120, 180), Image.LANCZOS)
-            photo_image = ImageTk.PhotoImage(img)
+def get_image_from_url(widget, url, callback):
+    """
+    Kapak resmini önbellekten veya indirme havuzundan yükler ve callback ile Tk thread'inde
+    döndürür. Bellekte bulunan resim beklemeden verilir. Dönen istek cancel() ile geri
+    çekilebilir; widget kapanırsa callback çağrılmaz.
+    """
+    request = get_cover_loader().request(url)
+    if request.future.done() and not request.future.cancelled():
+        image = request.future.result()
+        callback(ImageTk.PhotoImage(image) if image is not None else None)
+        return request
 
-            if callback:
-                callback(photo_image)
-            return photo_image
+    def on_loaded(pil_image):
+        # PhotoImage yalnızca Tk thread'inde oluşturulabilir
+        callback(ImageTk.PhotoImage(pil_image) if pil_image is not None else None)
 
-        except Exception as e:
-            print(f"Resim yükleme hatası: {e}")
-            if callback:
-                callback(None)
-            return None
+    def on_error(error):
+        print(f"Resim yükleme hatası: {error}")
+        callback(None)
 
-    # Arka planda indirmeyi başlat
-    thread = threading.Thread(target=download_image)
-    thread.daemon = True
-    thread.start()
-
-    # Hemen None döndür, callback ile resim gelecek
-    return None
+    get_executor().watch(widget, "kapak_resmi", request.future, on_success=on_loaded, on_error=on_error)
+    return request
 
 
 class BookReservationApp(ctk.CTkToplevel):
-    def __init__(self, master, show_main_menu_callback, user_name):
+    def __init__(self, master, show_main_menu_callback, session):
         super().__init__(master)
         self.master = master
         self.show_main_menu_callback = show_main_menu_callback
-        self.user_name = user_name
-        self.user_id = self.get_user_id()
+        self.session = session  # session.UserSession; kullanıcı adıyla yeniden sorgulanmaz
+        self.user_id = session.kullanici_id
         self.books = []
+        self._cover_urls = {}  # kitap_id -> kapak resmi URL (önceden yükleme için)
+        self._reserving = set()  # Rezervasyon isteği süren kitap_id'ler
         # Tüm Kitaplar sayfası filtreleri
         self.current_author_filter = ""
         self.current_genre_filter = ""
@@ -77,6 +76,9 @@ class BookReservationApp(ctk.CTkToplevel):
         self.current_past_genre_filter = ""
         self.current_past_year_filter = ""
         self.current_past_publisher_filter = ""
+        # Arama terimi uzatıldığında sonuçları veritabanına gitmeden daraltmak için
+        self._book_results = NarrowingResults(self._narrow_books)
+        self._past_results = NarrowingResults(self._narrow_past_reservations)
 
         # Arayüzü yapılandır
         self.title("Kitap Rezervasyon Uygulaması")
@@ -111,81 +113,28 @@ class BookReservationApp(ctk.CTkToplevel):
         self.show_main_menu_callback()
         self.destroy()
 
-    def get_user_id(self):
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT kullanici_id FROM kullanici WHERE isim = ?", self.user_name)
-                result = cursor.fetchone()
-                return result[0] if result else None
-        except pyodbc.Error as ex:
-            messagebox.showerror("Hata", f"Kullanıcı bilgileri alınırken veritabanı hatası: {ex}")
-            return None
-        except Exception as e:
-            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}")
-            return None
-
     def check_penalties(self):
-        """14 gün içinde iade edilmeyen kitaplar için ceza puanı uygular,
-        cezalara tablosuna kaydeder ve kullanıcıyı uyarır."""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-
-                # 14 günü geçen ve henüz teslim edilmemiş rezervasyonları bul
-                bugun = datetime.now().date()
-                cursor.execute("""
-                               SELECT kr.kitap_rezervasyon_id, kr.kullanici_id, k.isim, kit.ad, kr.son_iade_tarihi
-                               FROM kitap_rezervasyon kr
-                                        JOIN kullanici k ON kr.kullanici_id = k.kullanici_id
-                                        JOIN kitap kit ON kr.kitap_id = kit.kitap_id
-                               WHERE kr.teslim_edildi_mi = 0
-                                 AND kr.son_iade_tarihi < ?
-                                 AND kr.durum = 'aktif'
-                               """, bugun)
-
-                geciken_rezervasyonlar = cursor.fetchall()
-
-                for rezervasyon_id, kullanici_id, kullanici_adi, kitap_adi, son_iade_tarihi in geciken_rezervasyonlar:
-                    # Durumu gecikti olarak güncelle
-                    cursor.execute("""
-                                   UPDATE kitap_rezervasyon
-                                   SET durum      = 'gecikti',
-                                       gecikti_mi = 1
-                                   WHERE kitap_rezervasyon_id = ?
-                                   """, rezervasyon_id)
-
-                    # Ceza puanı uygula
-                    cursor.execute("""
-                                   UPDATE kullanici
-                                   SET ceza_puani = ISNULL(ceza_puani, 0) + 5
-                                   WHERE kullanici_id = ?
-                                   """, kullanici_id)
-
-                    # Ceza detaylarını cezalara tablosuna ekle
-                    cursor.execute("""
-                                   INSERT INTO cezalar (kullanici_id, aciklama, tarih,
-                                                        masa_rezervasyon_id, kitap_rezervasyon_id)
-                                   VALUES (?, ?, GETDATE(), NULL, NULL, ?)
-                                   """, kullanici_id, f"Kitap zamanında iade edilmedi: {kitap_adi}", rezervasyon_id)
-
-                    print(
-                        f"Kullanıcı {kullanici_adi} için 5 ceza puanı uygulandı. Rezervasyon ID: {rezervasyon_id}")
-
-                    # Eğer ceza alan kullanıcı şu anki kullanıcıysa uyarı göster
-                    if kullanici_id == self.user_id:
-                        messagebox.showwarning(
-                            "Ceza Uyarısı",
-                            f"'{kitap_adi}' kitabını zamanında iade etmediğiniz için 5 ceza puanı aldınız!\n\n"
-                            f"Lütfen en kısa sürede kitabı iade ediniz."
-                        )
-
-                conn.commit()
+        """Ceza tarama servisinin bu kullanıcıya yazdığı yeni gecikme cezalarını arka planda okur
+        ve kullanıcıyı uyarır. Cezaların kendisi penalty_sweeper.py tarafından uygulanır."""
+        if self.user_id is None:
+            return
+        run_in_background(self, "penalty_notices", fetch_penalty_notices, self.user_id, kind="kitap",
+                          on_success=self._show_penalty_notices,
+                          on_error=lambda e: print(f"Ceza kontrolü sırasında hata: {e}"))
+
+    def _show_penalty_notices(self, notices):
+        for notice in notices:
+            messagebox.showwarning(
+                "Ceza Uyarısı",
+                f"{notice.aciklama}\n\nBu nedenle 5 ceza puanı aldınız. "
+                f"Lütfen en kısa sürede kitabı iade ediniz."
+            )
+        if notices:
+            # Yalnızca gösterilen kayıtlar görülmüş sayılır
+            mark_notices_shown(notices)
+            run_in_background(self, "penalty_notices_seen", save_notices_seen, self.user_id, "kitap", notices,
+                              on_error=lambda e: print(f"Ceza bildirimleri kaydedilirken hata: {e}"))
 
-        except pyodbc.Error as ex:
-            print(f"Ceza kontrolü sırasında hata: {ex}")
-        except Exception as e:
-            print(f"Beklenmedik hata: {e}")
     def _create_navbar(self):
         """Navigasyon çubuğunu oluşturur."""
         ctk.CTkLabel(self.navbar_frame, text="Navigasyon", font=ctk.CTkFont(size=HEADING_FONT_SIZE, weight="bold"),
@@ -229,12 +178,13 @@ class BookReservationApp(ctk.CTkToplevel):
         self.search_entry = ctk.CTkEntry(search_filter_frame, placeholder_text="Kitap, yazar veya türe göre ara...",
                                          font=ctk.CTkFont(size=NORMAL_FONT_SIZE))
         self.search_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
-        self.search_entry.bind("<KeyRelease>", self.search_books)
+        self.book_search = DebouncedSearch(self.search_entry, lambda term: self.search_books(),
+                                           owner=self, cancel_key="load_books")
 
         # Arama ve filtreleme butonları
         self.search_button = ctk.CTkButton(search_filter_frame, text="Ara",
                                            font=ctk.CTkFont(size=NORMAL_FONT_SIZE, weight="bold"),
-                                           command=self.search_books)
+                                           command=lambda: self.book_search.search_now())
         self.search_button.grid(row=0, column=1)
 
         self.filter_button = ctk.CTkButton(search_filter_frame, text="Filtreler",
@@ -265,6 +215,7 @@ class BookReservationApp(ctk.CTkToplevel):
         self.book_tree = ttk.Treeview(self.content_frame,
                                       columns=("Ad", "Yazar", "Tür", "Sayfa Sayısı", "Mevcut Adet"),
                                       show="headings")
+        self.book_model = KeyedTreeModel(self.book_tree)  # Satırlar kitap_id ile eşlenir
         self.book_tree.heading("Ad", text="Kitap Adı", anchor="w")
         self.book_tree.heading("Yazar", text="Yazar", anchor="w")
         self.book_tree.heading("Tür", text="Tür", anchor="w")
@@ -281,6 +232,11 @@ class BookReservationApp(ctk.CTkToplevel):
 
         # Treeview'a çift tıklama olayını bağla
         self.book_tree.bind("<Double-1>", self.on_double_click)
+
+        # Görünen satırların kapaklarını önceden yükle (kaydırma ve yeniden boyutlandırmada)
+        self._prefetch_after_id = None
+        self.book_tree.configure(yscrollcommand=lambda first, last: self._schedule_cover_prefetch())
+        self.book_tree.bind("<Configure>", lambda event: self._schedule_cover_prefetch(), add="+")
         self.load_books()
 
     def _open_filter_popup(self, page_name):
@@ -302,11 +258,12 @@ class BookReservationApp(ctk.CTkToplevel):
                                               placeholder_text="Kitap, yazar veya türe göre ara...",
                                               font=ctk.CTkFont(size=NORMAL_FONT_SIZE))
         self.past_search_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
-        self.past_search_entry.bind("<KeyRelease>", self.search_past_reservations)
+        self.past_search = DebouncedSearch(self.past_search_entry, lambda term: self.search_past_reservations(),
+                                           owner=self, cancel_key="past_reservations")
 
         self.past_search_button = ctk.CTkButton(search_filter_frame, text="Ara",
                                                 font=ctk.CTkFont(size=NORMAL_FONT_SIZE, weight="bold"),
-                                                command=self.search_past_reservations)
+                                                command=lambda: self.past_search.search_now())
         self.past_search_button.grid(row=0, column=1)
 
         self.past_filter_button = ctk.CTkButton(search_filter_frame, text="Filtreler",
@@ -337,6 +294,7 @@ class BookReservationApp(ctk.CTkToplevel):
         self.past_reservations_tree = ttk.Treeview(self.content_frame,
                                                    columns=("Ad", "Yazar", "Alış Tarihi", "İade Tarihi"),
                                                    show="headings")
+        self.past_model = KeyedTreeModel(self.past_reservations_tree)  # Satırlar kitap_rezervasyon_id ile eşlenir
         self.past_reservations_tree.heading("Ad", text="Kitap Adı", anchor="w")
         self.past_reservations_tree.heading("Yazar", text="Yazar", anchor="w")
         self.past_reservations_tree.heading("Alış Tarihi", text="Alış Tarihi", anchor="center")
@@ -358,6 +316,8 @@ class BookReservationApp(ctk.CTkToplevel):
 
         selected_item = self.book_tree.item(item_id)
         book_id = selected_item["tags"][0]
+        if book_id in ("no_books", "loading", "error"):
+            return
 
         book_details = self.get_book_details(book_id)
         if book_details:
@@ -366,116 +326,213 @@ class BookReservationApp(ctk.CTkToplevel):
             messagebox.showerror("Hata", "Kitap detayları alınamadı.")
 
     def load_books(self, search_term=None, author=None, genre=None, year=None, publisher=None, availability=None):
-        """Tüm kitapları veritabanından alır ve arayüzde listeler."""
-        try:
-            self.book_tree.delete(*self.book_tree.get_children())
-
-            if search_term is None: search_term = self.search_entry.get().strip()
-            if author is None: author = self.current_author_filter
-            if genre is None: genre = self.current_genre_filter
-            if year is None: year = self.current_year_filter
-            if publisher is None: publisher = self.current_publisher_filter
-            if availability is None: availability = self.current_availability_filter
-
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-
-                sorgu = """
-                        SELECT k.kitap_id,
-                               k.ad,
-                               k.yayin_yili,
-                               k.yayinevi,
-                               k.kapak_resmi_url,
-                               k.sayfa_sayisi,
-                               k.isbn,
-                               k.ozet,
-                               STRING_AGG(T.ad, ', ')                                             AS Turler,
-                               STRING_AGG(Y.ad, ', ')                                             AS Yazarlar,
-                               k.adet,
-                               ISNULL(SUM(CASE WHEN r.teslim_edildi_mi = 0 THEN 1 ELSE 0 END), 0) AS rezerve_edilen,
-                               CASE
-                                   WHEN EXISTS (SELECT 1 
-                                                FROM kitap_rezervasyon 
-                                                WHERE kitap_id = k.kitap_id 
-                                                  AND kullanici_id = ? 
-                                                  AND teslim_edildi_mi = 0) THEN 1
-                                   ELSE 0 END                                                     AS is_reserved
-                        FROM Kitap k
-                                 LEFT JOIN kitap_tur kt ON k.kitap_id = kt.kitap_id
-                                 LEFT JOIN tur T ON kt.tur_id = T.tur_id
-                                 LEFT JOIN kitap_yazar ky ON k.kitap_id = ky.kitap_id
-                                 LEFT JOIN yazar Y ON ky.yazar_id = Y.yazar_id
-                                 LEFT JOIN kitap_rezervasyon r ON k.kitap_id = r.kitap_id
-                        WHERE (T.ad LIKE ? OR Y.ad LIKE ? OR k.ad LIKE ?)
-                          AND (? = '' OR Y.ad LIKE ?)
-                          AND (? = '' OR T.ad LIKE ?)
-                          AND (? = '' OR k.yayin_yili = ?)
-                          AND (? = '' OR k.yayinevi LIKE ?)
-                        GROUP BY k.kitap_id, k.ad, k.yayin_yili, k.yayinevi, k.kapak_resmi_url, k.sayfa_sayisi, k.isbn, k.ozet, k.adet
-                        HAVING (? = 'Tümü' OR
-                                (? = 'Evet' AND 
-                                 k.adet > ISNULL(SUM(CASE WHEN r.teslim_edildi_mi = 0 THEN 1 ELSE 0 END), 0)) OR
-                                (? = 'Hayır' AND 
-                                 k.adet <= ISNULL(SUM(CASE WHEN r.teslim_edildi_mi = 0 THEN 1 ELSE 0 END), 0)))
-                        ORDER BY k.ad;
-                        """
-
-                # Parametreleri düzenle
-                search_term_like = f"%{search_term}%" if search_term else '%'
-                author_like = f"%{author}%" if author else '%'
-                genre_like = f"%{genre}%" if genre else '%'
-                publisher_like = f"%{publisher}%" if publisher else '%'
+        """Tüm kitapları veritabanından arka planda alır ve arayüzde listeler."""
+        if search_term is None: search_term = self.search_entry.get().strip()
+        if author is None: author = self.current_author_filter
+        if genre is None: genre = self.current_genre_filter
+        if year is None: year = self.current_year_filter
+        if publisher is None: publisher = self.current_publisher_filter
+        if availability is None: availability = self.current_availability_filter
+
+        # Terim öncekini genişletiyorsa ve filtreler aynıysa sonuçları bellekte daralt
+        context = (author, genre, year, publisher, availability)
+        narrowed = self._book_results.narrow(search_term, context)
+        if narrowed is not None:
+            get_executor().cancel(self, "load_books")
+            self._on_books_loaded(search_term, context, narrowed)
+            return
 
-                # Yıl filtresi için özel durum - integer'a dönüştür
+        # Parametreleri düzenle
+        author_like = f"%{author}%" if author else '%'
+        genre_like = f"%{genre}%" if genre else '%'
+        publisher_like = f"%{publisher}%" if publisher else '%'
+
+        # Yıl filtresi için özel durum - integer'a dönüştür
+        year_param = None
+        if year and year.strip():
+            try:
+                year_param = int(year.strip())
+            except ValueError:
                 year_param = None
-                if year and year.strip():
-                    try:
-                        year_param = int(year.strip())
-                    except ValueError:
-                        year_param = None
-
-                # Parametreleri hazırla
-                params = [
-                    self.user_id,
-                    search_term_like, search_term_like, search_term_like,
-                    author or '', author_like,
-                    genre or '', genre_like,
-                    year or '', year_param,
-                    publisher or '', publisher_like,
-                    availability, availability, availability
-                ]
-
-                cursor.execute(sorgu, params)
-                self.books = cursor.fetchall()
-
-            if not self.books:
-                self.book_tree.insert("", "end", values=("Filtrelere uygun kitap bulunamadı.", "", "", "", ""),
-                                      tags=("no_books",))
-                return
 
-            for book_row in self.books:
-                (kitap_id, ad, yayin_yili, yayinevi, kapak_resmi_url, sayfa_sayisi, isbn, ozet, turler, yazarlar,
-                 adet, rezerve_edilen, is_reserved) = book_row
+        # Parametreleri hazırla
+        params = [
+            author or '', author_like,
+            genre or '', genre_like,
+            year or '', year_param,
+            publisher or '', publisher_like,
+            availability, availability, availability
+        ]
+
+        # Liste boşsa sorgu sürerken yükleniyor durumunu göster; doluysa sonuç gelene kadar mevcut satırlar kalır
+        if self.book_model.is_empty():
+            self.book_model.show_message(("⏳ Kitaplar yükleniyor...", "", "", "", ""), tags=("loading",))
+
+        # Diğer filtreler indeks dışında SQL'de uygulandığından eşleşmeler sınırlanmadan gönderilir
+        filtered = any((author, genre, year, publisher)) or availability != 'Tümü'
+        run_in_background(self, "load_books", self._query_books, self.user_id, search_term, params, filtered,
+                          on_success=lambda result: self._on_books_loaded(search_term, context, result),
+                          on_error=self._on_load_books_error)
+
+    @staticmethod
+    def _query_books(user_id, search_term, params, filtered=False):
+        """
+        Kitap listesini veritabanından çeker (işçi thread'de çalışır).
+        Arama terimi arama indeksinde çözülür; veritabanına yalnızca eşleşen kitap_id'ler
+        gönderilir ve sonuçlar indeksin puan sırasıyla döndürülür. filtered ise (yazar, tür, yıl,
+        yayınevi veya durum filtresi) eşleşmeler kesilmez; aksi halde filtreler ilk MAX_RESULTS
+        eşleşmeye uygulanır ve uygun kitaplar dışarıda kalabilirdi.
+        (kitaplar, eşleşen kitap_id kümesi veya terim yoksa None) döndürür.
+        """
+        ranked_ids = None
+        if search_term:
+            index = get_search_index()
+            index.ensure_fresh()
+            ranked_ids = index.search(search_term, limit=None if filtered else MAX_RESULTS)
+            if ranked_ids is not None and not ranked_ids:
+                return [], set()
+
+        if ranked_ids is None:
+            search_filter = "1 = 1"
+            filter_params = []
+        else:
+            search_filter = "k.kitap_id IN (SELECT CAST(value AS INT) FROM STRING_SPLIT(?, ','))"
+            filter_params = [",".join(str(kitap_id) for kitap_id in ranked_ids)]
+
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            sorgu = f"""
+                    SELECT k.kitap_id,
+                           k.ad,
+                           k.yayin_yili,
+                           k.yayinevi,
+                           k.kapak_resmi_url,
+                           k.sayfa_sayisi,
+                           k.isbn,
+                           k.ozet,
+                           STRING_AGG(T.ad, ', ')                                             AS Turler,
+                           STRING_AGG(Y.ad, ', ')                                             AS Yazarlar,
+                           k.adet                                                             AS mevcut_adet,
+                           CASE
+                               WHEN EXISTS (SELECT 1 
+                                            FROM kitap_rezervasyon 
+                                            WHERE kitap_id = k.kitap_id 
+                                              AND kullanici_id = ? 
+                                              AND teslim_edildi_mi = 0) THEN 1
+                               ELSE 0 END                                                     AS is_reserved
+                    FROM Kitap k
+                             LEFT JOIN kitap_tur kt ON k.kitap_id = kt.kitap_id
+                             LEFT JOIN tur T ON kt.tur_id = T.tur_id
+                             LEFT JOIN kitap_yazar ky ON k.kitap_id = ky.kitap_id
+                             LEFT JOIN yazar Y ON ky.yazar_id = Y.yazar_id
+                    WHERE {search_filter}
+                      AND (? = '' OR Y.ad LIKE ?)
+                      AND (? = '' OR T.ad LIKE ?)
+                      AND (? = '' OR k.yayin_yili = ?)
+                      AND (? = '' OR k.yayinevi LIKE ?)
+                      AND (? = 'Tümü' OR (? = 'Evet' AND k.adet > 0) OR (? = 'Hayır' AND k.adet <= 0))
+                    GROUP BY k.kitap_id, k.ad, k.yayin_yili, k.yayinevi, k.kapak_resmi_url, k.sayfa_sayisi, k.isbn, k.ozet, k.adet
+                    ORDER BY k.ad;
+                    """
+
+            cursor.execute(sorgu, [user_id, *filter_params, *params])
+            books = cursor.fetchall()
+
+        if ranked_ids is not None:
+            rank = {kitap_id: position for position, kitap_id in enumerate(ranked_ids)}
+            books.sort(key=lambda row: rank[row[0]])
+            return books, set(ranked_ids)
+        return books, None
+
+    def _on_books_loaded(self, search_term, context, result):
+        self._book_results.store(search_term, result, context)
+        self._display_books(result[0])
+
+    @staticmethod
+    def _narrow_books(result, search_term):
+        """
+        Önceki sonuçları yeni terimle daraltır. Yeni eşleşmelerin tamamı önceki aramada da
+        eşleşmiş olmalıdır; aksi halde (ör. sonuç sınırına takılmış arama) None döner.
+        """
+        books, matched_ids = result
+        index = get_search_index()
+        if index.is_stale:
+            return None
+        # Önceki sonuçlar zaten süzülmüş; kesişim için eşleşmelerin tamamı gerekir
+        ranked_ids = index.search(search_term, limit=None)
+        if ranked_ids is None:
+            return None
+        if matched_ids is not None and not matched_ids.issuperset(ranked_ids):
+            return None
+        by_id = {row[0]: row for row in books}
+        return [by_id[kitap_id] for kitap_id in ranked_ids if kitap_id in by_id], set(ranked_ids)
 
-                # Sayısal değerleri güvenli şekilde dönüştür
-                try:
-                    adet_int = int(adet) if adet is not None else 0
-                    rezerve_edilen_int = int(rezerve_edilen) if rezerve_edilen is not None else 0
-                    mevcut_adet = max(0, adet_int - rezerve_edilen_int)
-                except (ValueError, TypeError):
-                    mevcut_adet = 0
+    def _display_books(self, books):
+        """Çekilen kitapları Treeview'a yerleştirir (Tk thread'inde çalışır)."""
+        if not self.book_tree.winfo_exists():
+            return
+        self.books = books
 
-                self.book_tree.insert("", "end",
-                                      values=(ad, yazarlar, turler, sayfa_sayisi, mevcut_adet),
-                                      tags=(kitap_id, 'normal'))
+        if not self.books:
+            self.book_model.show_message(("Filtrelere uygun kitap bulunamadı.", "", "", "", ""), tags=("no_books",))
+            return
 
-        except pyodbc.Error as ex:
-            messagebox.showerror("Veritabanı Hatası", f"Veritabanı hatası: {ex.args[1]}")
-            self.book_tree.insert("", "end", values=("Bir hata oluştu. Lütfen tekrar deneyin.", "", "", "", ""),
-                                  tags=("error",))
-            print(f"Hata detayı: {ex}")
-        except Exception as e:
-            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}")
+        rows = []
+        for book_row in self.books:
+            (kitap_id, ad, yayin_yili, yayinevi, kapak_resmi_url, sayfa_sayisi, isbn, ozet, turler, yazarlar,
+             mevcut_adet, is_reserved) = book_row
+
+            # Sayısal değeri güvenli şekilde dönüştür
+            try:
+                mevcut_adet = max(0, int(mevcut_adet)) if mevcut_adet is not None else 0
+            except (ValueError, TypeError):
+                mevcut_adet = 0
+
+            rows.append((kitap_id, (ad, yazarlar, turler, sayfa_sayisi, mevcut_adet), (kitap_id, 'normal')))
+
+        # Yalnızca değişen satırlar güncellenir; seçim ve kaydırma konumu korunur
+        self.book_model.sync(rows)
+        self._cover_urls = {book_row[0]: book_row[4] for book_row in self.books}
+        self._schedule_cover_prefetch()
+
+    def _schedule_cover_prefetch(self):
+        """Kaydırma sürerken her adımda değil, durulduğunda bir kez önceden yükleme yapar."""
+        if self._prefetch_after_id is not None:
+            self.book_tree.after_cancel(self._prefetch_after_id)
+        self._prefetch_after_id = self.book_tree.after(COVER_PREFETCH_DELAY_MS, self._prefetch_visible_covers)
+
+    def _prefetch_visible_covers(self):
+        self._prefetch_after_id = None
+        if not self.book_tree.winfo_exists():
+            return
+        children = self.book_tree.get_children()
+        if not children:
+            return
+        first, last = self.book_tree.yview()
+        start = max(0, int(first * len(children)) - COVER_PREFETCH_MARGIN)
+        end = min(len(children), int(last * len(children)) + 1 + COVER_PREFETCH_MARGIN)
+
+        urls = []
+        for iid in children[start:end]:
+            try:
+                url = self._cover_urls.get(int(iid))
+            except ValueError:
+                continue  # Bilgi mesajı satırı
+            if url:
+                urls.append(url)
+        get_cover_loader().prefetch(urls)
+
+    def _on_load_books_error(self, error):
+        if not self.book_tree.winfo_exists():
+            return
+        if isinstance(error, pyodbc.Error):
+            messagebox.showerror("Veritabanı Hatası", f"Veritabanı hatası: {error.args[1]}")
+            self.book_model.show_message(("Bir hata oluştu. Lütfen tekrar deneyin.", "", "", "", ""), tags=("error",))
+            print(f"Hata detayı: {error}")
+        else:
+            self.book_model.clear()
+            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {error}")
 
     def load_active_reservations(self):
         """Kullanıcının aktif rezervasyonlarını veritabanından alır ve listeler."""
@@ -588,87 +645,112 @@ class BookReservationApp(ctk.CTkToplevel):
             messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}")
 
     def load_past_reservations(self, search_term=None, author=None, genre=None, year=None, publisher=None):
-        """Kullanıcının geçmiş rezervasyonlarını veritabanından alır ve listeler."""
-        try:
-            self.past_reservations_tree.delete(*self.past_reservations_tree.get_children())
-
-            if search_term is None: search_term = self.past_search_entry.get().strip()
-            if author is None: author = self.current_past_author_filter
-            if genre is None: genre = self.current_past_genre_filter
-            if year is None: year = self.current_past_year_filter
-            if publisher is None: publisher = self.current_past_publisher_filter
-
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                sorgu = """
-                        SELECT r.kitap_rezervasyon_id,
-                               k.ad,
-                               STRING_AGG(y.ad, ', ') AS Yazarlar,
-                               STRING_AGG(t.ad, ', ') AS Turler,
-                               k.yayin_yili,
-                               k.yayinevi,
-                               r.alis_tarihi,
-                               r.iade_tarihi
-                        FROM kitap_rezervasyon r
-                                 JOIN kitap k ON r.kitap_id = k.kitap_id
-                                 LEFT JOIN kitap_yazar ky ON k.kitap_id = ky.kitap_id
-                                 LEFT JOIN yazar y ON ky.yazar_id = y.yazar_id
-                                 LEFT JOIN kitap_tur kt ON k.kitap_id = kt.kitap_id
-                                 LEFT JOIN tur t ON kt.tur_id = t.tur_id
-                        WHERE r.kullanici_id = ?
-                          AND r.teslim_edildi_mi = 1
-                          AND (k.ad LIKE ? OR y.ad LIKE ? OR t.ad LIKE ?)
-                          AND (? = '' OR y.ad LIKE ?)
-                          AND (? = '' OR t.ad LIKE ?)
-                          AND (? = '' OR k.yayin_yili = ?)
-                          AND (? = '' OR k.yayinevi LIKE ?)
-                        GROUP BY k.ad, r.alis_tarihi, r.iade_tarihi, r.kitap_rezervasyon_id, k.yayin_yili, k.yayinevi
-                        ORDER BY r.iade_tarihi DESC;
-                        """
-
-                search_term_like = f"%{search_term}%"
-                author_like = f"%{author}%" if author else '%'
-                genre_like = f"%{genre}%" if genre else '%'
-                publisher_like = f"%{publisher}%" if publisher else '%'
-
-                # Yıl filtresi için özel durum
-                year_param = int(year) if year and year.isdigit() else None
-
-                params = (
-                    self.user_id,
-                    search_term_like, search_term_like, search_term_like,
-                    author, author_like,
-                    genre, genre_like,
-                    year, year_param,
-                    publisher, publisher_like
-                )
+        """Kullanıcının geçmiş rezervasyonlarını veritabanından arka planda alır ve listeler."""
+        if search_term is None: search_term = self.past_search_entry.get().strip()
+        if author is None: author = self.current_past_author_filter
+        if genre is None: genre = self.current_past_genre_filter
+        if year is None: year = self.current_past_year_filter
+        if publisher is None: publisher = self.current_past_publisher_filter
+
+        # Terim öncekini genişletiyorsa ve filtreler aynıysa sonuçları bellekte daralt
+        context = (author, genre, year, publisher)
+        narrowed = self._past_results.narrow(search_term, context)
+        if narrowed is not None:
+            get_executor().cancel(self, "past_reservations")
+            self._on_past_reservations_loaded(search_term, context, narrowed)
+            return
 
-                cursor.execute(sorgu, params)
-                reservations = cursor.fetchall()
+        search_term_like = f"%{search_term}%"
+        author_like = f"%{author}%" if author else '%'
+        genre_like = f"%{genre}%" if genre else '%'
+        publisher_like = f"%{publisher}%" if publisher else '%'
+
+        # Yıl filtresi için özel durum
+        year_param = int(year) if year and year.isdigit() else None
+
+        params = (
+            self.user_id,
+            search_term_like, search_term_like, search_term_like,
+            author, author_like,
+            genre, genre_like,
+            year, year_param,
+            publisher, publisher_like
+        )
+
+        run_in_background(self, "past_reservations", self._query_past_reservations, params,
+                          on_success=lambda rows: self._on_past_reservations_loaded(search_term, context, rows),
+                          on_error=self._on_past_reservations_error)
+
+    @staticmethod
+    def _query_past_reservations(params):
+        """Geçmiş rezervasyonları veritabanından çeker (işçi thread'de çalışır)."""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            sorgu = """
+                    SELECT r.kitap_rezervasyon_id,
+                           k.ad,
+                           STRING_AGG(y.ad, ', ') AS Yazarlar,
+                           STRING_AGG(t.ad, ', ') AS Turler,
+                           k.yayin_yili,
+                           k.yayinevi,
+                           r.alis_tarihi,
+                           r.iade_tarihi
+                    FROM kitap_rezervasyon r
+                             JOIN kitap k ON r.kitap_id = k.kitap_id
+                             LEFT JOIN kitap_yazar ky ON k.kitap_id = ky.kitap_id
+                             LEFT JOIN yazar y ON ky.yazar_id = y.yazar_id
+                             LEFT JOIN kitap_tur kt ON k.kitap_id = kt.kitap_id
+                             LEFT JOIN tur t ON kt.tur_id = t.tur_id
+                    WHERE r.kullanici_id = ?
+                      AND r.teslim_edildi_mi = 1
+                      AND (k.ad LIKE ? OR y.ad LIKE ? OR t.ad LIKE ?)
+                      AND (? = '' OR y.ad LIKE ?)
+                      AND (? = '' OR t.ad LIKE ?)
+                      AND (? = '' OR k.yayin_yili = ?)
+                      AND (? = '' OR k.yayinevi LIKE ?)
+                    GROUP BY k.ad, r.alis_tarihi, r.iade_tarihi, r.kitap_rezervasyon_id, k.yayin_yili, k.yayinevi
+                    ORDER BY r.iade_tarihi DESC;
+                    """
+
+            cursor.execute(sorgu, params)
+            return cursor.fetchall()
+
+    @staticmethod
+    def _narrow_past_reservations(reservations, search_term):
+        # Kitap adı, yazarlar veya türler içinde geçenler
+        return [res for res in reservations if text_matches(search_term, res[1], res[2], res[3])]
+
+    def _on_past_reservations_loaded(self, search_term, context, reservations):
+        self._past_results.store(search_term, reservations, context)
+        self._display_past_reservations(reservations)
+
+    def _display_past_reservations(self, reservations):
+        """Geçmiş rezervasyonları Treeview'a yerleştirir (Tk thread'inde çalışır)."""
+        if not self.past_reservations_tree.winfo_exists():
+            return
+        if not reservations:
+            self.past_model.show_message(("Filtrelere uygun geçmiş rezervasyon bulunamadı.", "", "", ""),
+                                         tags=("no_books",))
+            return
 
-            if not reservations:
-                self.past_reservations_tree.insert("", "end",
-                                                   values=("Filtrelere uygun geçmiş rezervasyon bulunamadı.", "", "",
-                                                           ""),
-                                                   tags=("no_books",))
-                return
+        rows = []
+        for res in reservations:
+            rezervasyon_id, book_name, authors, genres, year_val, publisher_val, reserve_date, return_date = res
 
-            for res in reservations:
-                rezervasyon_id, book_name, authors, genres, year_val, publisher_val, reserve_date, return_date = res
+            # Tarih değerlerini kontrol et
+            reserve_date_str = reserve_date.strftime('%d.%m.%Y') if reserve_date else "Bilinmiyor"
+            return_date_str = return_date.strftime('%d.%m.%Y') if return_date else "Bilinmiyor"
 
-                # Tarih değerlerini kontrol et
-                reserve_date_str = reserve_date.strftime('%d.%m.%Y') if reserve_date else "Bilinmiyor"
-                return_date_str = return_date.strftime('%d.%m.%Y') if return_date else "Bilinmiyor"
+            rows.append((rezervasyon_id, (book_name, authors, reserve_date_str, return_date_str),
+                         (rezervasyon_id,)))
 
-                self.past_reservations_tree.insert("", "end",
-                                                   values=(book_name, authors, reserve_date_str,
-                                                           return_date_str),
-                                                   tags=(rezervasyon_id,))
+        self.past_model.sync(rows)
 
-        except pyodbc.Error as ex:
-            messagebox.showerror("Hata", f"Veritabanı hatası: {ex}")
-        except Exception as e:
-            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}")
+    def _on_past_reservations_error(self, error):
+        if isinstance(error, pyodbc.Error):
+            messagebox.showerror("Hata", f"Veritabanı hatası: {error}")
+        else:
+            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {error}")
 
     def search_books(self, event=None):
         search_term = self.search_entry.get().strip()
@@ -688,83 +770,40 @@ class BookReservationApp(ctk.CTkToplevel):
                                     publisher=self.current_past_publisher_filter)
 
     def reserve_book(self, book_id):
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-
-                # Kullanıcının aktif rezervasyon sayısını kontrol et
-                cursor.execute("""
-                                 SELECT COUNT(*)
-                                 FROM kitap_rezervasyon
-                                 WHERE kullanici_id = ?
-                                   AND durum = 'aktif'
-                                 """, self.user_id)
-                # Buradaki değeri int'e dönüştürdüğünüzden emin olun
-                result = cursor.fetchone()
-                active_reservations_count = int(result[0]) if result and result[0] is not None else 0
-
-                if active_reservations_count >= 5:
-                    messagebox.showerror("Hata",
-                                         "Aktif rezervasyon sayınız 5 ile sınırlıdır. Başka bir kitap rezerve etmek için mevcut rezervasyonlarınızı iade etmelisiniz.")
-                    return
-
-                # Kitabın mevcut olup olmadığını kontrol et (adet alanına göre)
-                cursor.execute("""
-                               SELECT adet
-                               FROM kitap
-                               WHERE kitap_id = ?
-                               """, book_id)
-                result = cursor.fetchone()
-                if not result:
-                    messagebox.showerror("Hata", "Kitap bulunamadı.")
-                    return
-
-                # Adet değerini güvenli şekilde integer'a dönüştür
-                try:
-                    adet = int(result[0]) if result[0] is not None else 0
-                except (ValueError, TypeError):
-                    adet = 0
-
-                if adet <= 0:
-                    messagebox.showerror("Hata", "Kitap stokta bulunmamaktadır.")
-                    return
-
-                # Kullanıcının zaten rezerve edip etmediğini kontrol et
-                cursor.execute("""
-                               SELECT 1
-                               FROM kitap_rezervasyon
-                               WHERE kitap_id = ?
-                                 AND kullanici_id = ?
-                                 AND durum = 'aktif'
-                               """, book_id, self.user_id)
-                if cursor.fetchone():
-                    messagebox.showinfo("Bilgi", "Bu kitabı zaten rezerve etmişsiniz.")
-                    return
-
-                # Rezervasyonu ekle (son_iade_tarihi 14 gün sonra olacak şekilde)
-                son_iade_tarihi = (datetime.now() + timedelta(days=14)).date()
-                cursor.execute("""
-                               INSERT INTO kitap_rezervasyon (kullanici_id, kitap_id, alis_tarihi, teslim_edildi_mi,
-                                                              gecikti_mi, son_iade_tarihi, durum)
-                               VALUES (?, ?, GETDATE(), 0, 0, ?, 'aktif');
-                               """, self.user_id, book_id, son_iade_tarihi)
-
-                # Adet alanını 1 azalt
-                cursor.execute("""
-                               UPDATE kitap
-                               SET adet = adet - 1
-                               WHERE kitap_id = ?
-                               """, book_id)
-
-                conn.commit()
-                messagebox.showinfo("Başarılı", "Kitap başarıyla rezerve edildi! 14 gün içinde iade edilmelidir.")
+        """Kitabı tek bir atomik işlemle arka planda rezerve eder (bkz. reservations.reserve_book)."""
+        if book_id in self._reserving:
+            return  # Aynı kitap için istek sürüyor; çift tıklama ikinci rezervasyon denemesi yapmaz
+        self._reserving.add(book_id)
+
+        def on_success(outcome):
+            self._reserving.discard(book_id)
+            result, _ = outcome
+            if result is ReservationResult.OK:
+                messagebox.showinfo("Başarılı",
+                                    f"Kitap başarıyla rezerve edildi! {LOAN_DAYS} gün içinde iade edilmelidir.")
+            elif result is ReservationResult.LIMIT_REACHED:
+                messagebox.showerror("Hata",
+                                     f"Aktif rezervasyon sayınız {ACTIVE_RESERVATION_LIMIT} ile sınırlıdır. Başka bir kitap rezerve etmek için mevcut rezervasyonlarınızı iade etmelisiniz.")
+            elif result is ReservationResult.DUPLICATE:
+                messagebox.showinfo("Bilgi", "Bu kitabı zaten rezerve etmişsiniz.")
+            elif result is ReservationResult.OUT_OF_STOCK:
+                messagebox.showerror("Hata", "Kitap stokta bulunmamaktadır.")
+            else:
+                messagebox.showerror("Hata", "Kitap bulunamadı.")
 
             self.load_books()  # Listeyi güncelle
 
-        except pyodbc.Error as ex:
-            messagebox.showerror("Hata", f"Veritabanı hatası: {ex}")
-        except Exception as e:
-            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}")
+        def on_error(error):
+            self._reserving.discard(book_id)
+            if isinstance(error, pyodbc.Error):
+                messagebox.showerror("Hata", f"Veritabanı hatası: {error}")
+            else:
+                messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {error}")
+
+        # Kilit beklemesi sırasında arayüz donmasın diye işlem işçi thread'de yapılır
+        run_in_background(self, f"reserve_book_{book_id}", reserve_book, self.user_id, book_id,
+                          on_success=on_success, on_error=on_error)
+
     def display_book_info(self, book_details):
         if not book_details:
             messagebox.showerror("Hata", "Kitap bilgileri bulunamadı.")
@@ -860,8 +899,10 @@ class BookReservationApp(ctk.CTkToplevel):
                                       font=ctk.CTkFont(size=NORMAL_FONT_SIZE),
                                       text_color=TEXT_COLOR)
 
-        # Resmi arka planda yükle
-        get_image_from_url(book_details['kapak_resmi'], update_image)
+        # Resmi arka planda yükle; pencere kapanırsa bekleyen indirme iptal edilir
+        cover_request = get_image_from_url(info_window, book_details['kapak_resmi'], update_image)
+        info_window.bind("<Destroy>",
+                         lambda event: cover_request.cancel() if event.widget is info_window else None, add="+")
 
     def get_book_details(self, book_id):
         try:
@@ -878,8 +919,11 @@ class BookReservationApp(ctk.CTkToplevel):
                                k.ozet,
                                STRING_AGG(T.ad, ', ')                                             AS Turler,
                                STRING_AGG(Y.ad, ', ')                                             AS Yazarlar,
-                               k.adet,
-                               ISNULL(SUM(CASE WHEN r.teslim_edildi_mi = 0 THEN 1 ELSE 0 END), 0) AS rezerve_edilen,
+                               k.adet                                                             AS mevcut_adet,
+                               (SELECT COUNT(*)
+                                FROM kitap_rezervasyon
+                                WHERE kitap_id = k.kitap_id
+                                  AND teslim_edildi_mi = 0)                                       AS odunc_verilen,
                                CASE
                                    WHEN EXISTS (SELECT 1
                                                 FROM kitap_rezervasyon
@@ -892,7 +936,6 @@ class BookReservationApp(ctk.CTkToplevel):
                                  LEFT JOIN tur T ON kt.tur_id = T.tur_id
                                  LEFT JOIN kitap_yazar ky ON k.kitap_id = ky.kitap_id
                                  LEFT JOIN yazar Y ON ky.yazar_id = Y.yazar_id
-                                 LEFT JOIN kitap_rezervasyon r ON k.kitap_id = r.kitap_id
                         WHERE k.kitap_id = ?
 GROUP BY k.kitap_id, k.ad, k.yayin_yili, k.yayinevi, k.kapak_resmi_url, k.sayfa_sayisi, k.isbn, k.ozet, k.adet;
                         """
@@ -903,9 +946,10 @@ GROUP BY k.kitap_id, k.ad, k.yayin_yili, k.yayinevi, k.kapak_resmi_url, k.sayfa_
                     return None
 
                 (kitap_id, ad, yayin_yili, yayinevi, kapak_resmi_url, sayfa_sayisi, isbn, ozet, turler, yazarlar,
-                 adet, rezerve_edilen, is_reserved) = book_row
-                rezerve_edilen = rezerve_edilen if rezerve_edilen is not None else 0
-                mevcut_adet = int(adet) - int(rezerve_edilen)
+                 mevcut_adet, odunc_verilen, is_reserved) = book_row
+                # kitap.adet rafta bekleyen kopya sayısıdır; toplam = raftaki + ödünç verilen
+                mevcut_adet = max(0, int(mevcut_adet or 0))
+                adet = mevcut_adet + int(odunc_verilen or 0)
 
                 return {
                     "id": kitap_id,
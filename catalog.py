@@ -0,0 +1,247 @@
+"""
+Katalog yazma işlemleri: kitap, yazar ve tür kayıtlarının eklenmesi.
+
+Yazar ve tür adları süreç genelinde paylaşılan DimensionCache ile kimliğe çevrilir.
+Önbellek ilk kullanımda tablonun tamamını tek sorguda yükler; bilinen adlar için
+veritabanına hiç gidilmez, bilinmeyen adlar tek bir toplu ifadede bulunur veya eklenir.
+Sonuçlar girdideki sıraya göre eşlenir, böylece veritabanı harmanlaması ile fold_turkish
+farklı davransa da her girdi adının kimliği bulunur. Yeni kimlikler çağıranın işlemi commit
+edilene kadar paylaşılan önbelleğe yazılmaz: resolve() bunları 'pending' listesine ekler,
+çağıran commit'ten sonra publish() çağırır (bkz. link_dimensions).
+import_isbns() bir ISBN listesini ISBN servisiyle toplu çözer ve katalogda olmayanları ekler.
+"""
+import json
+import threading
+
+import pyodbc
+
+from database import get_db_connection
+from isbn_service import get_isbn_service, clean_isbn, is_valid_isbn
+from search_index import get_search_index, fold_turkish
+
+
+# Boyut tablosu -> kimlik sütunu
+DIMENSIONS = {"yazar": "yazar_id", "tur": "tur_id"}
+MAX_NAME_LENGTH = 255  # yazar.ad / tur.ad NVARCHAR(255)
+
+
+def dimension_key(ad):
+    """Ad karşılaştırması için anahtar; veritabanı harmanlaması gibi büyük/küçük harf duyarsızdır."""
+    return fold_turkish(ad.strip())
+
+
+def split_names(value):
+    """Virgülle ayrılmış yazar/tür alanını (veya listeyi) tekrarsız ad listesine çevirir."""
+    if not value:
+        return []
+    parts = value if isinstance(value, (list, tuple)) else str(value).split(",")
+    names = {}
+    for part in parts:
+        name = str(part).strip()
+        if name:
+            names.setdefault(dimension_key(name), name)
+    return list(names.values())
+
+
+def check_name_lengths(names):
+    """Sütuna sığmayan yazar/tür adı varsa ValueError fırlatır."""
+    for name in names:
+        if len(name) > MAX_NAME_LENGTH:
+            raise ValueError(f"Ad {MAX_NAME_LENGTH} karakterden uzun: {name[:40]}...")
+
+
+def load_dimension(cursor, table):
+    """Boyut tablosunun tamamını {anahtar: kimlik} olarak okur."""
+    id_column = DIMENSIONS[table]
+    cursor.execute(f"SELECT {id_column}, ad FROM {table}")
+    return {dimension_key(ad): row_id for row_id, ad in cursor.fetchall() if ad}
+
+
+def resolve_dimension_rows(cursor, table, names):
+    """
+    Verilen adların kimliklerini tek gidiş-dönüşte döndürür ({anahtar: kimlik}).
+    Başka bir istemcinin eklediği adlar yeniden eklenmez; olmayanlar eklenir. Satırlar
+    girdideki sıra numarasıyla döner ve girdi adının anahtarıyla eşlenir.
+    """
+    names = list(names)
+    if not names:
+        return {}
+    check_name_lengths(names)
+    id_column = DIMENSIONS[table]
+    cursor.execute(f"""
+                   SET NOCOUNT ON;
+                   DECLARE @adlar TABLE (sira INT PRIMARY KEY, ad NVARCHAR(255) COLLATE DATABASE_DEFAULT);
+
+                   INSERT INTO @adlar (sira, ad)
+                   SELECT CAST([key] AS INT), value FROM OPENJSON(?);
+
+                   -- Harmanlamaya göre eşit adlar (ör. büyük/küçük harf farkı) tek satır olarak eklenir
+                   INSERT INTO {table} (ad)
+                   SELECT MIN(a.ad)
+                   FROM @adlar a
+                   WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.ad = a.ad)
+                   GROUP BY a.ad;
+
+                   SELECT a.sira, MIN(t.{id_column})
+                   FROM @adlar a
+                            JOIN {table} t ON t.ad = a.ad
+                   GROUP BY a.sira;
+                   """, (json.dumps(names, ensure_ascii=False),))
+    return {dimension_key(names[sira]): row_id for sira, row_id in cursor.fetchall()}
+
+
+class DimensionCache:
+    """Yazar ve tür adlarından kimliğe süreç geneli, write-through önbellek (thread-safe)."""
+
+    def __init__(self):
+        self._maps = {}  # tablo -> {anahtar: kimlik}
+        self._lock = threading.Lock()
+
+    def resolve(self, cursor, table, names, pending=None):
+        """
+        Adların kimliklerini {anahtar: kimlik} olarak döndürür. Tablo ilk kullanımda yüklenir;
+        bilinmeyen adlar çağıranın işlemi içinde tek ifadeyle bulunur veya eklenir. Bunlar
+        önbelleğe yazılmaz, (tablo, anahtar, kimlik) olarak pending'e eklenir; çağıran commit
+        ettikten sonra publish(pending) ile yayımlar.
+        """
+        with self._lock:
+            known = self._maps.get(table)
+            if known is None:
+                known = self._maps[table] = load_dimension(cursor, table)
+            resolved = {}
+            missing = {}
+            for name in names:
+                key = dimension_key(name)
+                if key in known:
+                    resolved[key] = known[key]
+                else:
+                    missing.setdefault(key, name)
+
+        if missing:
+            found = resolve_dimension_rows(cursor, table, missing.values())
+            resolved.update(found)
+            if pending is not None:
+                pending.extend((table, key, row_id) for key, row_id in found.items())
+        return resolved
+
+    def ids(self, cursor, table, names, pending=None):
+        """Adların kimliklerini verilen sırayla liste olarak döndürür."""
+        resolved = self.resolve(cursor, table, names, pending)
+        return [resolved[dimension_key(name)] for name in names]
+
+    def publish(self, pending):
+        """Commit edilmiş işlemde bulunan veya eklenen kimlikleri önbelleğe yazar."""
+        with self._lock:
+            for table, key, row_id in pending:
+                known = self._maps.get(table)
+                if known is not None:
+                    known.setdefault(key, row_id)
+
+    def invalidate(self, table=None):
+        """Önbelleği boşaltır; bir sonraki kullanımda tablo yeniden yüklenir."""
+        with self._lock:
+            if table is None:
+                self._maps.clear()
+            else:
+                self._maps.pop(table, None)
+
+
+_dimension_cache = DimensionCache()
+
+
+def get_dimension_cache():
+    """Süreç genelinde paylaşılan yazar/tür önbelleğini döndürür."""
+    return _dimension_cache
+
+
+def link_dimensions(cursor, kitap_id, yazarlar, turler, pending=None):
+    """
+    Kitabın yazar ve tür bağlantılarını ekler (adlar önbellekle kimliğe çevrilir). Yeni
+    kimlikler pending'e eklenir; commit'ten sonra get_dimension_cache().publish(pending) çağrılmalı.
+    """
+    cache = get_dimension_cache()
+    for yazar_id in cache.ids(cursor, "yazar", split_names(yazarlar), pending):
+        cursor.execute("INSERT INTO kitap_yazar (kitap_id, yazar_id) VALUES (?, ?)", (kitap_id, yazar_id))
+    for tur_id in cache.ids(cursor, "tur", split_names(turler), pending):
+        cursor.execute("INSERT INTO kitap_tur (kitap_id, tur_id) VALUES (?, ?)", (kitap_id, tur_id))
+
+
+def insert_book(cursor, book, adet=1, pending=None):
+    """
+    parse_book_entry() biçimindeki kitabı ekler, yazar ve tür bağlantılarını kurar ve
+    yeni kitap_id'yi döndürür. Commit ve pending'in yayımlanması çağırana bırakılır.
+    """
+    sayfa_sayisi = book.get('sayfa_sayisi') or ''
+    cursor.execute("""
+                   INSERT INTO kitap (ad, yayin_yili, adet, yayinevi,
+                                      kapak_resmi_url, sayfa_sayisi, isbn, ozet) OUTPUT INSERTED.kitap_id
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   """, (book['ad'], book.get('yayin_yili') or None, adet,
+                         book.get('yayinevi') or None, book.get('kapak_resmi_url') or None,
+                         int(sayfa_sayisi) if str(sayfa_sayisi).isdigit() else None,
+                         book.get('isbn') or None, book.get('ozet') or None))
+    kitap_id = cursor.fetchone()[0]
+    link_dimensions(cursor, kitap_id, book.get('yazarlar'), book.get('turler'), pending)
+    return kitap_id
+
+
+def existing_isbns(cursor, isbns):
+    """Verilen ISBN'lerden katalogda zaten kayıtlı olanları küme olarak döndürür."""
+    if not isbns:
+        return set()
+    cursor.execute("""
+                   SELECT isbn
+                   FROM kitap
+                   WHERE isbn IN (SELECT value FROM STRING_SPLIT(?, ','))
+                   """, (",".join(isbns),))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def import_isbns(isbns, adet=1, service=None, progress=None):
+    """
+    ISBN listesini toplu olarak çözer ve katalogda olmayan kitapları ekler (işçi thread'de çağrılmalı).
+    Her kitap ayrı commit edilir; birinin hatası diğerlerini geri almaz.
+
+    Rapor sözlüğü döndürür:
+        eklenen: [(isbn, ad)], kayitli: [isbn], bulunamadi: [isbn], gecersiz: [girdi], hatali: [(isbn, hata)]
+    """
+    report = {'eklenen': [], 'kayitli': [], 'bulunamadi': [], 'gecersiz': [], 'hatali': []}
+
+    valid = []
+    for raw in isbns:
+        isbn = clean_isbn(raw)
+        if is_valid_isbn(isbn):
+            valid.append(isbn)
+        elif raw.strip():
+            report['gecersiz'].append(raw.strip())
+    valid = list(dict.fromkeys(valid))
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        known = existing_isbns(cursor, valid)
+    report['kayitli'] = [isbn for isbn in valid if isbn in known]
+
+    wanted = [isbn for isbn in valid if isbn not in known]
+    books = (service or get_isbn_service()).lookup_many(wanted, progress=progress)
+
+    index = get_search_index()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for isbn in wanted:
+            book = books.get(isbn)
+            if book is None:
+                report['bulunamadi'].append(isbn)
+                continue
+            pending = []
+            try:
+                kitap_id = insert_book(cursor, book, adet, pending)
+                conn.commit()
+            except (pyodbc.Error, ValueError) as e:
+                conn.rollback()
+                report['hatali'].append((isbn, str(e)))
+                continue
+            get_dimension_cache().publish(pending)
+            report['eklenen'].append((isbn, book['ad']))
+            index.upsert(kitap_id, book['ad'], ", ".join(book['yazarlar']), ", ".join(book['turler']),
+                         book['yayinevi'], isbn)
+    return report
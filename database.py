@@ -1,60 +1,269 @@
 # database.py
 import pyodbc
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import traceback
 
 load_dotenv()
 
-class DatabaseConnection:
-    _instance = None
+# Havuz ayarları (.env üzerinden değiştirilebilir)
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+POOL_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '10'))  # Boş bağlantı için bekleme (sn)
+POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))  # Boşta bekleyen bağlantının ömrü (sn)
+POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))  # Bağlantının toplam ömrü (sn)
+POOL_VALIDATE_AFTER = float(os.getenv('DB_POOL_VALIDATE_AFTER', '5'))  # Bu süreden uzun boşta kalanı ödünçte test et
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DatabaseConnection, cls).__new__(cls)
-            cls._instance._initialize_connection()
-        return cls._instance
 
-    def _initialize_connection(self):
+def _create_raw_connection():
+    """Yeni bir pyodbc bağlantısı açar."""
+    return pyodbc.connect(
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+        f"SERVER={os.getenv('DB_SERVER', 'Vincenza')};"
+        f"DATABASE={os.getenv('DB_NAME', 'Kutuphane_Sistemi')};"
+        f"UID={os.getenv('DB_USER', 'KutuphaneUygulamasi')};"
+        f"PWD={os.getenv('DB_PASSWORD', 'YeniSifreniz123!')}"
+    )
+
+
+class PoolTimeoutError(Exception):
+    """Havuzda belirlenen süre içinde boş bağlantı bulunamadığında fırlatılır."""
+
+
+class PooledConnection:
+    """
+    Havuzdan ödünç alınmış bağlantı.
+    close() ve 'with' bloğundan çıkış bağlantıyı kapatmaz, havuza iade eder.
+    Diğer tüm öznitelikler (cursor, commit, rollback...) gerçek bağlantıya yönlendirilir.
+    """
+
+    def __init__(self, pool, raw_conn, created_at):
+        self._pool = pool
+        self._raw = raw_conn
+        self._created_at = created_at
+        self._returned = False
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._returned:
+            raise pyodbc.ProgrammingError("Bağlantı havuza iade edilmiş, tekrar kullanılamaz.")
+        return getattr(self._raw, name)
+
+    @property
+    def closed(self):
+        return self._returned or self._raw.closed
+
+    def close(self):
+        """Bağlantıyı havuza iade eder."""
+        if self._returned:
+            return
+        self._returned = True
+        self._pool._release(self._raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        # pyodbc bağlantısıyla aynı davranış: hata yoksa commit, varsa rollback
         try:
-            self.conn = pyodbc.connect(
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={os.getenv('DB_SERVER', 'Vincenza')};"
-                f"DATABASE={os.getenv('DB_NAME', 'Kutuphane_Sistemi')};"
-                f"UID={os.getenv('DB_USER', 'KutuphaneUygulamasi')};"
-                f"PWD={os.getenv('DB_PASSWORD', 'YeniSifreniz123!')}"
-            )
-            print("Veritabanı bağlantısı başarılı.")
-        except pyodbc.Error as ex:
-            sqlstate = ex.args[0]
-            print(f"Veritabanı bağlantı hatası: SQLState: {sqlstate}")
-            traceback.print_exc()
-            self.conn = None
-        except Exception as e:
-            # Diğer genel hatalar için
-            print(f"Genel hata: {e}")
-            traceback.print_exc()
-            self.conn = None
-
-    def get_connection(self):
-        """Veritabanı bağlantısını döndürür."""
-        if self.conn and not self.conn.closed:
-            return self.conn
-        else:
-            # Bağlantı kapalıysa yeniden kurmaya çalış
-            self._initialize_connection()
-            return self.conn
-
-    def close_connection(self):
-        """Veritabanı bağlantısını kapatır."""
-        if self.conn and not self.conn.closed:
-            self.conn.close()
-            print("Veritabanı bağlantısı kapatıldı.")
-        self._instance = None
+            if not self._returned and not self._raw.closed:
+                if exc_type is None:
+                    self._raw.commit()
+                else:
+                    self._raw.rollback()
+        finally:
+            self.close()
+        return False
+
+    def __del__(self):
+        # Kapatılmadan bırakılan bağlantıların havuzdan sızmasını önle
+        try:
+            if not self._returned:
+                self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Sınırlı boyutlu, thread-safe bağlantı havuzu.
+    Ödünç alırken sağlık kontrolü yapar, uzun süre boşta kalan bağlantıları
+    kapatır ve maksimum ömrünü dolduran bağlantıları yeniler.
+    """
+
+    def __init__(self, factory, max_size=POOL_MAX_SIZE, acquire_timeout=POOL_ACQUIRE_TIMEOUT,
+                 idle_timeout=POOL_IDLE_TIMEOUT, max_lifetime=POOL_MAX_LIFETIME,
+                 validate_after=POOL_VALIDATE_AFTER):
+        self._factory = factory
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.validate_after = validate_after
+
+        self._idle = []  # (bağlantı, oluşturulma zamanı, iade zamanı) - LIFO
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def acquire(self):
+        """Havuzdan bir bağlantı ödünç alır; gerekirse yenisini açar."""
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            raw_conn = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise pyodbc.ProgrammingError("Bağlantı havuzu kapatılmış.")
+                    expired = self._evict_idle_locked()
+                    if self._idle:
+                        raw_conn, created_at, returned_at = self._idle.pop()
+                        self._in_use += 1
+                        break
+                    if self._in_use < self.max_size:
+                        self._in_use += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"{self.acquire_timeout} saniye içinde boş veritabanı bağlantısı bulunamadı.")
+                    self._cond.wait(remaining)
+
+            # Kilidin dışında kalan yavaş işlemler
+            for conn in expired:
+                self._close_quietly(conn)
+
+            if raw_conn is None:
+                try:
+                    raw_conn = self._factory()
+                except Exception:
+                    self._forget()
+                    raise
+                return PooledConnection(self, raw_conn, time.monotonic())
+
+            if self._is_usable(raw_conn, created_at, returned_at):
+                return PooledConnection(self, raw_conn, created_at)
+
+            # Bozuk veya ömrü dolmuş bağlantı: at ve tekrar dene
+            self._close_quietly(raw_conn)
+            self._forget()
+
+    def _is_usable(self, raw_conn, created_at, returned_at):
+        now = time.monotonic()
+        if raw_conn.closed or now - created_at > self.max_lifetime:
+            return False
+        if now - returned_at < self.validate_after:
+            return True
+        try:
+            cursor = raw_conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _release(self, raw_conn, created_at):
+        """Ödünç alınan bağlantıyı havuza geri koyar."""
+        reusable = not raw_conn.closed and time.monotonic() - created_at <= self.max_lifetime
+        if reusable:
+            try:
+                # Yarım kalmış işlemler bir sonraki kullanıcıya taşınmasın
+                raw_conn.rollback()
+            except pyodbc.Error:
+                reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable and not self._closed:
+                self._idle.append((raw_conn, created_at, time.monotonic()))
+                raw_conn = None
+            self._cond.notify()
+
+        if raw_conn is not None:
+            self._close_quietly(raw_conn)
+
+    def _forget(self):
+        """Açılamayan veya atılan bir bağlantının yerini serbest bırakır."""
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _evict_idle_locked(self):
+        """Boşta kalma süresi dolan bağlantıları listeden çıkarır (kilit tutulurken çağrılır)."""
+        now = time.monotonic()
+        keep, expired = [], []
+        for entry in self._idle:
+            raw_conn, created_at, returned_at = entry
+            if now - returned_at > self.idle_timeout or now - created_at > self.max_lifetime:
+                expired.append(raw_conn)
+            else:
+                keep.append(entry)
+        self._idle = keep
+        return expired
+
+    @staticmethod
+    def _close_quietly(raw_conn):
+        try:
+            if not raw_conn.closed:
+                raw_conn.close()
+        except pyodbc.Error:
+            pass
+
+    def close(self):
+        """Boştaki tüm bağlantıları kapatır; ödünçtekiler iade edildiğinde kapanır."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for raw_conn, _, _ in idle:
+            self._close_quietly(raw_conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Süreç genelinde paylaşılan bağlantı havuzunu döndürür."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = ConnectionPool(_create_raw_connection)
+        return _pool
+
+
+def close_pool():
+    """Uygulama kapanırken havuzdaki bağlantıları kapatır."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            print("Veritabanı bağlantı havuzu kapatıldı.")
+            _pool = None
 
 
 # Global bağlantı fonksiyonu
 def get_db_connection():
-    """Veritabanı bağlantısını sağlar (singleton pattern)."""
-    db = DatabaseConnection()
-    return db.get_connection()
\ No newline at end of file
+    """
+    Havuzdan bir bağlantı ödünç alır.
+    Dönen nesnenin close() metodu ve 'with' bloğu bağlantıyı havuza iade eder.
+    Bağlantı kurulamazsa None döner.
+    """
+    try:
+        return get_pool().acquire()
+    except pyodbc.Error as ex:
+        sqlstate = ex.args[0]
+        print(f"Veritabanı bağlantı hatası: SQLState: {sqlstate}")
+        traceback.print_exc()
+        return None
+    except PoolTimeoutError as e:
+        print(f"Veritabanı bağlantı havuzu hatası: {e}")
+        return None
+    except Exception as e:
+        # Diğer genel hatalar için
+        print(f"Genel hata: {e}")
+        traceback.print_exc()
+        return None
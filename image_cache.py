@@ -0,0 +1,438 @@
+"""
+Kitap kapakları için iki katmanlı önbellek.
+
+1. Bellek: çözülmüş ve yeniden boyutlandırılmış PIL görüntülerinin LRU listesi.
+2. Disk: URL ve hedef boyuttan türetilen SHA-256 anahtarıyla saklanan PNG dosyaları ve
+   ETag / Last-Modified bilgilerini tutan bir dizin dosyası (index.json).
+
+Disk kaydı COVER_CACHE_TTL süresince tazedir ve ağa hiç çıkılmaz. Süre dolunca koşullu
+istek (If-None-Match / If-Modified-Since) gönderilir; 304 yanıtında dosya yeniden indirilmez.
+Sunucuya ulaşılamazsa eski kayıt kullanılmaya devam eder. Disk kullanımı
+COVER_CACHE_MAX_BYTES'ı aşınca en uzun süredir kullanılmayan kayıtlar silinir.
+Erişim zamanları yalnızca bellekte güncellenir; dizin dosyası en fazla INDEX_SAVE_INTERVAL
+saniyede bir, kayıt silindiğinde ve kapanışta (flush_cover_cache) yazılır.
+
+İndirmeler DOWNLOAD_WORKERS sabit sayıda thread'li CoverLoader havuzunda, bağlantıları
+yeniden kullanan ortak bir requests.Session ile yapılır. Aynı kapak için gelen istekler tek
+indirmede birleştirilir; ekranda görünen satırların kapakları düşük öncelikle önceden yüklenir.
+
+PhotoImage nesneleri Tk thread'inde oluşturulmalıdır; bu modül yalnızca PIL görüntüsü döndürür.
+"""
+import hashlib
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from io import BytesIO
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+COVER_SIZE = (120, 180)
+COVER_CACHE_DIR = os.getenv('COVER_CACHE_DIR', 'kapak_onbellek')
+COVER_CACHE_MAX_BYTES = int(os.getenv('COVER_CACHE_MAX_BYTES', str(100 * 1024 * 1024)))
+COVER_CACHE_TTL = float(os.getenv('COVER_CACHE_TTL', str(7 * 24 * 3600)))  # Tazelik süresi (sn)
+MEMORY_CACHE_ENTRIES = 64
+REQUEST_TIMEOUT = 10
+DOWNLOAD_WORKERS = 4
+INDEX_SAVE_INTERVAL = 30  # Dizin dosyasının en sık yazılma aralığı (sn)
+
+# İndirme kuyruğu öncelikleri: kullanıcının açtığı kapak, önceden yüklemelerin önüne geçer
+PRIORITY_USER = 0
+PRIORITY_PREFETCH = 1
+
+_INDEX_FILE = "index.json"
+
+
+def cache_key(url, size):
+    """URL ve hedef boyut için disk anahtarı."""
+    return hashlib.sha256(f"{url}|{size[0]}x{size[1]}".encode("utf-8")).hexdigest()
+
+
+class CoverImageCache:
+    """Thread-safe kapak görüntüsü önbelleği."""
+
+    def __init__(self, directory=COVER_CACHE_DIR, max_bytes=COVER_CACHE_MAX_BYTES, ttl=COVER_CACHE_TTL,
+                 memory_entries=MEMORY_CACHE_ENTRIES, session=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.session = session or requests
+
+        self._memory = OrderedDict()  # anahtar -> PIL.Image
+        self._index = {}  # anahtar -> meta veri
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # Dizin dosyası yazımları
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._load_index()
+
+    # --- Genel arayüz ---
+
+    def peek(self, url, size=COVER_SIZE):
+        """Yalnızca bellekteki görüntüyü döndürür; disk veya ağa çıkmaz (Tk thread'inde güvenli)."""
+        if not url:
+            return None
+        key = cache_key(url, size)
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+            return image
+
+    def get(self, url, size=COVER_SIZE):
+        """
+        Kapağı bellekten, diskten veya ağdan getirir (işçi thread'de çağrılmalı).
+        Görüntü alınamazsa None döner.
+        """
+        if not url:
+            return None
+        image = self.peek(url, size)
+        if image is not None:
+            return image
+
+        key = cache_key(url, size)
+        with self._lock:
+            meta = dict(self._index.get(key) or {})
+
+        image = self._read_disk(key) if meta else None
+        if image is not None and time.time() - meta.get('fetched_at', 0) < self.ttl:
+            self._touch(key)
+            self._remember(key, image)
+            return image
+
+        fresh = self._download(url, size, key, meta, have_copy=image is not None)
+        if fresh is not None:
+            image = fresh
+        elif image is not None:
+            # 304 veya çevrimdışı: diskteki kopya kullanılmaya devam eder
+            self._touch(key)
+
+        if image is not None:
+            self._remember(key, image)
+        return image
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def flush(self):
+        """Bekleyen dizin değişikliklerini diske yazar (kapanışta çağrılır)."""
+        self._save_index(force=True)
+
+    # --- Ağ ---
+
+    def _download(self, url, size, key, meta, have_copy):
+        """Koşullu GET yapar. Yeni görüntü indirildiyse onu, aksi halde None döndürür."""
+        headers = {}
+        if have_copy:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 304 and have_copy:
+                with self._lock:
+                    if key in self._index:
+                        self._index[key]['fetched_at'] = time.time()
+                        self._dirty = True
+                self._save_index()
+                return None
+            response.raise_for_status()
+            image = Image.open(BytesIO(response.content)).convert("RGBA").resize(size, Image.LANCZOS)
+        except (requests.RequestException, OSError) as e:
+            # Çevrimdışı veya geçersiz görüntü: varsa eski kopya kullanılır
+            print(f"Kapak resmi indirilemedi ({url}): {e}")
+            return None
+
+        self._write_disk(key, url, size, image, response.headers)
+        return image
+
+    # --- Bellek katmanı ---
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    # --- Disk katmanı ---
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    def _read_disk(self, key):
+        try:
+            with Image.open(self._path(key)) as image:
+                return image.copy()
+        except OSError:
+            with self._lock:
+                if self._index.pop(key, None) is not None:
+                    self._dirty = True
+            self._save_index()
+            return None
+
+    def _write_disk(self, key, url, size, image, headers):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            image.save(temp_path, format="PNG")
+            os.replace(temp_path, path)
+            file_size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Kapak önbelleğe yazılamadı: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            self._index[key] = {
+                'url': url,
+                'size': list(size),
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'fetched_at': now,
+                'last_access': now,
+                'bytes': file_size,
+            }
+            self._dirty = True
+            evicted = self._evict_locked()
+        # Silinen dosyalar dizinde kalmasın diye tahliyeden sonra beklemeden yazılır
+        self._save_index(force=evicted)
+
+    def _touch(self, key):
+        with self._lock:
+            if key in self._index:
+                self._index[key]['last_access'] = time.time()
+                self._dirty = True
+        self._save_index()
+
+    def _evict_locked(self):
+        """Toplam boyut sınırı aşıldıysa en uzun süredir kullanılmayan dosyaları siler; silindiyse True döner."""
+        total = sum(meta.get('bytes', 0) for meta in self._index.values())
+        if total <= self.max_bytes:
+            return False
+        for key, meta in sorted(self._index.items(), key=lambda item: item[1].get('last_access', 0)):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= meta.get('bytes', 0)
+            del self._index[key]
+            self._memory.pop(key, None)
+        return True
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, _INDEX_FILE), "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _save_index(self, force=False):
+        """
+        Değişiklik varsa dizin dosyasını atomik olarak yazar. force verilmezse son yazımdan bu yana
+        INDEX_SAVE_INTERVAL geçmemişse yazım ertelenir. Önbellek kilidi tutulurken çağrılmamalıdır;
+        dosya bu kilit dışında yazılır.
+        """
+        # Yazımlar sırayla yapılır; eski bir anlık görüntü daha yenisinin üzerine yazılamaz
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty or (not force and time.monotonic() - self._saved_at < INDEX_SAVE_INTERVAL):
+                    return
+                data = json.dumps(self._index)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+
+            path = os.path.join(self.directory, _INDEX_FILE)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                temp_path = f"{path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"Kapak önbellek dizini kaydedilemedi: {e}")
+                with self._lock:
+                    self._dirty = True
+
+
+class CoverRequest:
+    """CoverLoader.request() sonucu. future kapağın PIL görüntüsünü (veya None) verir."""
+
+    def __init__(self, loader, key, future):
+        self._loader = loader
+        self._key = key
+        self.future = future
+        self._cancelled = False
+
+    def cancel(self):
+        """
+        Bu isteği geri çeker. Aynı kapağı bekleyen başka istek yoksa ve indirme henüz
+        başlamadıysa kuyruktaki iş de iptal edilir.
+        """
+        if self._cancelled or self._key is None:
+            return
+        self._cancelled = True
+        self._loader._release(self._key)
+
+
+class _DownloadJob:
+    def __init__(self, url, size, priority):
+        self.url = url
+        self.size = size
+        self.priority = priority
+        self.future = Future()
+        self.waiters = 0
+        self.started = False
+
+
+class CoverLoader:
+    """
+    Kapakları sabit boyutlu bir thread havuzunda yükler.
+    Aynı URL ve boyut için bekleyen istekler tek bir Future'ı paylaşır.
+    """
+
+    def __init__(self, cache, workers=DOWNLOAD_WORKERS):
+        self.cache = cache
+        self.workers = workers
+        self._jobs = {}  # anahtar -> _DownloadJob
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def request(self, url, size=COVER_SIZE):
+        """Kapağı kullanıcı önceliğiyle ister ve bir CoverRequest döndürür."""
+        image = self.cache.peek(url, size) if url else None
+        if image is not None or not url:
+            future = Future()
+            future.set_result(image)
+            return CoverRequest(self, None, future)
+
+        key = cache_key(url, size)
+        with self._lock:
+            job = self._enqueue_locked(key, url, size, PRIORITY_USER)
+            job.waiters += 1
+        return CoverRequest(self, key, job.future)
+
+    def prefetch(self, urls, size=COVER_SIZE):
+        """
+        Verilen kapakları düşük öncelikle belleğe yükler. Önceki prefetch çağrısından kalan
+        ve henüz başlamamış işler (ör. artık görünmeyen satırlar) kuyruktan çıkarılır.
+        """
+        wanted = {}
+        for url in urls:
+            if url and self.cache.peek(url, size) is None:
+                wanted[cache_key(url, size)] = url
+
+        with self._lock:
+            for key, job in list(self._jobs.items()):
+                if job.waiters == 0 and not job.started and key not in wanted:
+                    job.future.cancel()
+                    del self._jobs[key]
+            for key, url in wanted.items():
+                self._enqueue_locked(key, url, size, PRIORITY_PREFETCH)
+
+    def _enqueue_locked(self, key, url, size, priority):
+        job = self._jobs.get(key)
+        if job is None:
+            job = _DownloadJob(url, size, priority)
+            self._jobs[key] = job
+        elif priority < job.priority and not job.started:
+            # Önceden yükleme kuyruğundaki kapak artık kullanıcı tarafından bekleniyor
+            job.priority = priority
+        else:
+            return job
+        self._queue.put((priority, next(self._sequence), key))
+        self._start_workers_locked()
+        return job
+
+    def _release(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                return
+            job.waiters -= 1
+            if job.waiters <= 0 and not job.started:
+                job.future.cancel()
+                del self._jobs[key]
+
+    def _start_workers_locked(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"kapak-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self):
+        while True:
+            _, _, key = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(key)
+                # İptal edilmiş, zaten başlamış veya önceliği yükseltilmiş (kopya kayıt) işleri atla
+                if job is None or job.started or job.future.cancelled():
+                    continue
+                job.started = True
+
+            try:
+                image = self.cache.get(job.url, job.size)
+            except Exception as e:
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(image)
+            finally:
+                with self._lock:
+                    if self._jobs.get(key) is job:
+                        del self._jobs[key]
+
+
+def create_session(pool_size=DOWNLOAD_WORKERS):
+    """Bağlantıları (keep-alive) havuzdaki tüm işçilerle paylaşan bir oturum oluşturur."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_cache = None
+_loader = None
+_cache_lock = threading.Lock()
+
+
+def get_cover_cache():
+    """Süreç genelinde paylaşılan kapak önbelleğini döndürür."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CoverImageCache(session=create_session())
+        return _cache
+
+
+def flush_cover_cache():
+    """Kapak önbelleği oluşturulduysa bekleyen dizin değişikliklerini diske yazar."""
+    with _cache_lock:
+        cache = _cache
+    if cache is not None:
+        cache.flush()
+
+
+def get_cover_loader():
+    """Süreç genelinde paylaşılan kapak indirme havuzunu döndürür."""
+    global _loader
+    cache = get_cover_cache()
+    with _cache_lock:
+        if _loader is None:
+            _loader = CoverLoader(cache)
+        return _loader
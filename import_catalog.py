@@ -0,0 +1,372 @@
+"""
+Toplu katalog içe aktarma aracı.
+
+CSV, JSON Lines veya MARC (ISO 2709) dosyasını akış halinde okur ve kitapları CHUNK_SIZE'lık
+gruplar halinde, her grup tek işlemde olacak şekilde veritabanına yazar:
+
+* Yazar ve tür adları paylaşılan DimensionCache ile çözülür (bkz. catalog.py); eksik adlar
+  grup başına tek INSERT ... OUTPUT INSERTED ile eklenir.
+* Kitaplar tek bir MERGE ile yazılır: ISBN'i katalogda bulunan kitabın açıklayıcı alanları
+  güncellenir (adet ve yazar/tür bağlantıları korunur), diğerleri eklenir.
+* Yeni kitapların yazar/tür bağlantıları fast_executemany ile eklenir.
+
+Sonda okunan, eklenen, güncellenen ve reddedilen satır sayıları ile saniyedeki satır hızı
+yazdırılır; reddedilen satırlar --rejects ile bir CSV dosyasına kaydedilebilir.
+
+Kullanım:
+    python import_catalog.py eski_katalog.csv
+    python import_catalog.py kitaplar.jsonl --chunk-size 2000 --rejects reddedilen.csv
+    python import_catalog.py kayitlar.mrc
+
+CSV ve JSON Lines alanları kitap tablosunun sütun adlarıdır: ad, yazar, tur, yayin_yili, adet,
+yayinevi, kapak_resmi_url, sayfa_sayisi, isbn, ozet. Birden fazla yazar/tür virgülle ayrılır
+(JSON Lines'ta liste de olabilir).
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import time
+import traceback
+
+import pyodbc
+
+from catalog import DIMENSIONS, dimension_key, get_dimension_cache, split_names, check_name_lengths
+from database import get_db_connection, close_pool
+from isbn_service import clean_isbn, is_valid_isbn
+
+CHUNK_SIZE = 1000
+
+_MERGE_BOOKS = """
+SET NOCOUNT ON;
+MERGE kitap AS k
+USING (SELECT *
+       FROM OPENJSON(?) WITH (
+               sira INT '$.sira',
+               ad NVARCHAR(MAX) '$.ad',
+               yayin_yili INT '$.yayin_yili',
+               adet INT '$.adet',
+               yayinevi NVARCHAR(MAX) '$.yayinevi',
+               kapak_resmi_url NVARCHAR(MAX) '$.kapak_resmi_url',
+               sayfa_sayisi INT '$.sayfa_sayisi',
+               isbn NVARCHAR(20) '$.isbn',
+               ozet NVARCHAR(MAX) '$.ozet'
+           )) AS src
+ON src.isbn IS NOT NULL AND k.isbn = src.isbn
+WHEN MATCHED THEN
+    UPDATE SET ad              = src.ad,
+               yayin_yili      = ISNULL(src.yayin_yili, k.yayin_yili),
+               yayinevi        = ISNULL(src.yayinevi, k.yayinevi),
+               kapak_resmi_url = ISNULL(src.kapak_resmi_url, k.kapak_resmi_url),
+               sayfa_sayisi    = ISNULL(src.sayfa_sayisi, k.sayfa_sayisi),
+               ozet            = ISNULL(src.ozet, k.ozet)
+WHEN NOT MATCHED THEN
+    INSERT (ad, yayin_yili, adet, yayinevi, kapak_resmi_url, sayfa_sayisi, isbn, ozet)
+    VALUES (src.ad, src.yayin_yili, src.adet, src.yayinevi, src.kapak_resmi_url, src.sayfa_sayisi, src.isbn,
+            src.ozet)
+OUTPUT src.sira, $action, INSERTED.kitap_id;
+"""
+
+# --- Okuyucular: (satır/kayıt no, kayıt sözlüğü veya None, hata veya None) üretir ---
+
+
+def read_csv(path, encoding="utf-8-sig", delimiter=","):
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for row in reader:
+            yield reader.line_num, {(key or "").strip().lower(): value for key, value in row.items()}, None
+
+
+def read_jsonl(path, encoding="utf-8"):
+    with open(path, encoding=encoding) as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"Geçersiz JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "Satır bir JSON nesnesi değil"
+                continue
+            yield number, record, None
+
+
+_MARC_RECORD_END = b"\x1d"
+_MARC_FIELD_END = b"\x1e"
+_MARC_SUBFIELD = b"\x1f"
+
+
+def read_marc(path):
+    """ISO 2709 (MARC 21) dosyasını kayıt kayıt okur; dosyanın tamamı belleğe alınmaz."""
+    with open(path, "rb") as f:
+        buffer = b""
+        number = 0
+        while True:
+            chunk = f.read(65536)
+            if chunk:
+                buffer += chunk
+            while _MARC_RECORD_END in buffer or (not chunk and buffer.strip()):
+                if _MARC_RECORD_END in buffer:
+                    raw, buffer = buffer.split(_MARC_RECORD_END, 1)
+                else:
+                    raw, buffer = buffer, b""
+                raw = raw.lstrip(b"\r\n ")
+                if not raw:
+                    continue
+                number += 1
+                try:
+                    yield number, _parse_marc(raw), None
+                except (ValueError, IndexError) as e:
+                    yield number, None, f"Bozuk MARC kaydı: {e}"
+            if not chunk:
+                break
+
+
+def _parse_marc(raw):
+    leader = raw[:24]
+    base_address = int(leader[12:17])
+    encoding = "utf-8" if leader[9:10] == b"a" else "latin-1"
+    directory = raw[24:base_address - 1]
+
+    fields = {}
+    for i in range(0, len(directory) - len(directory) % 12, 12):
+        tag = directory[i:i + 3].decode("ascii")
+        length = int(directory[i + 3:i + 7])
+        start = int(directory[i + 7:i + 12])
+        if tag < "010":
+            continue  # Kontrol alanları alt alan içermez
+        data = raw[base_address + start:base_address + start + length].rstrip(_MARC_FIELD_END)
+        subfields = {}
+        for part in data[2:].split(_MARC_SUBFIELD)[1:]:
+            if part:
+                subfields.setdefault(part[:1].decode("ascii", "replace"), []).append(
+                    part[1:].decode(encoding, "replace").strip())
+        fields.setdefault(tag, []).append(subfields)
+
+    def first(tag, code):
+        for subfields in fields.get(tag, []):
+            if subfields.get(code):
+                return subfields[code][0]
+        return ""
+
+    def every(tags, code):
+        return [value for tag in tags for subfields in fields.get(tag, []) for value in subfields.get(code, [])]
+
+    # 245 alt alanları ISBD noktalamasıyla biter ("Başlık :", "alt başlık /")
+    title = ": ".join(part for part in (first("245", "a").rstrip(" /:;,.="), first("245", "b").rstrip(" /:;,.="))
+                      if part)
+    isbn = first("020", "a").split(" ")[0]
+    year = re.search(r"\d{4}", first("264", "c") or first("260", "c"))
+    pages = re.search(r"\d+", first("300", "a"))
+
+    return {
+        "ad": title,
+        "yazar": [name.rstrip(" ,.") for name in every(("100", "700"), "a")],
+        "tur": [name.rstrip(" .") for name in every(("650", "655"), "a")],
+        "yayinevi": (first("264", "b") or first("260", "b")).rstrip(" ,:;"),
+        "yayin_yili": year.group(0) if year else "",
+        "sayfa_sayisi": pages.group(0) if pages else "",
+        "isbn": isbn,
+        "ozet": first("520", "a"),
+    }
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "marc": read_marc}
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".mrc": "marc", ".marc": "marc"}
+
+
+# --- Doğrulama ---
+
+
+def _optional_int(value, field):
+    if value is None or str(value).strip() == "":
+        return None
+    text = str(value).strip()
+    if not text.isdigit():
+        raise ValueError(f"{field} sayı olmalı: {text!r}")
+    return int(text)
+
+
+def normalize_record(record):
+    """Ham kaydı yazılacak kitap sözlüğüne çevirir; geçersizse ValueError fırlatır."""
+    ad = str(record.get("ad") or "").strip()
+    if not ad:
+        raise ValueError("Kitap adı boş")
+
+    isbn = clean_isbn(str(record.get("isbn") or ""))
+    if isbn and not is_valid_isbn(isbn):
+        raise ValueError(f"Geçersiz ISBN: {record.get('isbn')!r}")
+
+    adet = _optional_int(record.get("adet"), "adet")
+    yazarlar = split_names(record.get("yazar") or record.get("yazarlar"))
+    turler = split_names(record.get("tur") or record.get("turler"))
+    check_name_lengths(yazarlar + turler)
+    return {
+        "ad": ad,
+        "yazarlar": yazarlar,
+        "turler": turler,
+        "yayin_yili": _optional_int(record.get("yayin_yili"), "yayin_yili"),
+        "adet": adet if adet is not None else 1,
+        "yayinevi": str(record.get("yayinevi") or "").strip() or None,
+        "kapak_resmi_url": str(record.get("kapak_resmi_url") or "").strip() or None,
+        "sayfa_sayisi": _optional_int(record.get("sayfa_sayisi"), "sayfa_sayisi"),
+        "isbn": isbn or None,
+        "ozet": str(record.get("ozet") or "").strip() or None,
+    }
+
+
+# --- Yazma ---
+
+
+class CatalogImporter:
+    """Kitapları gruplar halinde yazar ve istatistik tutar."""
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = []  # (satır no, neden, ham kayıt)
+        self._seen_isbns = set()
+
+    def run(self, rows):
+        """(no, kayıt, hata) üreten okuyucuyu sonuna kadar işler."""
+        chunk = []
+        for number, record, error in rows:
+            self.read += 1
+            if error:
+                self.rejected.append((number, error, record))
+                continue
+            try:
+                book = normalize_record(record)
+            except ValueError as e:
+                self.rejected.append((number, str(e), record))
+                continue
+            if book["isbn"]:
+                if book["isbn"] in self._seen_isbns:
+                    self.rejected.append((number, f"Dosyada yinelenen ISBN: {book['isbn']}", record))
+                    continue
+                self._seen_isbns.add(book["isbn"])
+
+            chunk.append((number, book, record))
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk)
+
+    def _write_chunk(self, chunk):
+        cache = get_dimension_cache()
+        pending = []
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                ids = {table: cache.resolve(cursor, table, self._names(chunk, table), pending)
+                       for table in DIMENSIONS}
+                results = self._merge_books(cursor, chunk)
+                self._link(cursor, chunk, results, ids)
+        except pyodbc.Error as e:
+            traceback.print_exc()
+            self.rejected.extend((number, f"Veritabanı hatası: {e}", record) for number, _, record in chunk)
+            return
+        # Grup commit edildi; yeni yazar/tür kimlikleri artık diğer thread'lerle paylaşılabilir
+        cache.publish(pending)
+
+        for action, _ in results.values():
+            if action == "INSERT":
+                self.inserted += 1
+            else:
+                self.updated += 1
+
+    @staticmethod
+    def _names(chunk, table):
+        field = "yazarlar" if table == "yazar" else "turler"
+        names = {}
+        for _, book, _ in chunk:
+            for name in book[field]:
+                names.setdefault(dimension_key(name), name)
+        return list(names.values())
+
+    @staticmethod
+    def _merge_books(cursor, chunk):
+        """Grubu tek MERGE ile yazar ve {sıra: (işlem, kitap_id)} döndürür."""
+        payload = [dict(sira=sira, **{key: value for key, value in book.items()
+                                      if key not in ("yazarlar", "turler")})
+                   for sira, (_, book, _) in enumerate(chunk)]
+        cursor.execute(_MERGE_BOOKS, (json.dumps(payload, ensure_ascii=False),))
+        results = {}
+        for sira, action, kitap_id in cursor.fetchall():
+            results.setdefault(sira, (action, kitap_id))
+        return results
+
+    @staticmethod
+    def _link(cursor, chunk, results, ids):
+        book_authors, book_genres = [], []
+        authors, genres = ids["yazar"], ids["tur"]
+        for sira, (_, book, _) in enumerate(chunk):
+            action, kitap_id = results.get(sira, (None, None))
+            if action != "INSERT":
+                continue
+            book_authors.extend((kitap_id, authors[dimension_key(name)]) for name in book["yazarlar"])
+            book_genres.extend((kitap_id, genres[dimension_key(name)]) for name in book["turler"])
+
+        cursor.fast_executemany = True
+        if book_authors:
+            cursor.executemany("INSERT INTO kitap_yazar (kitap_id, yazar_id) VALUES (?, ?)", book_authors)
+        if book_genres:
+            cursor.executemany("INSERT INTO kitap_tur (kitap_id, tur_id) VALUES (?, ?)", book_genres)
+
+    def write_rejects(self, path):
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["satir", "neden", "kayit"])
+            for number, reason, record in self.rejected:
+                writer.writerow([number, reason, json.dumps(record, ensure_ascii=False, default=str)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV, JSON Lines veya MARC dosyasından toplu kitap aktarımı")
+    parser.add_argument("path", help="İçe aktarılacak dosya")
+    parser.add_argument("--format", choices=sorted(READERS), help="Dosya biçimi (varsayılan: uzantıdan)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Tek işlemde yazılacak kitap sayısı")
+    parser.add_argument("--encoding", help="Metin dosyalarının karakter kodlaması")
+    parser.add_argument("--delimiter", default=",", help="CSV ayırıcısı")
+    parser.add_argument("--rejects", help="Reddedilen satırların yazılacağı CSV dosyası")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or _EXTENSIONS.get(os.path.splitext(args.path)[1].lower())
+    if file_format is None:
+        parser.error("Dosya biçimi uzantıdan anlaşılamadı, --format belirtin.")
+
+    if file_format == "csv":
+        rows = read_csv(args.path, encoding=args.encoding or "utf-8-sig", delimiter=args.delimiter)
+    elif file_format == "jsonl":
+        rows = read_jsonl(args.path, encoding=args.encoding or "utf-8")
+    else:
+        rows = read_marc(args.path)
+
+    importer = CatalogImporter(chunk_size=args.chunk_size)
+    started = time.perf_counter()
+    try:
+        importer.run(rows)
+    except KeyboardInterrupt:
+        print("İçe aktarma durduruldu; commit edilen gruplar kalıcıdır.")
+    finally:
+        close_pool()
+    elapsed = time.perf_counter() - started
+
+    print(f"Okunan: {importer.read}  Eklenen: {importer.inserted}  Güncellenen: {importer.updated}  "
+          f"Reddedilen: {len(importer.rejected)}")
+    print(f"Süre: {elapsed:.1f} sn  ({importer.read / elapsed if elapsed else 0:.0f} satır/sn)")
+    for number, reason, _ in importer.rejected[:20]:
+        print(f"  satır {number}: {reason}")
+    if args.rejects and importer.rejected:
+        importer.write_rejects(args.rejects)
+        print(f"Reddedilen satırlar {args.rejects} dosyasına yazıldı.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+ISBN ile kitap bilgisi sorgulama servisi.
+
+OpenLibrary "api/books" uç noktasının yanıtları yerel bir SQLite dosyasında saklanır:
+bulunan kayıtlar POSITIVE_TTL, bulunamayan ISBN'ler (negatif kayıt) NEGATIVE_TTL süresince
+yeniden sorgulanmaz. lookup_many() önbellekte olmayan ISBN'leri bibkeys listesiyle
+BATCH_SIZE'lık gruplar halinde tek istekte çözer.
+
+Uç nokta ISBN_API_URL ortam değişkeniyle (veya IsbnMetadataService(endpoint=...)) değiştirilebilir;
+böylece testlerde yerel bir sunucu kullanılabilir.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+ISBN_API_URL = os.getenv('ISBN_API_URL', 'https://openlibrary.org/api/books')
+ISBN_CACHE_PATH = os.getenv('ISBN_CACHE_PATH', 'isbn_onbellek.sqlite3')
+COVER_URL_TEMPLATE = "https://covers.openlibrary.org/b/isbn/{isbn}-M.jpg"
+
+POSITIVE_TTL = 30 * 24 * 3600  # Bulunan kayıtlar (sn)
+NEGATIVE_TTL = 24 * 3600  # Bulunamayan ISBN'ler (sn)
+BATCH_SIZE = 100  # Tek istekte sorgulanacak en fazla ISBN
+REQUEST_TIMEOUT = 10
+MAX_SUBJECTS = 5
+
+
+def clean_isbn(isbn):
+    """ISBN'den formatlama karakterlerini temizler"""
+    return re.sub(r'[^\dX]', '', isbn.upper())
+
+
+def is_valid_isbn(isbn):
+    """ISBN'in geçerli olup olmadığını kontrol eder"""
+    if not isbn:
+        return False
+
+    cleaned = clean_isbn(isbn)
+
+    if len(cleaned) == 10:
+        if not cleaned[:-1].isdigit() and not (cleaned[:-1].isdigit() and cleaned[-1].upper() == 'X'):
+            return False
+        return True
+    elif len(cleaned) == 13:
+        if not cleaned.isdigit():
+            return False
+        return True
+
+    return False
+
+
+def parse_book_entry(isbn, entry):
+    """
+    api/books yanıtındaki tek bir kaydı kitap tablosunun alanlarına çevirir.
+    Anahtarlar: isbn, ad, yazarlar, turler (liste), yayinevi, yayin_yili, sayfa_sayisi,
+    ozet, kapak_resmi_url.
+    """
+    book_data = entry['details'] if 'details' in entry else entry
+
+    authors = book_data.get('authors', [])
+    author_names = [author.get('name', '') if isinstance(author, dict) else author for author in authors]
+
+    publishers = book_data.get('publishers', [])
+    publisher_names = [pub.get('name', '') if isinstance(pub, dict) else pub for pub in publishers]
+
+    year = None
+    publish_date = book_data.get('publish_date', '')
+    if publish_date:
+        # Tarih metninden sadece 4 haneli yılı bul ve al
+        year_match = re.search(r'\b(\d{4})\b', publish_date)
+        if year_match:
+            year = year_match.group(1)
+
+    page_count = book_data.get('number_of_pages', book_data.get('pagination', ''))
+
+    description = book_data.get('description', '')
+    if isinstance(description, dict):
+        description = description.get('value', '')
+    if not isinstance(description, str):
+        description = ''
+
+    subject_names = []
+    for subject in book_data.get('subjects', []):
+        name = subject.get('name', '') if isinstance(subject, dict) else subject
+        if name and len(name) <= 50 and len(name.split()) <= 5:
+            subject_names.append(name)
+
+    return {
+        'isbn': isbn,
+        'ad': book_data.get('title', 'Bilinmiyor'),
+        'yazarlar': [name for name in author_names if name],
+        'turler': subject_names[:MAX_SUBJECTS],
+        'yayinevi': ", ".join(name for name in publisher_names if name),
+        'yayin_yili': year,
+        'sayfa_sayisi': str(page_count) if page_count else '',
+        'ozet': description,
+        'kapak_resmi_url': COVER_URL_TEMPLATE.format(isbn=isbn),
+    }
+
+
+class IsbnMetadataService:
+    """Önbellekli ISBN sorgulama servisi (thread-safe)."""
+
+    def __init__(self, endpoint=ISBN_API_URL, cache_path=ISBN_CACHE_PATH, session=None):
+        self.endpoint = endpoint
+        self.cache_path = cache_path
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._init_cache()
+
+    def lookup(self, isbn):
+        """Tek bir ISBN'i çözer; bulunamazsa None döner. Ağ hataları requests istisnası olarak yükselir."""
+        isbn = clean_isbn(isbn)
+        return self.lookup_many([isbn])[isbn]
+
+    def lookup_many(self, isbns, progress=None):
+        """
+        ISBN listesini çözer ve {isbn: kitap bilgisi veya None} sözlüğü döndürür.
+        progress(cozulen, toplam) her gruptan sonra çağrılır (işçi thread'de).
+        """
+        wanted = list(dict.fromkeys(clean_isbn(isbn) for isbn in isbns if isbn))
+        results = self._read_cache(wanted)
+        missing = [isbn for isbn in wanted if isbn not in results]
+
+        for start in range(0, len(missing), BATCH_SIZE):
+            batch = missing[start:start + BATCH_SIZE]
+            entries = self._fetch(batch)
+            self._write_cache(batch, entries)
+            for isbn in batch:
+                entry = entries.get(isbn)
+                results[isbn] = parse_book_entry(isbn, entry) if entry else None
+            if progress:
+                progress(len(wanted) - len(missing) + start + len(batch), len(wanted))
+
+        return {isbn: results[isbn] for isbn in wanted}
+
+    def _fetch(self, isbns):
+        """bibkeys listesiyle tek istek yapar ve {isbn: ham kayıt} döndürür."""
+        params = {
+            'bibkeys': ",".join(f"ISBN:{isbn}" for isbn in isbns),
+            'jscmd': 'data',
+            'format': 'json',
+        }
+        response = self.session.get(self.endpoint, params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = response.json() or {}
+        return {isbn: data[f"ISBN:{isbn}"] for isbn in isbns if data.get(f"ISBN:{isbn}")}
+
+    # --- SQLite önbelleği ---
+
+    @contextmanager
+    def _connect(self):
+        """İşlemi tamamlayıp (commit/rollback) bağlantıyı kapatan SQLite bağlantısı."""
+        conn = sqlite3.connect(self.cache_path, timeout=REQUEST_TIMEOUT)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_cache(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                         CREATE TABLE IF NOT EXISTS isbn_onbellek
+                         (
+                             isbn       TEXT PRIMARY KEY,
+                             veri       TEXT,
+                             alinma     REAL NOT NULL
+                         )
+                         """)
+
+    def _read_cache(self, isbns):
+        """Süresi dolmamış kayıtları {isbn: kitap bilgisi veya None} olarak döndürür."""
+        results = {}
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(isbns), BATCH_SIZE):
+                batch = isbns[start:start + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT isbn, veri, alinma FROM isbn_onbellek WHERE isbn IN ({placeholders})",
+                                    batch).fetchall()
+                for isbn, veri, alinma in rows:
+                    ttl = POSITIVE_TTL if veri is not None else NEGATIVE_TTL
+                    if now - alinma < ttl:
+                        results[isbn] = parse_book_entry(isbn, json.loads(veri)) if veri is not None else None
+        return results
+
+    def _write_cache(self, isbns, entries):
+        now = time.time()
+        rows = [(isbn, json.dumps(entries[isbn]) if isbn in entries else None, now) for isbn in isbns]
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO isbn_onbellek (isbn, veri, alinma) VALUES (?, ?, ?)", rows)
+
+    def forget(self, isbn):
+        """Bir ISBN'in önbellek kaydını siler (ör. yanlış negatif kayıt)."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM isbn_onbellek WHERE isbn = ?", (clean_isbn(isbn),))
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_isbn_service():
+    """Süreç genelinde paylaşılan ISBN servisini döndürür."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = IsbnMetadataService()
+        return _service
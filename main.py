@@ -1,15 +1,20 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from PIL import Image, ImageDraw, ImageFont
-import hashlib
 import re
 import os
 import json
 from datetime import datetime, timedelta
 import traceback
-import bcrypt
 
-from database import get_db_connection
+from database import get_db_connection, close_pool
+from background import run_in_background
+from image_cache import flush_cover_cache
+from auth_service import (authenticate, change_password, register_user, PasswordChangeResult,
+                          RegistrationResult)
+from session import UserSession, PENALTY_LIMIT
+from search_controller import DebouncedSearch
+from username_availability import get_username_directory
 from book_rezervation_app import BookReservationApp
 from table_rezervation_app import TableReservationApp
 from admin_panel import MainApp
@@ -17,25 +22,6 @@ from admin_panel import MainApp
 LOGIN_STATE_FILE = "login_state.json"
 LOGIN_VALIDITY_DAYS = 30
 
-def hash_sifre(sifre: str) -> str:
-    """Güvenli bir şekilde şifreyi hash'ler ve tuz ekler."""
-    # Şifreyi bytes'a çevir ve bcrypt ile hashle
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(sifre.encode('utf-8'), salt)
-    return hashed.decode('utf-8')  # String olarak döndür
-
-def verify_sifre(girilen_sifre: str, stored_hash: str) -> bool:
-    """Girilen şifreyi hashlenmiş şifre ile karşılaştırır."""
-    try:
-        return bcrypt.checkpw(girilen_sifre.encode('utf-8'), stored_hash.encode('utf-8'))
-    except (ValueError, TypeError):
-        # Eski SHA256 hash'leri için geriye dönük uyumluluk
-        try:
-            hashed_girilen = hashlib.sha256(girilen_sifre.encode()).hexdigest()
-            return hashed_girilen == stored_hash
-        except:
-            return False
-
 def make_circle_image(path: str, size: int) -> Image.Image:
     """
     Creates a circular image from a given path.
@@ -139,10 +125,7 @@ class App(ctk.CTk):
         self.minsize(400, 500)
         self.resizable(False, False)
 
-        self.current_user_name = None
-        self.current_user_id = None
-        self.current_user_role = None
-        self.current_user_penalty_points = 0
+        self.session = UserSession()  # Tüm pencerelere verilen oturum bilgisi
         self.book_reservation_window = None
         self.table_reservation_window = None
         self.admin_panel_window = None
@@ -157,22 +140,11 @@ class App(ctk.CTk):
         self._create_frames()
 
         remembered_user, remembered_role, remembered_id = load_login_state()
-        if remembered_user:
-            self.current_user_name = remembered_user
-            self.current_user_role = remembered_role
-            self.current_user_id = remembered_id
-            # Hatırlanan kullanıcı için ceza puanını veritabanından çekme
-            conn = get_db_connection()
-            if conn:
-                try:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT ceza_puani FROM kullanici WHERE kullanici_id = ?", (self.current_user_id,))
-                    penalty = cursor.fetchone()
-                    if penalty:
-                        self.current_user_penalty_points = penalty[0]
-                finally:
-                    conn.close()
+        if remembered_user and remembered_id is not None:
+            self.session.restore(remembered_id, remembered_user, remembered_role)
             self.show_frame("main_app")
+            # Hatırlanan kullanıcının ceza durumu arka planda tek sorguyla yüklenir
+            self.refresh_session()
         else:
             self.show_frame("login")
 
@@ -189,75 +161,56 @@ class App(ctk.CTk):
         self.frames["main_app"] = main_app_frame
         main_app_frame.grid(row=0, column=0, sticky="nsew")
 
-    def _check_and_reset_penalties(self, user_id: int, conn, cursor):
-        """
-        Kullanıcının son ceza tarihini kontrol eder ve
-        son ceza tarihinden 10 gün geçmişse ceza puanını sıfırlar.
-        """
-        if not conn or not cursor:
-            print("Hata: Geçersiz bağlantı veya imleç.")
-            return
-
-        try:
-            # Kullanıcının mevcut ceza puanını kontrol et
-            cursor.execute(
-                "SELECT ceza_puani FROM kullanici WHERE kullanici_id = ?",
-                (user_id,)
+    def start_session(self, user):
+        """Giriş yapan kullanıcının bilgilerini oturuma yazar; pencereler bunları yeniden sorgulamaz."""
+        self.session.start(user)
+        if user.sifirlanan_gun is not None:
+            messagebox.showinfo(
+                "Ceza Puanı Sıfırlama",
+                f"Son cezanızın üzerinden {user.sifirlanan_gun} gün geçtiği için ceza puanınız sıfırlandı."
             )
-            result = cursor.fetchone()
 
-            if not result or result[0] == 0:
-                return
+    def refresh_session(self):
+        """Oturumu arka planda tek sorguyla veritabanından yeniler."""
+        run_in_background(self, "user_status", self.session.fetch,
+                          on_success=self._on_user_status_loaded,
+                          on_error=self._on_user_status_error)
 
-            # Son ceza tarihini al
-            cursor.execute(
-                "SELECT MAX(tarih) FROM cezalar WHERE kullanici_id = ?",
-                (user_id,)
-            )
-            last_penalty_date_result = cursor.fetchone()
-
-            if last_penalty_date_result and last_penalty_date_result[0]:
-                last_penalty_date = last_penalty_date_result[0]
-                if isinstance(last_penalty_date, datetime):
-                    last_penalty_date = last_penalty_date.date()
-
-                current_date = datetime.now().date()
-                days_passed = (current_date - last_penalty_date).days
-
-                if days_passed >= 10:
-                    cursor.execute(
-                        "UPDATE kullanici SET ceza_puani = 0 WHERE kullanici_id = ?",
-                        (user_id,)
-                    )
-                    conn.commit()
-                    self.current_user_penalty_points = 0
-                    messagebox.showinfo(
-                        "Ceza Puanı Sıfırlama",
-                        f"Son cezanızın üzerinden {days_passed} gün geçtiği için ceza puanınız sıfırlandı."
-                    )
-            else:
-                cursor.execute(
-                    "UPDATE kullanici SET ceza_puani = 0 WHERE kullanici_id = ?",
-                    (user_id,)
-                )
-                conn.commit()
-                self.current_user_penalty_points = 0
+    def end_session(self):
+        self.session.clear()
+        clear_login_state()
+        self.show_frame("login")
 
-        except Exception as e:
-            messagebox.showerror("Veritabanı Hatası", str(e))
-            traceback.print_exc()
+    def _on_user_status_error(self, error):
+        if not self.session.is_authenticated:
+            return
+        print(f"Kullanıcı durumu yüklenemedi: {error}")
+        # Ceza durumu doğrulanamadan rezervasyon açılmaz; kullanıcı yeniden deneyebilir veya çıkış yapar
+        if messagebox.askretrycancel(
+                "Bağlantı Hatası",
+                f"Kullanıcı bilgileriniz yüklenemedi: {error}\n\n"
+                "Rezervasyon işlemleri bilgileriniz yüklenene kadar kapalıdır. Tekrar denensin mi?"):
+            self.refresh_session()
+        else:
+            self.end_session()
+
+    def _on_user_status_loaded(self, user):
+        if not self.session.is_authenticated or (user and user.kullanici_id != self.session.kullanici_id):
+            # Yanıt gelmeden çıkış yapıldı veya başka bir kullanıcı giriş yaptı
+            return
+        if user is None:
+            # Kullanıcı artık yok
+            self.end_session()
+            return
+        self.start_session(user)
+        self.frames["main_app"].show_session(self.session)
 
     def show_frame(self, page_name: str):
         frame = self.frames.get(page_name)
         if frame:
             if page_name == "main_app":
-                if self.current_user_name:
-                    # Penalty puanını frame'e gönder
-                    frame.set_user_name(
-                        self.current_user_name,
-                        self.current_user_role,
-                        self.current_user_penalty_points
-                    )
+                if self.session.is_authenticated:
+                    frame.show_session(self.session)
                 self.geometry("400x500")
                 self.resizable(False, False)
             else:
@@ -277,7 +230,7 @@ class App(ctk.CTk):
             self.book_reservation_window = BookReservationApp(
                 self,
                 show_main_menu_callback=self._return_to_main_window,
-                user_name=self.current_user_name
+                session=self.session
             )
             self.book_reservation_window.protocol("WM_DELETE_WINDOW", self._return_to_main_window)
         else:
@@ -297,14 +250,14 @@ class App(ctk.CTk):
             # TableReservationApp'i oluştur
             self.table_reservation_window = TableReservationApp(
                 table_window,
-                current_user=self.current_user_name,
+                session=self.session,
                 on_return_to_main=self._return_to_main_window
             )
         else:
             self.table_reservation_window.master.focus()  # Toplevel penceresine odaklan
 
     def _open_admin_panel_window(self):
-        if self.current_user_role == 'admin':
+        if self.session.is_admin:
             # Mevcut pencereyi gizle
             self.withdraw()
 
@@ -334,36 +287,13 @@ class App(ctk.CTk):
             self.withdraw()
             self.user_info_window = UserInfoWindow(
                 self,  # self'i geçirerek controller'a erişim sağla
-                self.current_user_id,
-                self.current_user_name,
-                self.current_user_penalty_points,
+                self.session,
                 self._return_to_main_window
             )
             self.user_info_window.protocol("WM_DELETE_WINDOW", self._return_to_main_window)
         else:
             self.user_info_window.focus()
 
-    def _refresh_main_after_user_info_close(self):
-        """Kullanıcı bilgileri penceresi kapandığında ana ekranı yeniler"""
-        if self.user_info_window:
-            # Kullanıcı adı değişmiş olabilir, ana ekranı güncelle
-            if hasattr(self.user_info_window, 'user_name'):
-                self.current_user_name = self.user_info_window.user_name
-
-            self.user_info_window.destroy()
-            self.user_info_window = None
-
-        self.deiconify()
-        self.focus_set()
-
-        # Ana ekranı yenile
-        if hasattr(self, 'frames') and "main_app" in self.frames:
-            self.frames["main_app"].set_user_name(
-                self.current_user_name,
-                self.current_user_role,
-                self.current_user_penalty_points
-            )
-
     def _return_to_main_window(self):
         """Masa rezervasyon penceresini kapatır ve ana pencereyi gösterir."""
         if self.table_reservation_window:
@@ -385,13 +315,39 @@ class App(ctk.CTk):
         # Ana pencereyi tekrar göster
         self.deiconify()
         self.focus_set()  # Ana pencereye odaklan
+
+        # Kullanıcı adı değiştiyse oturum veritabanından yenilenir, ana ekran yeni bilgilerle gösterilir
+        if self.session.stale:
+            self.refresh_session()
+def check_username(widget, status_label, username, exclude_id=None):
+    """
+    Kullanıcı adının uygunluğunu status_label'a yazar. Bellekteki ad listesinde olmayan adlar
+    veritabanına gitmeden yanıtlanır; olası çakışmalar arka planda veritabanında doğrulanır.
+    """
+    def show(available):
+        if available:
+            status_label.configure(text="Kullanıcı adı uygun", text_color="green")
+        else:
+            status_label.configure(text="Bu kullanıcı adı zaten kullanılıyor", text_color="red")
+
+    directory = get_username_directory()
+    if directory.lookup(username):
+        show(True)
+        return
+
+    status_label.configure(text="Kontrol ediliyor...", text_color="gray")
+    run_in_background(widget, "username_check", directory.check, username, exclude_id,
+                      on_success=show,
+                      on_error=lambda e: status_label.configure(text="Kontrol hatası", text_color="red"))
+
+
 # --- Kullanıcı Bilgileri Penceresi ---
 class UserInfoWindow(ctk.CTkToplevel):
-    def __init__(self, parent, user_id, user_name, penalty_points, return_callback):
+    def __init__(self, parent, session, return_callback):
         super().__init__(parent)
-        self.user_id = user_id
-        self.user_name = user_name
-        self.penalty_points = penalty_points
+        self.session = session
+        self.user_id = session.kullanici_id
+        self.user_name = session.isim
         self.return_callback = return_callback
         self.controller = parent
 
@@ -434,8 +390,9 @@ class UserInfoWindow(ctk.CTkToplevel):
         )
         self.username_status_label.pack(pady=(0, 0))
 
-        # Kullanıcı adı değişikliklerini dinle
-        self.new_username_entry.bind("<KeyRelease>", self._check_username_availability)
+        # Kullanıcı adı değişikliklerini dinle; kontrol yazma durduğunda yapılır
+        self.username_search = DebouncedSearch(self.new_username_entry, self._check_username_availability,
+                                               owner=self, cancel_key="username_check")
 
         change_username_button = ctk.CTkButton(
             self.main_frame,
@@ -477,27 +434,25 @@ class UserInfoWindow(ctk.CTkToplevel):
         )
         self.confirm_password_entry.pack(pady=(5, 5))
 
-        change_password_button = ctk.CTkButton(
+        self.change_password_button = ctk.CTkButton(
             self.main_frame,
             text="Şifreyi Değiştir",
             command=self._change_password,
             width=200
         )
-        change_password_button.pack(pady=(25, 15))
+        self.change_password_button.pack(pady=(25, 15))
 
         # Ceza puanı bilgisi - DOĞRUDAN ANA FRAME'E EKLE
         ctk.CTkLabel(
             self.main_frame,
-            text=f"Ceza Puanı: {penalty_points}",
+            text=f"Ceza Puanı: {session.ceza_puani}",
             font=ctk.CTkFont(size=14)
         ).pack(anchor="w", pady=(15, 15))
 
         self.protocol("WM_DELETE_WINDOW", self._on_close)
 
-    def _check_username_availability(self, event=None):
+    def _check_username_availability(self, new_username):
         """Kullanıcı adının kullanılabilirliğini kontrol eder"""
-        new_username = self.new_username_entry.get().strip()
-
         if not new_username:
             self.username_status_label.configure(text="", text_color="black")
             return
@@ -506,29 +461,7 @@ class UserInfoWindow(ctk.CTkToplevel):
             self.username_status_label.configure(text="Bu zaten mevcut kullanıcı adınız", text_color="blue")
             return
 
-        # Kullanıcı adı kullanılabilirliğini kontrol et
-        conn = get_db_connection()
-        if not conn:
-            self.username_status_label.configure(text="Veritabanı bağlantı hatası", text_color="red")
-            return
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT COUNT(*) FROM kullanici WHERE isim = ? AND kullanici_id != ?",
-                (new_username, self.user_id)
-            )
-            result = cursor.fetchone()
-
-            if result and result[0] > 0:
-                self.username_status_label.configure(text="Bu kullanıcı adı zaten kullanılıyor", text_color="red")
-            else:
-                self.username_status_label.configure(text="Kullanıcı adı uygun", text_color="green")
-
-        except Exception as e:
-            self.username_status_label.configure(text="Kontrol hatası", text_color="red")
-        finally:
-            conn.close()
+        check_username(self, self.username_status_label, new_username, exclude_id=self.user_id)
 
     def _change_username(self):
         new_username = self.new_username_entry.get().strip()
@@ -569,10 +502,10 @@ class UserInfoWindow(ctk.CTkToplevel):
             messagebox.showinfo("Başarılı", "Kullanıcı adı başarıyla güncellendi.")
             self.user_name = new_username
 
-            # Ana uygulamayı ve login state'i güncelle
-            if hasattr(self.controller, 'current_user_name'):
-                self.controller.current_user_name = new_username
-                save_login_state(new_username, self.controller.current_user_role, self.user_id)
+            # Oturumu ve login state'i güncelle; oturum ana pencereye dönüşte veritabanından yenilenir
+            self.session.rename(new_username)
+            get_username_directory().add(new_username)
+            save_login_state(new_username, self.session.rol, self.user_id)
 
         except Exception as e:
             messagebox.showerror("Hata", f"Kullanıcı adı güncelleme hatası: {str(e)}")
@@ -597,49 +530,26 @@ class UserInfoWindow(ctk.CTkToplevel):
             messagebox.showerror("Hata", "Yeni şifreler eşleşmiyor.")
             return
 
-        # Mevcut şifreyi doğrula
-        conn = get_db_connection()
-        if not conn:
-            messagebox.showerror("Hata", "Veritabanına bağlanılamadı.")
-            return
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT sifre FROM kullanici WHERE kullanici_id = ?",
-                (self.user_id,)
-            )
-            result = cursor.fetchone()
-
-            if not result:
-                messagebox.showerror("Hata", "Kullanıcı bulunamadı.")
-                return
-
-            stored_password = result[0]
-
-            # Yeni şifre doğrulama metodu
-            if not verify_sifre(current_password, stored_password):
-                messagebox.showerror("Hata", "Mevcut şifre hatalı.")
-                return
-
-            # Şifreyi güncelle (yeni hashleme metodu ile)
-            hashed_new_password = hash_sifre(new_password)
-            cursor.execute(
-                "UPDATE kullanici SET sifre = ? WHERE kullanici_id = ?",
-                (hashed_new_password, self.user_id)
-            )
-            conn.commit()
-
+        # Şifre doğrulama ve hash'leme (bcrypt) işçi thread'de çalışır; arayüz donmaz
+        self.change_password_button.configure(state="disabled")
+        run_in_background(self, "change_password", change_password, self.user_id, current_password, new_password,
+                          on_success=self._on_password_changed, on_error=self._on_password_change_error)
+
+    def _on_password_changed(self, result):
+        self.change_password_button.configure(state="normal")
+        if result is PasswordChangeResult.NOT_FOUND:
+            messagebox.showerror("Hata", "Kullanıcı bulunamadı.")
+        elif result is PasswordChangeResult.WRONG_PASSWORD:
+            messagebox.showerror("Hata", "Mevcut şifre hatalı.")
+        else:
             messagebox.showinfo("Başarılı", "Şifre başarıyla güncellendi.")
             self.current_password_entry.delete(0, "end")
             self.new_password_entry.delete(0, "end")
             self.confirm_password_entry.delete(0, "end")
 
-        except Exception as e:
-            messagebox.showerror("Hata", f"Şifre güncelleme hatası: {str(e)}")
-        finally:
-            conn.close()
-
+    def _on_password_change_error(self, error):
+        self.change_password_button.configure(state="normal")
+        messagebox.showerror("Hata", f"Şifre güncelleme hatası: {error}")
 
     def _on_close(self):
         self.destroy()
@@ -663,8 +573,8 @@ class LoginFrame(ctk.CTkFrame):
         self.password_entry = ctk.CTkEntry(self, placeholder_text="Şifre", show="*", width=230, height=40)
         self.password_entry.pack(pady=10, padx=40)
 
-        login_button = ctk.CTkButton(self, text="Giriş Yap", command=self._giris_yap, width=150, height=40)
-        login_button.pack(pady=(20, 10))
+        self.login_button = ctk.CTkButton(self, text="Giriş Yap", command=self._giris_yap, width=150, height=40)
+        self.login_button.pack(pady=(20, 10))
 
         register_button = ctk.CTkButton(
             self,
@@ -689,59 +599,27 @@ class LoginFrame(ctk.CTkFrame):
             messagebox.showerror("Giriş Hatası", "Lütfen tüm alanları doldurun.")
             return
 
-        conn = None
-        try:
-            conn = get_db_connection()
-            if conn is None:
-                messagebox.showerror("Bağlantı Hatası", "Veritabanına bağlanılamadı.")
-                return
+        # Sorgu ve bcrypt doğrulaması işçi thread'de çalışır; arayüz donmaz
+        self.login_button.configure(state="disabled")
+        run_in_background(self, "login", authenticate, email, sifre,
+                          on_success=self._on_login_result, on_error=self._on_login_error)
 
-            cursor = conn.cursor()
+    def _on_login_result(self, user):
+        self.login_button.configure(state="normal")
+        if user is None:
+            messagebox.showerror("Hatalı Giriş", "Hatalı e-posta veya şifre girdiniz.")
+            return
+
+        self.controller.start_session(user)
+        save_login_state(user.isim, user.rol, user.kullanici_id)
+        messagebox.showinfo("Başarılı", f"Giriş başarılı! Hoş geldiniz {user.isim}")
+        self.controller.show_frame("main_app")
+
+    def _on_login_error(self, error):
+        self.login_button.configure(state="normal")
+        messagebox.showerror("Veritabanı Hatası", str(error))
 
-            # E-posta ile kullanıcıyı bul
-            cursor.execute(
-                "SELECT isim, rol, kullanici_id, ceza_puani, sifre FROM kullanici WHERE eposta = ?",
-                (email,)
-            )
-            user = cursor.fetchone()
-
-            if user:
-                isim, rol, kullanici_id, ceza_puani, stored_password = user
-
-                # Şifreyi doğrula
-                if verify_sifre(sifre, stored_password):
-                    # Fonksiyonu conn ve cursor ile çağır
-                    self.controller._check_and_reset_penalties(kullanici_id, conn, cursor)
-
-                    # Sıfırlama işleminden sonra güncel ceza puanını al.
-                    cursor.execute(
-                        "SELECT ceza_puani FROM kullanici WHERE kullanici_id = ?",
-                        (kullanici_id,)
-                    )
-                    updated_penalty_result = cursor.fetchone()
-                    updated_penalty = updated_penalty_result[0] if updated_penalty_result else ceza_puani
-
-                    self.controller.current_user_name = isim
-                    self.controller.current_user_role = rol
-                    self.controller.current_user_id = kullanici_id
-                    self.controller.current_user_penalty_points = updated_penalty
-
-                    save_login_state(isim, rol, kullanici_id)
-                    messagebox.showinfo("Başarılı", f"Giriş başarılı! Hoş geldiniz {isim}")
-
-                    self.controller.show_frame("main_app")
-                else:
-                    messagebox.showerror("Hatalı Giriş", "Hatalı e-posta veya şifre girdiniz.")
-            else:
-                messagebox.showerror("Hatalı Giriş", "Hatalı e-posta veya şifre girdiniz.")
 
-        except Exception as e:
-            messagebox.showerror("Veritabanı Hatası", str(e))
-            traceback.print_exc()
-        finally:
-            # Bağlantıyı sadece bu tek noktada kapat.
-            if conn:
-                conn.close()
 # --- Kayıt Sayfası (Frame) ---
 class RegisterFrame(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -771,8 +649,9 @@ class RegisterFrame(ctk.CTkFrame):
         )
         self.username_status_label.pack(pady=2)
 
-        # Kullanıcı adı değişikliklerini dinle
-        self.name_entry.bind("<KeyRelease>", self._check_username_availability)
+        # Kullanıcı adı değişikliklerini dinle; kontrol yazma durduğunda yapılır
+        self.username_search = DebouncedSearch(self.name_entry, self._check_username_availability,
+                                               owner=self, cancel_key="username_check")
 
         self.email_entry = ctk.CTkEntry(self, placeholder_text="E-posta", width=230, height=40)
         self.email_entry.pack(pady=15, padx=40)
@@ -780,40 +659,16 @@ class RegisterFrame(ctk.CTkFrame):
         self.password_entry = ctk.CTkEntry(self, placeholder_text="Şifre", show="*", width=230, height=40)
         self.password_entry.pack(pady=15, padx=40)
 
-        register_button = ctk.CTkButton(self, text="Kayıt Ol", command=self._kayit_ol, width=130, height=40)
-        register_button.pack(pady=(20, 10))
+        self.register_button = ctk.CTkButton(self, text="Kayıt Ol", command=self._kayit_ol, width=130, height=40)
+        self.register_button.pack(pady=(20, 10))
 
-    def _check_username_availability(self, event=None):
+    def _check_username_availability(self, username):
         """Kullanıcı adının kullanılabilirliğini kontrol eder"""
-        username = self.name_entry.get().strip()
-
         if not username:
             self.username_status_label.configure(text="", text_color="black")
             return
 
-        # Kullanıcı adı kullanılabilirliğini kontrol et
-        conn = get_db_connection()
-        if not conn:
-            self.username_status_label.configure(text="Veritabanı bağlantı hatası", text_color="red")
-            return
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT COUNT(*) FROM kullanici WHERE isim = ?",
-                (username,)
-            )
-            result = cursor.fetchone()
-
-            if result and result[0] > 0:
-                self.username_status_label.configure(text="Bu kullanıcı adı zaten kullanılıyor", text_color="red")
-            else:
-                self.username_status_label.configure(text="Kullanıcı adı uygun", text_color="green")
-
-        except Exception as e:
-            self.username_status_label.configure(text="Kontrol hatası", text_color="red")
-        finally:
-            conn.close()
+        check_username(self, self.username_status_label, username)
 
     def _kayit_ol(self):
         email = self.email_entry.get().strip()
@@ -833,46 +688,30 @@ class RegisterFrame(ctk.CTkFrame):
             messagebox.showerror("Geçersiz Şifre", "Şifre en az 8 karakter olmalıdır.")
             return
 
-        # Kullanıcı adı benzersizlik kontrolü
-        conn = get_db_connection()
-        if not conn:
-            messagebox.showerror("Bağlantı Hatası", "Veritabanına bağlanılamadı.")
-            return
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM kullanici WHERE isim = ?", (isim,))
-            username_count = cursor.fetchone()[0]
-
-            if username_count > 0:
-                messagebox.showerror("Hata",
-                                     "Bu kullanıcı adı zaten kullanılıyor. Lütfen farklı bir kullanıcı adı seçin.")
-                return
-
-            cursor.execute("SELECT COUNT(*) FROM kullanici WHERE eposta = ?", (email,))
-            email_count = cursor.fetchone()[0]
-
-            if email_count > 0:
-                messagebox.showerror("Hata", "Bu e-posta adresi zaten kayıtlı.")
-                return
-
-            # Yeni güvenli hashleme metodu
-            hashed_password = hash_sifre(sifre)
-
-            # Yeni kullanıcıyı ekle
-            cursor.execute(
-                "INSERT INTO kullanici (eposta, sifre, isim, rol, ceza_puani) VALUES (?, ?, ?, ?, ?)",
-                (email, hashed_password, isim, 'user', 0)
-            )
-            conn.commit()
+        # Benzersizlik kontrolleri ve şifre hash'leme (bcrypt) işçi thread'de çalışır
+        self.register_button.configure(state="disabled")
+        run_in_background(self, "register", register_user, email, sifre, isim,
+                          on_success=lambda result: self._on_registered(result, isim),
+                          on_error=self._on_register_error)
+
+    def _on_registered(self, result, isim):
+        self.register_button.configure(state="normal")
+        if result is RegistrationResult.NAME_TAKEN:
+            messagebox.showerror("Hata",
+                                 "Bu kullanıcı adı zaten kullanılıyor. Lütfen farklı bir kullanıcı adı seçin.")
+        elif result is RegistrationResult.EMAIL_TAKEN:
+            messagebox.showerror("Hata", "Bu e-posta adresi zaten kayıtlı.")
+        else:
+            get_username_directory().add(isim)
             messagebox.showinfo("Başarılı", "Kayıt işlemi başarılı oldu!")
             self.controller.show_frame("login")
 
-        except Exception as e:
-            messagebox.showerror("Hata", f"Kayıt hatası: {str(e)}")
-            traceback.print_exc()
-        finally:
-            conn.close()
+    def _on_register_error(self, error):
+        self.register_button.configure(state="normal")
+        print(f"Kayıt hatası: {error}")
+        messagebox.showerror("Hata", f"Kayıt hatası: {error}")
+
+
 # --- Ana Menü (Frame) ---
 class MainAppFrame(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -937,7 +776,7 @@ class MainAppFrame(ctk.CTkFrame):
         logout_button = ctk.CTkButton(
             self,
             text="Çıkış Yap",
-            command=lambda: (clear_login_state(), self.controller.show_frame("login")),
+            command=self.controller.end_session,
             fg_color="red",
             hover_color="darkred",
             width=150,
@@ -945,49 +784,28 @@ class MainAppFrame(ctk.CTkFrame):
         )
         logout_button.pack(pady=30)
 
-    def set_user_name(self, user_name: str, user_role: str, penalty_points: int):
-        """Kullanıcı adını, rolünü ve ceza puanını ayarlar, admin butonunu gösterir ve cezaları kontrol eder."""
-        self.user_label.configure(text=f"Sayın {user_name}, kütüphane sistemine hoş geldiniz!")
-        if user_role == 'admin':
+    def show_session(self, session):
+        """Oturumdaki kullanıcı adını gösterir, admin butonunu ayarlar ve cezalara göre butonları ayarlar."""
+        self.user_label.configure(text=f"Sayın {session.isim}, kütüphane sistemine hoş geldiniz!")
+        if session.is_admin:
             self.admin_button.pack(pady=10)
         else:
             self.admin_button.pack_forget()
 
-        # Giriş yapıldığında ceza puanını kontrol et ve sıfırla
-        conn = get_db_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                self.controller._check_and_reset_penalties(self.controller.current_user_id, conn, cursor)
-                # Buradaki conn.close() çağrısını kaldırın, çünkü aşağıdaki kod da bir bağlantı açacak.
-            except Exception as e:
-                print(f"Hata: {e}")
-            finally:
-                if conn:
-                    conn.close()
-
-        # Güncel ceza puanını al ve buton durumlarını ayarla
-        conn = get_db_connection()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT ceza_puani FROM kullanici WHERE kullanici_id = ?",
-                    (self.controller.current_user_id,)
-                )
-                result = cursor.fetchone()
-                if result:
-                    current_penalty = result[0]
-                    self._check_penalties(current_penalty)
-            finally:
-                if conn:
-                    conn.close()
-    def _check_penalties(self, penalty_points: int):
+        # Ceza puanı girişte tek sorguyla alınıp sıfırlandı; burada yeniden sorgulanmaz
+        self._check_penalties(session)
+
+    def _check_penalties(self, session):
         """Kullanıcının ceza puanlarını kontrol eder ve rezervasyon butonlarını pasif yapar."""
-        if penalty_points > 10:
+        penalty_points = session.ceza_puani
+        if session.stale:
+            # Ceza durumu henüz doğrulanmadı (hatırlanan giriş veya ad değişikliği); yenilenene kadar kapalı
+            self.table_reservation_button.configure(state="disabled")
+            self.book_reservation_button.configure(state="disabled")
+        elif not session.can_reserve:
             messagebox.showwarning(
                 "Ceza Puanı Uyarısı",
-                f"Ceza puanınız ({penalty_points}) 10'u aştığı için rezervasyon yapamazsınız. Lütfen ceza puanınızı düşürmek için yönetim ile iletişime geçin."
+                f"Ceza puanınız ({penalty_points}) {PENALTY_LIMIT}'u aştığı için rezervasyon yapamazsınız. Lütfen ceza puanınızı düşürmek için yönetim ile iletişime geçin."
             )
             self.table_reservation_button.configure(state="disabled")
             self.book_reservation_button.configure(state="disabled")
@@ -1002,4 +820,8 @@ if __name__ == "__main__":
     ctk.set_default_color_theme("dark-blue")
 
     app = App()
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        flush_cover_cache()
+        close_pool()
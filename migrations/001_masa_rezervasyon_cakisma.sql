@@ -0,0 +1,13 @@
+-- Masa rezervasyonu çakışma kontrolü için indeks.
+-- reservations.reserve_seat() aynı masa ve tarihteki aktif rezervasyonları saat aralığı
+-- kesişimiyle arar; bu indeks aramayı tek bir aralık taramasına indirir ve UPDLOCK/HOLDLOCK
+-- ile alınan anahtar aralığı kilitlerini yalnızca o masa ve güne sınırlar.
+
+IF NOT EXISTS (SELECT 1
+               FROM sys.indexes
+               WHERE name = 'IX_masa_rezervasyon_masa_tarih'
+                 AND object_id = OBJECT_ID('masa_rezervasyon'))
+    CREATE INDEX IX_masa_rezervasyon_masa_tarih
+        ON masa_rezervasyon (masa_id, tarih, saat_baslangic)
+        INCLUDE (saat_bitis, iptal_durumu, durum);
+GO
@@ -0,0 +1,36 @@
+-- Masa rezervasyonları için değişiklik akışı.
+-- Her satır değiştiğinde surum (rowversion) otomatik artar; istemciler yalnızca son okudukları
+-- belirteçten büyük surum değerli satırları çeker (bkz. seat_occupancy.fetch_changes()).
+-- Silinen satırlar rowversion ile görülemediği için tetikleyici ile masa_rezervasyon_silinen
+-- tablosuna yazılır.
+
+IF COL_LENGTH('masa_rezervasyon', 'surum') IS NULL
+    ALTER TABLE masa_rezervasyon ADD surum ROWVERSION;
+GO
+
+IF NOT EXISTS (SELECT 1
+               FROM sys.indexes
+               WHERE name = 'IX_masa_rezervasyon_surum'
+                 AND object_id = OBJECT_ID('masa_rezervasyon'))
+    CREATE INDEX IX_masa_rezervasyon_surum ON masa_rezervasyon (surum);
+GO
+
+IF OBJECT_ID('masa_rezervasyon_silinen', 'U') IS NULL
+    CREATE TABLE masa_rezervasyon_silinen
+    (
+        masa_rezervasyon_id INT        NOT NULL,
+        surum               ROWVERSION NOT NULL,
+        INDEX IX_masa_rezervasyon_silinen_surum (surum)
+    );
+GO
+
+CREATE OR ALTER TRIGGER trg_masa_rezervasyon_silinen
+    ON masa_rezervasyon
+    AFTER DELETE
+    AS
+BEGIN
+    SET NOCOUNT ON;
+    INSERT INTO masa_rezervasyon_silinen (masa_rezervasyon_id)
+    SELECT masa_rezervasyon_id FROM deleted;
+END
+GO
@@ -0,0 +1,18 @@
+-- Silinen masa rezervasyonu kayıtlarının temizlenebilmesi için silinme zamanı.
+-- İstemciler gün değiştiğinde doluluk modelini baştan yükler ve belirteçleri bir günden eski
+-- olamaz; bu yüzden TOMBSTONE_RETENTION_DAYS günden eski kayıtlar ceza tarama servisi
+-- tarafından silinir (bkz. penalty_sweeper.purge_deleted_reservations()).
+-- Mevcut satırlar betiğin çalıştığı anın zamanını alır.
+
+IF COL_LENGTH('masa_rezervasyon_silinen', 'silinme_zamani') IS NULL
+    ALTER TABLE masa_rezervasyon_silinen
+        ADD silinme_zamani DATETIME2 NOT NULL
+            CONSTRAINT DF_masa_rezervasyon_silinen_zaman DEFAULT SYSUTCDATETIME();
+GO
+
+IF NOT EXISTS (SELECT 1
+               FROM sys.indexes
+               WHERE name = 'IX_masa_rezervasyon_silinen_zaman'
+                 AND object_id = OBJECT_ID('masa_rezervasyon_silinen'))
+    CREATE INDEX IX_masa_rezervasyon_silinen_zaman ON masa_rezervasyon_silinen (silinme_zamani);
+GO
@@ -0,0 +1,26 @@
+-- Ceza bildirimlerinin kullanıcı başına son görülme zamanı.
+-- İstemciler yalnızca son_gorulen değerinden sonra yazılmış cezaları gösterir ve bildirimleri
+-- kullanıcıya gösterdikten sonra bu değeri ilerletir (bkz. penalty_sweeper.fetch_penalty_notices()).
+-- Kitap ve masa cezaları farklı pencerelerde gösterildiği için her tür ayrı tutulur.
+-- Mevcut kullanıcıların eski cezaları yeniden gösterilmesin diye betiğin çalıştığı an başlangıç
+-- değeri olarak yazılır; satırı olmayan kullanıcıların tüm cezaları gösterilir.
+
+IF OBJECT_ID('ceza_bildirim', 'U') IS NULL
+    CREATE TABLE ceza_bildirim
+    (
+        kullanici_id INT          NOT NULL,
+        tur          NVARCHAR(10) NOT NULL,
+        son_gorulen  DATETIME     NOT NULL,
+        CONSTRAINT PK_ceza_bildirim PRIMARY KEY (kullanici_id, tur)
+    );
+GO
+
+INSERT INTO ceza_bildirim (kullanici_id, tur, son_gorulen)
+SELECT k.kullanici_id, t.tur, GETDATE()
+FROM kullanici k
+         CROSS JOIN (VALUES (N'kitap'), (N'masa')) t (tur)
+WHERE NOT EXISTS (SELECT 1
+                  FROM ceza_bildirim b
+                  WHERE b.kullanici_id = k.kullanici_id
+                    AND b.tur = t.tur);
+GO
@@ -0,0 +1,146 @@
+"""
+Büyük listeler için sayfalı (keyset) sorgu ve Treeview denetleyicisi.
+
+Rezervasyon geçmişinin tamamını tek seferde çekmek yerine satırlar PAGE_SIZE'lık sayfalar
+halinde yüklenir. Sonraki sayfa OFFSET ile değil, önceki sayfanın son satırının sıralama
+anahtarlarından devam edilerek (seek) çekilir; böylece derin sayfalar da ucuzdur ve araya
+eklenen satırlar sayfaları kaydırmaz. Kullanıcı listenin sonuna yaklaştıkça yeni sayfa
+arka planda istenir. Sıralama ve filtreler SQL'e taşınır.
+"""
+from background import run_in_background
+
+PAGE_SIZE = 200
+LOAD_MORE_THRESHOLD = 0.9  # Kaydırma çubuğu bu orana ulaşınca sonraki sayfa istenir
+
+
+def _seek_clause(sort_keys):
+    """(s0 > ?) OR (s0 = ? AND s1 < ?) ... biçiminde devam koşulu üretir."""
+    clauses = []
+    for i, (alias, direction) in enumerate(sort_keys):
+        operator = ">" if direction == "ASC" else "<"
+        parts = [f"{previous} = ?" for previous, _ in sort_keys[:i]]
+        parts.append(f"{alias} {operator} ?")
+        clauses.append("(" + " AND ".join(parts) + ")")
+    return " OR ".join(clauses)
+
+
+def _seek_params(last_key):
+    params = []
+    for i in range(len(last_key)):
+        params.extend(last_key[:i])
+        params.append(last_key[i])
+    return params
+
+
+def fetch_keyset_page(cursor, base_query, base_params, directions, limit, after=None):
+    """
+    Bir sayfa satır çeker.
+
+    base_query: ORDER BY içermeyen SELECT; son len(directions) sütunu s0, s1, ... takma
+    adlı sıralama anahtarlarıdır ve son anahtar satırı tekil olarak belirlemelidir (ör. ID).
+    directions: her anahtar için "ASC" / "DESC".
+    after: önceki sayfanın son anahtarı; None ise ilk sayfa çekilir.
+
+    (görüntülenecek satır, sıralama anahtarı) çiftlerinin listesini döndürür.
+    """
+    sort_keys = [(f"s{i}", direction) for i, direction in enumerate(directions)]
+    where, seek_params = "", []
+    if after is not None:
+        where = f"WHERE {_seek_clause(sort_keys)}"
+        seek_params = _seek_params(after)
+    order_by = ", ".join(f"{alias} {direction}" for alias, direction in sort_keys)
+
+    cursor.execute(f"SELECT TOP (?) * FROM ({base_query}) AS sayfa {where} ORDER BY {order_by}",
+                   [limit, *base_params, *seek_params])
+
+    key_count = len(sort_keys)
+    return [(tuple(row[:-key_count]), tuple(row[-key_count:])) for row in cursor.fetchall()]
+
+
+class PagedTreeView:
+    """
+    Bir Treeview'ı sayfalı bir sorguya bağlar.
+
+    query(filters, sort, limit, after) işçi thread'de çalışır ve fetch_keyset_page sonucunu
+    döndürür. filters, reload() ile verilen filtre sözlüğüdür (Tk thread'inde hazırlanır);
+    sort, sort_by() ile seçilen (sütun, azalan_mı) ikilisi veya varsayılan sıra için None'dır.
+    display(rows) o ana kadar yüklenmiş tüm satırlarla Tk thread'inde çağrılır.
+    """
+
+    def __init__(self, owner, key, tree, query, display, scrollbar=None, on_loaded=None, on_error=None,
+                 page_size=PAGE_SIZE):
+        self.owner = owner
+        self.key = key
+        self.tree = tree
+        self.query = query
+        self.display = display
+        self.scrollbar = scrollbar
+        self.on_loaded = on_loaded
+        self.on_error = on_error
+        self.page_size = page_size
+
+        self.filters = {}
+        self.sort = None
+        self.rows = []
+        self.has_more = False
+        self._last_key = None
+        self._loading = False
+
+        tree.configure(yscrollcommand=self._on_yscroll)
+
+    def reload(self, filters=None):
+        """Listeyi ilk sayfadan yeniden yükler (filtre veya sıralama değiştiğinde)."""
+        if filters is not None:
+            self.filters = dict(filters)
+        self._request(self.page_size, after=None, append=False)
+
+    def refresh(self):
+        """Şu ana kadar yüklenmiş satırları tek sorguda yeniden çeker; kaydırma konumu korunur."""
+        self._request(max(len(self.rows), self.page_size), after=None, append=False)
+
+    def load_more(self):
+        if self._loading or not self.has_more:
+            return
+        self._request(self.page_size, after=self._last_key, append=True)
+
+    def sort_by(self, column):
+        """Aynı sütuna tekrar tıklanırsa sıralama yönünü değiştirir."""
+        if self.sort and self.sort[0] == column:
+            self.sort = (column, not self.sort[1])
+        else:
+            self.sort = (column, False)
+        self.reload()
+
+    def _request(self, limit, after, append):
+        self._loading = True
+        run_in_background(self.owner, self.key, self.query, self.filters, self.sort, limit, after,
+                          on_success=lambda page: self._on_page(page, limit, append),
+                          on_error=self._on_page_error)
+
+    def _on_page(self, page, limit, append):
+        self._loading = False
+        self.has_more = len(page) == limit
+        rows = [row for row, _ in page]
+        if append:
+            self.rows = self.rows + rows
+        else:
+            self.rows = rows
+        if page:
+            self._last_key = page[-1][1]
+        elif not append:
+            self._last_key = None
+
+        self.display(self.rows)
+        if self.on_loaded:
+            self.on_loaded(self)
+
+    def _on_page_error(self, error):
+        self._loading = False
+        if self.on_error:
+            self.on_error(error)
+
+    def _on_yscroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        if float(last) >= LOAD_MORE_THRESHOLD and self.has_more and not self._loading:
+            self.load_more()
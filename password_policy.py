@@ -0,0 +1,158 @@
+"""
+Şifre hash politikası.
+
+Her hash'in algoritması ve maliyeti hash metninden okunur (describe_hash): bcrypt hash'leri
+"$2b$<maliyet>$..." biçimindedir, eski kayıtlar tuzsuz SHA-256 (64 onaltılık karakter) olarak
+tutulur. Doğrulama algoritmaya göre doğrudan yapılır; eski hash'ler için önce bcrypt denenip
+hata beklenmez. Başarılı girişten sonra needs_rehash() True dönerse şifre güncel maliyetle
+yeniden hash'lenir (bkz. auth_service).
+
+bcrypt maliyeti sırasıyla BCRYPT_COST ortam değişkeninden, kalibrasyon dosyasından
+(PASSWORD_POLICY_PATH) veya DEFAULT_COST'tan alınır. Kalibrasyon, bu makinede bir doğrulamanın
+hedef süreyi (ms) aşmadığı en yüksek maliyeti seçer:
+
+    python password_policy.py --target-ms 250          # Ölçüm
+    python password_policy.py --target-ms 250 --save   # Ölçüm ve kaydetme
+    python password_policy.py --report                 # Veritabanındaki hash dağılımı
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from collections import Counter
+
+import bcrypt
+
+from database import get_db_connection
+
+PASSWORD_POLICY_PATH = os.getenv('PASSWORD_POLICY_PATH', 'sifre_politikasi.json')
+DEFAULT_COST = 12
+MIN_COST = 10
+MAX_COST = 16
+DEFAULT_TARGET_MS = 250
+
+_BCRYPT_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+_SHA256_RE = re.compile(r'^[0-9a-fA-F]{64}$')
+
+_cost = None
+
+
+def describe_hash(stored_hash):
+    """Hash'in (algoritma, maliyet) bilgisini döndürür: ('bcrypt', 12), ('sha256', None) veya ('bilinmiyor', None)."""
+    if stored_hash:
+        match = _BCRYPT_RE.match(stored_hash)
+        if match:
+            return 'bcrypt', int(match.group(1))
+        if _SHA256_RE.match(stored_hash):
+            return 'sha256', None
+    return 'bilinmiyor', None
+
+
+def current_cost():
+    """Yeni hash'lerde kullanılacak bcrypt maliyeti."""
+    global _cost
+    if _cost is None:
+        cost = os.getenv('BCRYPT_COST')
+        if cost is None:
+            try:
+                with open(PASSWORD_POLICY_PATH, encoding='utf-8') as f:
+                    cost = json.load(f).get('bcrypt_cost')
+            except (OSError, ValueError):
+                cost = None
+        _cost = min(max(int(cost or DEFAULT_COST), MIN_COST), MAX_COST)
+    return _cost
+
+
+def hash_sifre(sifre: str, cost=None) -> str:
+    """Şifreyi güncel (veya verilen) maliyetle bcrypt ile hash'ler."""
+    salt = bcrypt.gensalt(rounds=cost or current_cost())
+    return bcrypt.hashpw(sifre.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_sifre(girilen_sifre: str, stored_hash: str) -> bool:
+    """Girilen şifreyi, hash'in algoritmasına göre doğrular."""
+    algorithm, _ = describe_hash(stored_hash)
+    if algorithm == 'bcrypt':
+        try:
+            return bcrypt.checkpw(girilen_sifre.encode('utf-8'), stored_hash.encode('utf-8'))
+        except ValueError:
+            return False
+    if algorithm == 'sha256':
+        # Eski SHA256 hash'leri için geriye dönük uyumluluk
+        hashed_girilen = hashlib.sha256(girilen_sifre.encode('utf-8')).hexdigest()
+        return hmac.compare_digest(hashed_girilen, stored_hash.lower())
+    return False
+
+
+def needs_rehash(stored_hash):
+    """Hash eski bir algoritmayla veya güncel maliyetten düşük maliyetle üretildiyse True döner."""
+    algorithm, cost = describe_hash(stored_hash)
+    return algorithm != 'bcrypt' or cost < current_cost()
+
+
+def measure(cost, samples=3):
+    """Verilen maliyette tek bir doğrulamanın ortalama süresini (ms) ölçer."""
+    password = b'kalibrasyon-sifresi'
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=cost))
+    started = time.perf_counter()
+    for _ in range(samples):
+        bcrypt.checkpw(password, hashed)
+    return (time.perf_counter() - started) * 1000 / samples
+
+
+def calibrate(target_ms=DEFAULT_TARGET_MS, samples=3, report=None):
+    """
+    Doğrulaması target_ms'yi aşmayan en yüksek maliyeti döndürür (en az MIN_COST).
+    report(maliyet, ms) her ölçümden sonra çağrılır.
+    """
+    chosen = MIN_COST
+    for cost in range(MIN_COST, MAX_COST + 1):
+        elapsed = measure(cost, samples)
+        if report:
+            report(cost, elapsed)
+        if elapsed > target_ms:
+            break
+        chosen = cost
+    return chosen
+
+
+def save_policy(cost, target_ms, path=PASSWORD_POLICY_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'bcrypt_cost': cost, 'hedef_ms': target_ms}, f)
+
+
+def hash_report():
+    """kullanici tablosundaki hash'lerin (algoritma, maliyet) dağılımını döndürür."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT sifre FROM kullanici")
+        return Counter(describe_hash(row[0]) for row in cursor.fetchall())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="bcrypt maliyetini bu makinede hedef doğrulama süresine göre ayarlar")
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS, help="Hedef doğrulama süresi (ms)")
+    parser.add_argument("--samples", type=int, default=3, help="Maliyet başına ölçüm sayısı")
+    parser.add_argument("--save", action="store_true", help=f"Seçilen maliyeti {PASSWORD_POLICY_PATH} dosyasına yaz")
+    parser.add_argument("--report", action="store_true", help="Veritabanındaki hash algoritması/maliyet dağılımını göster")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        for (algorithm, cost), count in sorted(hash_report().items(), key=lambda item: -item[1]):
+            print(f"  {algorithm}{f' (maliyet {cost})' if cost else ''}: {count}")
+        print(f"Güncel maliyet: {current_cost()}")
+        return
+
+    cost = calibrate(args.target_ms, args.samples,
+                     report=lambda c, ms: print(f"  maliyet {c}: {ms:.0f} ms"))
+    print(f"Hedef {args.target_ms:.0f} ms için önerilen maliyet: {cost}")
+    if args.save:
+        save_policy(cost, args.target_ms)
+        print(f"{PASSWORD_POLICY_PATH} kaydedildi.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Ceza tarama servisi.
+
+Süresi geçmiş kitap rezervasyonlarını ve gelinmeyen masa rezervasyonlarını tek bir
+yerden tarar, cezaları uygular ve 'cezalar' tablosuna yazar. İstemciler cezaları
+kendileri uygulamaz; yalnızca kendi ceza kayıtlarını okur (bkz. fetch_penalty_notices).
+Her taramada masa haritasının değişiklik akışı için tutulan eski silinme kayıtları da
+temizlenir (bkz. purge_deleted_reservations).
+
+Tek seferlik çalıştırma (cron / Görev Zamanlayıcı):
+    python penalty_sweeper.py --once
+
+Sürekli çalışan servis olarak:
+    python penalty_sweeper.py --interval 60
+"""
+import argparse
+import threading
+import time
+import traceback
+from datetime import datetime
+
+import pyodbc
+
+from database import get_db_connection, close_pool
+
+PENALTY_POINTS = 5
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL_SECONDS = 60
+# İstemciler gün değişiminde doluluğu baştan yükler; daha eski silinme kayıtlarını okuyan istemci olmaz
+TOMBSTONE_RETENTION_DAYS = 2
+
+# Aynı anda tek bir taramanın ceza yazmasını sağlayan uygulama kilidi
+SWEEP_LOCK_RESOURCE = "kutuphane_ceza_tarama"
+
+
+class SweepResult:
+    """Bir taramada cezalandırılan rezervasyonların özeti."""
+
+    def __init__(self):
+        self.book_penalties = []  # (kitap_rezervasyon_id, kullanici_id)
+        self.table_penalties = []  # (masa_rezervasyon_id, kullanici_id)
+        self.purged_tombstones = 0  # Silinen eski masa_rezervasyon_silinen kayıtları
+        self.skipped = False  # Başka bir tarama kilidi tutuyorsa True
+
+    @property
+    def total(self):
+        return len(self.book_penalties) + len(self.table_penalties)
+
+    def __str__(self):
+        if self.skipped:
+            return "Başka bir ceza taraması çalışıyor, bu tur atlandı."
+        return (f"{len(self.book_penalties)} kitap ve {len(self.table_penalties)} masa rezervasyonu "
+                f"için ceza uygulandı, {self.purged_tombstones} eski silinme kaydı temizlendi.")
+
+
+def _acquire_sweep_lock(cursor):
+    """İşlem süresince geçerli uygulama kilidini almaya çalışır; alınamazsa False döner."""
+    cursor.execute("""
+                   DECLARE @sonuc INT;
+                   EXEC @sonuc = sp_getapplock @Resource = ?, @LockMode = 'Exclusive',
+                                               @LockOwner = 'Transaction', @LockTimeout = 0;
+                   SELECT @sonuc;
+                   """, (SWEEP_LOCK_RESOURCE,))
+    return cursor.fetchone()[0] >= 0
+
+
+def _sweep_overdue_books(cursor, batch_size):
+    """
+    Son iade tarihi geçmiş bir grup aktif kitap rezervasyonunu 'gecikti' durumuna geçirir ve ceza yazar.
+    Durum geçişi koşullu UPDATE ile yapıldığından aynı rezervasyon iki kez cezalandırılamaz.
+    Geçiş yapan satırlar tablo değişkenine alınır; ceza puanı ve ceza kayıtları satır satır değil,
+    tek bir toplu komut grubuyla (tek gidiş-dönüş) yazılır.
+    """
+    cursor.execute("""
+                   SET NOCOUNT ON;
+                   DECLARE @puan INT = ?;
+                   DECLARE @gecikenler TABLE (
+                       kitap_rezervasyon_id INT PRIMARY KEY,
+                       kullanici_id         INT NOT NULL,
+                       kitap_id             INT NOT NULL
+                   );
+
+                   UPDATE TOP (?) kitap_rezervasyon
+                   SET durum      = 'gecikti',
+                       gecikti_mi = 1
+                   OUTPUT INSERTED.kitap_rezervasyon_id, INSERTED.kullanici_id, INSERTED.kitap_id
+                       INTO @gecikenler
+                   WHERE teslim_edildi_mi = 0
+                     AND durum = 'aktif'
+                     AND son_iade_tarihi < CONVERT(date, GETDATE());
+
+                   UPDATE k
+                   SET k.ceza_puani = ISNULL(k.ceza_puani, 0) + g.adet * @puan
+                   FROM kullanici k
+                            JOIN (SELECT kullanici_id, COUNT(*) AS adet
+                                  FROM @gecikenler
+                                  GROUP BY kullanici_id) g ON g.kullanici_id = k.kullanici_id;
+
+                   INSERT INTO cezalar (kullanici_id, aciklama, tarih, masa_rezervasyon_id, kitap_rezervasyon_id)
+                   SELECT g.kullanici_id, CONCAT(N'Kitap zamanında iade edilmedi: ', kt.ad), GETDATE(), NULL,
+                          g.kitap_rezervasyon_id
+                   FROM @gecikenler g
+                            JOIN kitap kt ON kt.kitap_id = g.kitap_id;
+
+                   SELECT kitap_rezervasyon_id, kullanici_id FROM @gecikenler;
+                   """, (PENALTY_POINTS, batch_size))
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def _sweep_missed_tables(cursor, batch_size):
+    """
+    Bitiş saati geçmiş ve gelinmemiş bir grup masa rezervasyonunu 'Ceza' durumuna geçirir ve ceza yazar.
+    Kitap taramasıyla aynı şekilde tek bir toplu komut grubuyla çalışır.
+    """
+    cursor.execute("""
+                   SET NOCOUNT ON;
+                   DECLARE @puan INT = ?;
+                   DECLARE @kacirilanlar TABLE (
+                       masa_rezervasyon_id INT PRIMARY KEY,
+                       kullanici_id        INT NOT NULL,
+                       tarih               DATE,
+                       saat_bitis          TIME
+                   );
+
+                   UPDATE TOP (?) masa_rezervasyon
+                   SET durum        = 'Ceza',
+                       iptal_durumu = 1
+                   OUTPUT INSERTED.masa_rezervasyon_id, INSERTED.kullanici_id, INSERTED.tarih, INSERTED.saat_bitis
+                       INTO @kacirilanlar
+                   WHERE iptal_durumu = 0
+                     AND (durum IS NULL OR durum != 'Tamamlandı')
+                     AND (tarih < CONVERT(date, GETDATE())
+                       OR (tarih = CONVERT(date, GETDATE())
+                           AND saat_bitis <= CONVERT(time, GETDATE())));
+
+                   UPDATE k
+                   SET k.ceza_puani = ISNULL(k.ceza_puani, 0) + g.adet * @puan
+                   FROM kullanici k
+                            JOIN (SELECT kullanici_id, COUNT(*) AS adet
+                                  FROM @kacirilanlar
+                                  GROUP BY kullanici_id) g ON g.kullanici_id = k.kullanici_id;
+
+                   INSERT INTO cezalar (kullanici_id, aciklama, tarih, masa_rezervasyon_id, kitap_rezervasyon_id)
+                   SELECT m.kullanici_id,
+                          CONCAT(N'Masa rezervasyonuna gelinmedi - Tarih: ', CONVERT(varchar(10), m.tarih, 23),
+                                 N', Saat: ', CONVERT(varchar(8), m.saat_bitis, 108),
+                                 N' - Ceza Puani: ', @puan),
+                          GETDATE(), m.masa_rezervasyon_id, NULL
+                   FROM @kacirilanlar m;
+
+                   SELECT masa_rezervasyon_id, kullanici_id FROM @kacirilanlar;
+                   """, (PENALTY_POINTS, batch_size))
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def purge_deleted_reservations(cursor, batch_size, retention_days=TOMBSTONE_RETENTION_DAYS):
+    """
+    retention_days'ten eski bir grup silinme kaydını siler ve silinen satır sayısını döndürür
+    (bkz. migrations/003_masa_rezervasyon_silinen_temizlik.sql).
+    """
+    cursor.execute("""
+                   DELETE TOP (?)
+                   FROM masa_rezervasyon_silinen
+                   WHERE silinme_zamani < DATEADD(DAY, -?, SYSUTCDATETIME())
+                   """, (batch_size, retention_days))
+    return cursor.rowcount
+
+
+def run_sweep(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Tüm gecikmiş rezervasyonları gruplar halinde işler. Her grup (durum geçişi, ceza puanı
+    ve ceza kayıtları) tek bir işlemde ve uygulama kilidi altında çalışır; gruplar kısa
+    tutulduğundan kilitler uzun süre tutulmaz. Kilit başka bir taramadaysa tur atlanır.
+    """
+    result = SweepResult()
+    conn = get_db_connection()
+    if conn is None:
+        raise ConnectionError("Veritabanına bağlanılamadı.")
+
+    try:
+        cursor = conn.cursor()
+        for sweep, target in ((_sweep_overdue_books, result.book_penalties),
+                              (_sweep_missed_tables, result.table_penalties)):
+            while True:
+                if not _acquire_sweep_lock(cursor):
+                    conn.rollback()
+                    result.skipped = True
+                    return result
+                processed = sweep(cursor, batch_size)
+                conn.commit()
+                target.extend(processed)
+                if len(processed) < batch_size:
+                    break
+
+        while True:
+            purged = purge_deleted_reservations(cursor, batch_size)
+            conn.commit()
+            result.purged_tombstones += purged
+            if purged < batch_size:
+                break
+        return result
+    except pyodbc.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# --- İstemci tarafı: yayınlanan cezaları okuma ---
+
+# Bu süreçte kullanıcıya gösterilmiş ceza kayıtları (son görülme zamanı kaydedilemese bile tekrar gösterilmez)
+_shown_notices = set()
+_shown_notices_lock = threading.Lock()
+
+
+class PenaltyNotice:
+    """Kullanıcıya gösterilecek tek bir ceza kaydı."""
+
+    def __init__(self, kullanici_id, aciklama, tarih, kitap_rezervasyon_id, masa_rezervasyon_id):
+        self.kullanici_id = kullanici_id
+        self.aciklama = aciklama
+        self.tarih = tarih
+        self.key = (kullanici_id, kitap_rezervasyon_id, masa_rezervasyon_id, aciklama)
+
+
+def fetch_penalty_notices(kullanici_id, kind=None):
+    """
+    Kullanıcının tarama servisi tarafından yazılmış ve henüz gösterilmemiş ceza kayıtlarını
+    (PenaltyNotice) döndürür. kind: 'kitap', 'masa' veya None (hepsi).
+    Kullanıcının o tür için son görülme zamanından sonraki kayıtlar okunur
+    (bkz. migrations/004_ceza_bildirim.sql). İşçi thread'de çalıştırılabilir; kayıtları gösterilmiş
+    saymaz, gösterildikten sonra Tk thread'inde mark_notices_shown() çağrılmalıdır.
+    """
+    kind_filter = {
+        "kitap": "AND c.kitap_rezervasyon_id IS NOT NULL",
+        "masa": "AND c.masa_rezervasyon_id IS NOT NULL",
+    }.get(kind, "")
+
+    conn = get_db_connection()
+    if conn is None:
+        return []
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+                       SELECT c.aciklama, c.tarih, c.kitap_rezervasyon_id, c.masa_rezervasyon_id
+                       FROM cezalar c
+                                LEFT JOIN ceza_bildirim b
+                                          ON b.kullanici_id = c.kullanici_id AND b.tur = ?
+                       WHERE c.kullanici_id = ?
+                         AND (b.son_gorulen IS NULL OR c.tarih > b.son_gorulen)
+                         {kind_filter}
+                       ORDER BY c.tarih
+                       """, (_notice_kind(kind), kullanici_id))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    notices = [PenaltyNotice(kullanici_id, *row) for row in rows]
+    with _shown_notices_lock:
+        return [notice for notice in notices if notice.key not in _shown_notices]
+
+
+def mark_notices_shown(notices):
+    """
+    Kullanıcıya gösterilen kayıtları bu süreç için gösterilmiş sayar (Tk thread'inde, gösterimden
+    sonra çağrılır). Son görülme zamanı ayrıca save_notices_seen() ile kaydedilmelidir.
+    """
+    with _shown_notices_lock:
+        _shown_notices.update(notice.key for notice in notices)
+
+
+def save_notices_seen(kullanici_id, kind, notices):
+    """
+    Kullanıcının o tür için son görülme zamanını gösterilen en yeni kayda ilerletir; zaman yalnızca
+    ileri alınır. Bloklayan bir çağrıdır, işçi thread'de çalıştırılmalıdır.
+    """
+    if not notices:
+        return
+    son_gorulen = max(notice.tarih for notice in notices)
+    conn = get_db_connection()
+    if conn is None:
+        raise ConnectionError("Veritabanına bağlanılamadı.")
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+                       UPDATE ceza_bildirim WITH (UPDLOCK, SERIALIZABLE)
+                       SET son_gorulen = ?
+                       WHERE kullanici_id = ?
+                         AND tur = ?
+                         AND son_gorulen < ?;
+
+                       IF NOT EXISTS (SELECT 1 FROM ceza_bildirim WHERE kullanici_id = ? AND tur = ?)
+                           INSERT INTO ceza_bildirim (kullanici_id, tur, son_gorulen)
+                           VALUES (?, ?, ?);
+                       """, (son_gorulen, kullanici_id, _notice_kind(kind), son_gorulen,
+                             kullanici_id, _notice_kind(kind),
+                             kullanici_id, _notice_kind(kind), son_gorulen))
+
+
+def _notice_kind(kind):
+    return kind or "hepsi"
+
+
+def _run_forever(interval, batch_size):
+    print(f"Ceza tarama servisi başlatıldı ({interval} saniyede bir).")
+    while True:
+        started = time.monotonic()
+        try:
+            result = run_sweep(batch_size)
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {result}")
+        except Exception as e:
+            print(f"Ceza taraması sırasında hata: {e}")
+            traceback.print_exc()
+        elapsed = time.monotonic() - started
+        time.sleep(max(0.0, interval - elapsed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gecikmiş rezervasyonlar için ceza tarama servisi")
+    parser.add_argument("--once", action="store_true", help="Tek bir tarama yap ve çık (cron için)")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL_SECONDS,
+                        help="Servis modunda taramalar arası süre (saniye)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Tek işlemde işlenecek en fazla rezervasyon sayısı")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.once:
+            print(run_sweep(args.batch_size))
+        else:
+            _run_forever(args.interval, args.batch_size)
+    except KeyboardInterrupt:
+        print("Ceza tarama servisi durduruldu.")
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
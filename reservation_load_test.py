@@ -0,0 +1,155 @@
+"""
+Kitap rezervasyonu için eşzamanlılık yük testi.
+
+Aynı kitap (veya kitaplar) için çok sayıda rezervasyon denemesini aynı anda başlatır ve
+sonunda tutarlılığı doğrular:
+
+* Başarılı rezervasyon sayısı başlangıçtaki stoktan fazla olamaz.
+* Son stok = başlangıç stoğu - başarılı rezervasyon sayısı.
+* Bir kullanıcının aynı kitap için birden fazla aktif rezervasyonu olamaz.
+
+Test sırasında oluşturulan rezervasyonlar sonunda silinir ve stok geri yüklenir
+(--keep verilmedikçe). Gerçek veritabanını değiştirdiği için test ortamında çalıştırın.
+
+Kullanım:
+    python reservation_load_test.py --kitap-id 12 --attempts 200
+    python reservation_load_test.py --kitap-id 12 --kitap-id 13 --users 50
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+# Her deneme ayrı bir bağlantı ister; havuz küçükse denemeler bağlantı beklerken sıraya girer
+os.environ.setdefault('DB_POOL_MAX_SIZE', '50')
+os.environ.setdefault('DB_POOL_ACQUIRE_TIMEOUT', '60')
+
+from database import get_db_connection, close_pool
+from reservations import reserve_book, ReservationResult
+
+
+def _stock(cursor, book_ids):
+    cursor.execute("SELECT kitap_id, adet FROM kitap WHERE kitap_id IN (SELECT CAST(value AS INT) FROM STRING_SPLIT(?, ','))",
+                   (",".join(map(str, book_ids)),))
+    return {kitap_id: adet for kitap_id, adet in cursor.fetchall()}
+
+
+def run_load_test(book_ids, attempts, user_count):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT TOP (?) kullanici_id FROM kullanici ORDER BY kullanici_id", (user_count,))
+        user_ids = [row[0] for row in cursor.fetchall()]
+        initial = _stock(cursor, book_ids)
+
+    if not user_ids:
+        raise RuntimeError("Test için kullanıcı bulunamadı.")
+    missing = set(book_ids) - set(initial)
+    if missing:
+        raise RuntimeError(f"Kitap bulunamadı: {sorted(missing)}")
+
+    # Kullanıcı sayısından fazla deneme, mükerrer ve limit yollarını da zorlar
+    jobs = [(user_ids[i % len(user_ids)], book_ids[i % len(book_ids)]) for i in range(attempts)]
+    results = [None] * len(jobs)
+    barrier = threading.Barrier(len(jobs))
+
+    def attempt(index, user_id, book_id):
+        try:
+            barrier.wait()
+            results[index] = reserve_book(user_id, book_id)
+        except Exception as e:
+            results[index] = (e, None)
+
+    threads = [threading.Thread(target=attempt, args=(i, user_id, book_id)) for i, (user_id, book_id) in enumerate(jobs)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return jobs, results, initial, elapsed
+
+
+def verify(jobs, results, initial):
+    """Tutarlılık kontrollerini yapar ve hata mesajlarının listesini döndürür."""
+    problems = []
+    ok_per_book = Counter()
+    ok_pairs = Counter()
+    for (user_id, book_id), (result, _) in zip(jobs, results):
+        if result is ReservationResult.OK:
+            ok_per_book[book_id] += 1
+            ok_pairs[(user_id, book_id)] += 1
+
+    with get_db_connection() as conn:
+        final = _stock(conn.cursor(), list(initial))
+
+    for book_id, start in initial.items():
+        if ok_per_book[book_id] > max(start, 0):
+            problems.append(f"Kitap {book_id}: stok {start} iken {ok_per_book[book_id]} rezervasyon başarılı oldu")
+        if final[book_id] != start - ok_per_book[book_id]:
+            problems.append(f"Kitap {book_id}: beklenen stok {start - ok_per_book[book_id]}, bulunan {final[book_id]}")
+        if final[book_id] < 0:
+            problems.append(f"Kitap {book_id}: stok negatif ({final[book_id]})")
+    for (user_id, book_id), count in ok_pairs.items():
+        if count > 1:
+            problems.append(f"Kullanıcı {user_id} kitap {book_id} için {count} kez rezervasyon yaptı")
+    return problems
+
+
+def cleanup(jobs, results):
+    """Test sırasında oluşturulan rezervasyonları siler ve stokları geri yükler."""
+    created = [(book_id, reservation_id) for (_, book_id), (result, reservation_id) in zip(jobs, results)
+               if result is ReservationResult.OK]
+    if not created:
+        return
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.fast_executemany = True
+        cursor.executemany("DELETE FROM kitap_rezervasyon WHERE kitap_rezervasyon_id = ?",
+                           [(reservation_id,) for _, reservation_id in created])
+        cursor.executemany("UPDATE kitap SET adet = adet + 1 WHERE kitap_id = ?",
+                           [(book_id,) for book_id, _ in created])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kitap rezervasyonu eşzamanlılık yük testi")
+    parser.add_argument("--kitap-id", type=int, action="append", required=True, dest="book_ids",
+                        help="Denenecek kitap (birden fazla verilebilir)")
+    parser.add_argument("--attempts", type=int, default=200, help="Aynı anda başlatılacak deneme sayısı")
+    parser.add_argument("--users", type=int, default=200, help="Denemelerde kullanılacak kullanıcı sayısı")
+    parser.add_argument("--keep", action="store_true", help="Oluşturulan rezervasyonları silme")
+    args = parser.parse_args(argv)
+
+    problems = []
+    try:
+        jobs, results, initial, elapsed = run_load_test(args.book_ids, args.attempts, args.users)
+        outcomes = Counter(result.value if isinstance(result, ReservationResult) else type(result).__name__
+                           for result, _ in results)
+        print(f"{len(jobs)} deneme {elapsed:.2f} sn'de tamamlandı ({len(jobs) / elapsed:.0f} deneme/sn)")
+        print("Başlangıç stokları:", initial)
+        for outcome, count in outcomes.most_common():
+            print(f"  {outcome}: {count}")
+        for result, _ in results:
+            if isinstance(result, Exception):
+                traceback.print_exception(type(result), result, result.__traceback__)
+                break
+
+        problems = verify(jobs, results, initial)
+        if not args.keep:
+            cleanup(jobs, results)
+    finally:
+        close_pool()
+
+    if problems:
+        print("TUTARSIZLIK:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("Tüm tutarlılık kontrolleri geçti.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Kitap ve masa rezervasyonları için atomik işlemler.
+
+Stok, kullanıcı limiti ve mükerrer rezervasyon kontrolleri ile stok düşümü ve rezervasyon
+kaydı tek bir T-SQL işleminde yapılır:
+
+* Kullanıcının satırı UPDLOCK ile kilitlenir; aynı kullanıcının eşzamanlı denemeleri sıraya
+  girer, böylece limit ve mükerrer kontrolleri yarış durumuna açık değildir.
+* Stok "UPDATE kitap SET adet = adet - 1 WHERE adet > 0" ile koşullu düşülür. Satır kilidi işlem
+  sonuna kadar tutulduğundan son kopyayı iki kiosk aynı anda alamaz.
+
+Masa rezervasyonunda saat çakışması kontrolü ve kayıt da tek işlemdedir: masanın satırı
+kilitlenir, aynı masa ve tarihteki aktif rezervasyonlar (masa_id, tarih) indeksi üzerinden
+aralık kesişimiyle aranır (bkz. migrations/001_masa_rezervasyon_cakisma.sql).
+
+Kilitler her oturumda aynı sırayla (kullanıcı, kitap/masa, rezervasyon) alındığı için kilitlenme
+(deadlock) oluşmaz.
+"""
+from enum import Enum
+
+from database import get_db_connection
+
+ACTIVE_RESERVATION_LIMIT = 5
+LOAN_DAYS = 14
+
+
+class ReservationResult(Enum):
+    OK = "ok"
+    OUT_OF_STOCK = "stok_yok"
+    LIMIT_REACHED = "limit"
+    DUPLICATE = "zaten_rezerve"
+    NOT_FOUND = "bulunamadi"
+
+
+class SeatReservationResult(Enum):
+    OK = "ok"
+    CONFLICT = "cakisma"
+    USER_HAS_ACTIVE = "aktif_rezervasyon_var"
+    NOT_FOUND = "bulunamadi"
+
+
+_RESERVE_BOOK = """
+SET NOCOUNT ON;
+SET XACT_ABORT ON;
+DECLARE @kullanici_id INT = ?, @kitap_id INT = ?, @limit INT = ?, @gun INT = ?;
+DECLARE @sonuc NVARCHAR(20), @rezervasyon_id INT;
+DECLARE @eklenen TABLE (kitap_rezervasyon_id INT);
+
+BEGIN TRANSACTION;
+
+-- Aynı kullanıcının eşzamanlı denemelerini sıraya sok
+IF NOT EXISTS (SELECT 1 FROM kullanici WITH (UPDLOCK, ROWLOCK) WHERE kullanici_id = @kullanici_id)
+    SET @sonuc = N'bulunamadi';
+ELSE IF (SELECT COUNT(*)
+         FROM kitap_rezervasyon
+         WHERE kullanici_id = @kullanici_id
+           AND durum = 'aktif') >= @limit
+    SET @sonuc = N'limit';
+ELSE IF EXISTS (SELECT 1
+                FROM kitap_rezervasyon
+                WHERE kitap_id = @kitap_id
+                  AND kullanici_id = @kullanici_id
+                  AND durum = 'aktif')
+    SET @sonuc = N'zaten_rezerve';
+ELSE
+BEGIN
+    UPDATE kitap
+    SET adet = adet - 1
+    WHERE kitap_id = @kitap_id
+      AND adet > 0;
+
+    IF @@ROWCOUNT = 0
+        SET @sonuc = CASE
+                         WHEN EXISTS (SELECT 1 FROM kitap WHERE kitap_id = @kitap_id) THEN N'stok_yok'
+                         ELSE N'bulunamadi' END;
+    ELSE
+    BEGIN
+        INSERT INTO kitap_rezervasyon (kullanici_id, kitap_id, alis_tarihi, teslim_edildi_mi,
+                                       gecikti_mi, son_iade_tarihi, durum)
+        OUTPUT INSERTED.kitap_rezervasyon_id INTO @eklenen
+        VALUES (@kullanici_id, @kitap_id, GETDATE(), 0, 0, CAST(DATEADD(DAY, @gun, GETDATE()) AS DATE), 'aktif');
+
+        SELECT @rezervasyon_id = kitap_rezervasyon_id FROM @eklenen;
+        SET @sonuc = N'ok';
+    END
+END
+
+COMMIT TRANSACTION;
+
+SELECT @sonuc, @rezervasyon_id;
+"""
+
+
+def reserve_book(kullanici_id, kitap_id, limit=ACTIVE_RESERVATION_LIMIT, loan_days=LOAN_DAYS):
+    """
+    Kitabı kullanıcı adına atomik olarak rezerve eder.
+    (ReservationResult, yeni kitap_rezervasyon_id veya None) döndürür.
+    Veritabanı hataları pyodbc.Error olarak yükselir.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_RESERVE_BOOK, (kullanici_id, kitap_id, limit, loan_days))
+        sonuc, rezervasyon_id = cursor.fetchone()
+    return ReservationResult(sonuc), rezervasyon_id
+
+
+_RESERVE_SEAT = """
+SET NOCOUNT ON;
+SET XACT_ABORT ON;
+DECLARE @kullanici_id INT = ?, @masa_id INT = ?, @tarih DATE = ?, @baslangic TIME = ?, @bitis TIME = ?;
+DECLARE @sonuc NVARCHAR(30), @rezervasyon_id INT, @cakisan_baslangic TIME, @cakisan_bitis TIME;
+DECLARE @eklenen TABLE (masa_rezervasyon_id INT);
+
+BEGIN TRANSACTION;
+
+-- Kilit sırası: kullanıcı, sonra masa. Aynı masaya gelen eşzamanlı denemeler sıraya girer.
+IF NOT EXISTS (SELECT 1 FROM kullanici WITH (UPDLOCK, ROWLOCK) WHERE kullanici_id = @kullanici_id)
+   OR NOT EXISTS (SELECT 1 FROM masa WITH (UPDLOCK, ROWLOCK) WHERE masa_id = @masa_id)
+    SET @sonuc = N'bulunamadi';
+ELSE IF EXISTS (SELECT 1
+                FROM masa_rezervasyon
+                WHERE kullanici_id = @kullanici_id
+                  AND iptal_durumu = 0
+                  AND (durum IS NULL OR durum != 'Tamamlandı')
+                  AND (tarih > CONVERT(date, GETDATE())
+                    OR (tarih = CONVERT(date, GETDATE()) AND saat_bitis > CONVERT(time, GETDATE()))))
+    SET @sonuc = N'aktif_rezervasyon_var';
+ELSE
+BEGIN
+    -- [baslangic, bitis) aralıkları kesişiyorsa çakışma vardır (uç uca eklenen saatler serbest)
+    SELECT TOP (1) @cakisan_baslangic = saat_baslangic, @cakisan_bitis = saat_bitis
+    FROM masa_rezervasyon WITH (UPDLOCK, HOLDLOCK)
+    WHERE masa_id = @masa_id
+      AND tarih = @tarih
+      AND iptal_durumu = 0
+      AND (durum IS NULL OR durum != 'Tamamlandı')
+      AND saat_baslangic < @bitis
+      AND saat_bitis > @baslangic
+    ORDER BY saat_baslangic;
+
+    IF @cakisan_baslangic IS NOT NULL
+        SET @sonuc = N'cakisma';
+    ELSE
+    BEGIN
+        INSERT INTO masa_rezervasyon (kullanici_id, masa_id, tarih, saat_baslangic, saat_bitis, iptal_durumu)
+        OUTPUT INSERTED.masa_rezervasyon_id INTO @eklenen
+        VALUES (@kullanici_id, @masa_id, @tarih, @baslangic, @bitis, 0);
+
+        SELECT @rezervasyon_id = masa_rezervasyon_id FROM @eklenen;
+        SET @sonuc = N'ok';
+    END
+END
+
+COMMIT TRANSACTION;
+
+SELECT @sonuc, @rezervasyon_id, @cakisan_baslangic, @cakisan_bitis;
+"""
+
+
+def reserve_seat(kullanici_id, masa_id, tarih, baslangic, bitis):
+    """
+    Masayı verilen tarih ve saat aralığı için atomik olarak rezerve eder.
+    tarih: date veya 'YYYY-MM-DD'; baslangic / bitis: time veya 'HH:MM:SS'.
+
+    (SeatReservationResult, ek bilgi) döndürür: OK için yeni masa_rezervasyon_id,
+    CONFLICT için çakışan rezervasyonun (baslangic, bitis) saatleri, diğerleri için None.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_RESERVE_SEAT, (kullanici_id, masa_id, tarih, baslangic, bitis))
+        sonuc, rezervasyon_id, cakisan_baslangic, cakisan_bitis = cursor.fetchone()
+
+    result = SeatReservationResult(sonuc)
+    if result is SeatReservationResult.OK:
+        return result, rezervasyon_id
+    if result is SeatReservationResult.CONFLICT:
+        return result, (cakisan_baslangic, cakisan_bitis)
+    return result, None
@@ -0,0 +1,124 @@
+"""
+Yazarken arama (search-as-you-type) için ortak denetleyici.
+
+Arama kutusuna her tuş basışında sorgu çalıştırmak yerine kullanıcı SEARCH_QUIET_PERIOD_MS
+kadar yazmayı bıraktığında tek bir arama başlatılır. Yazmaya devam edildiğinde sürmekte olan
+arka plan sorgusu iptal edilir. NarrowingResults, yeni terim bir öncekini genişlettiğinde
+(ör. "dosto" → "dostoyevski") veritabanına gitmeden önceki sonuçları bellekte süzer.
+"""
+from background import get_executor
+from search_index import fold_turkish
+
+SEARCH_QUIET_PERIOD_MS = 300
+
+
+class DebouncedSearch:
+    """
+    Bir Entry'ye bağlanan gecikmeli arama denetleyicisi.
+    on_search(terim) yalnızca sessiz süre dolduğunda ve terim değiştiğinde çağrılır;
+    Enter tuşu veya search_now() aramayı beklemeden başlatır.
+    """
+
+    def __init__(self, entry, on_search, delay_ms=SEARCH_QUIET_PERIOD_MS, owner=None, cancel_key=None,
+                 min_length=0, on_too_short=None):
+        self.entry = entry
+        self.on_search = on_search
+        self.delay_ms = delay_ms
+        # Yeni tuş basışında iptal edilecek arka plan işi (run_in_background'a verilen widget ve anahtar)
+        self.owner = owner
+        self.cancel_key = cancel_key
+        self.min_length = min_length
+        self.on_too_short = on_too_short
+        self._after_id = None
+        self._last_term = None
+
+        entry.bind("<KeyRelease>", self._on_key_release, add="+")
+        entry.bind("<Return>", lambda event: self.search_now(), add="+")
+
+    @property
+    def term(self):
+        return self.entry.get().strip()
+
+    def _on_key_release(self, event=None):
+        if event is not None and event.keysym == "Return":
+            return
+        self.cancel()
+        term = self.term
+        if term == self._last_term:
+            return
+
+        # Kullanıcı hâlâ yazıyor: eski terimle başlamış sorgunun sonucu artık gereksiz
+        if self.owner is not None and self.cancel_key is not None:
+            get_executor().cancel(self.owner, self.cancel_key)
+            self._last_term = None
+
+        if 0 < len(term) < self.min_length:
+            if self.on_too_short:
+                self.on_too_short(term)
+            return
+        self._after_id = self.entry.after(self.delay_ms, self._fire)
+
+    def _fire(self):
+        self._after_id = None
+        term = self.term
+        if term == self._last_term:
+            return
+        self._last_term = term
+        self.on_search(term)
+
+    def search_now(self):
+        """Bekleyen gecikmeyi atlayıp aramayı hemen başlatır (terim değişmemiş olsa da)."""
+        self.cancel()
+        self._last_term = self.term
+        self.on_search(self._last_term)
+
+    def reset(self):
+        """Filtreler değiştiğinde aynı terimle yapılacak bir sonraki aramanın atlanmamasını sağlar."""
+        self._last_term = None
+
+    def cancel(self):
+        """Zamanlanmış aramayı iptal eder."""
+        if self._after_id is not None:
+            try:
+                self.entry.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+
+class NarrowingResults:
+    """
+    Son aramanın terimini, bağlamını (diğer filtreler) ve sonuçlarını saklar.
+    Yeni terim öncekini genişletiyorsa ve bağlam aynıysa select(sonuclar, terim) ile
+    sonuçlar bellekte daraltılır; select None döndürürse daraltma yapılamaz demektir.
+    """
+
+    def __init__(self, select):
+        self._select = select
+        self._term = None
+        self._context = None
+        self._results = None
+
+    def store(self, term, results, context=None):
+        self._term = fold_turkish(term)
+        self._context = context
+        self._results = results
+
+    def narrow(self, term, context=None):
+        """Daraltılmış sonuçları döndürür; önbellek kullanılamıyorsa None döner."""
+        if self._results is None or context != self._context:
+            return None
+        folded = fold_turkish(term)
+        if not self._term or folded == self._term or not folded.startswith(self._term):
+            return None
+        return self._select(self._results, folded)
+
+    def clear(self):
+        self._term = None
+        self._context = None
+        self._results = None
+
+
+def text_matches(folded_term, *values):
+    """Katlanmış terim verilen alanlardan herhangi birinde geçiyorsa True döner."""
+    return any(folded_term in fold_turkish(value) for value in values if value is not None)
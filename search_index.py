@@ -0,0 +1,247 @@
+"""
+Kitap kataloğu için bellek içi arama indeksi.
+
+Kitap adı, yazar, tür, yayınevi ve ISBN alanları Türkçe büyük/küçük harf kurallarına
+göre katlanır (İ→i, I→ı) ve kelime başı ikili + üçlü (trigram) parçalarına ayrılarak
+ters indekse yazılır. Arama, sorgunun parçalarını içeren kitapları kesişimle bulur,
+ardından alan ağırlıklarına ve eşleşmenin kelime başında olup olmadığına göre
+sıralanmış kitap_id listesi döndürür.
+
+İndeks süreç genelinde paylaşılır (bkz. get_search_index). İlk aramada veritabanından
+kurulur, INDEX_TTL_SECONDS dolduğunda yeniden kurulur ve yönetici panelindeki
+kaydet/sil işlemlerinden anında güncellenir.
+"""
+import re
+import threading
+import time
+
+from database import get_db_connection
+
+INDEX_TTL_SECONDS = 300
+MAX_RESULTS = 1000
+MIN_QUERY_LENGTH = 2  # Tek harflik sorgular neredeyse tüm kataloğu eşleştirir, filtre uygulanmaz
+
+# Eşleşmenin bulunduğu alana göre puan ağırlıkları
+FIELD_WEIGHTS = (
+    ("ad", 8),
+    ("yazar", 5),
+    ("tur", 3),
+    ("yayinevi", 2),
+    ("isbn", 2),
+)
+
+_WORD_RE = re.compile(r"\w+")
+_TURKISH_UPPER = str.maketrans({"İ": "i", "I": "ı"})
+
+
+def fold_turkish(text):
+    """Metni Türkçe kurallarına göre küçük harfe çevirir (İ→i, I→ı, Ş→ş, Ğ→ğ ...)."""
+    if not text:
+        return ""
+    return str(text).translate(_TURKISH_UPPER).lower()
+
+
+def _words(folded):
+    return _WORD_RE.findall(folded)
+
+
+def _word_grams(word):
+    """
+    Bir kelimenin indekse yazılan parçalarını üretir: kelime başı ikilisi (' k') ve
+    boşlukla çevrelenmiş kelimenin tüm üçlüleri.
+    """
+    padded = f" {word} "
+    grams = {padded[:2]}
+    grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _query_grams(word):
+    """
+    Sorgu kelimesinin indekste aranacak parçaları. Üç harf ve üzeri kelimeler için
+    iç üçlüler kullanılır (alt dize araması); daha kısa kelimeler kelime başında aranır.
+    """
+    if len(word) < 3:
+        return {f" {word}"}
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class BookSearchIndex:
+    """Thread-safe, ters indeksli kitap arama yapısı."""
+
+    def __init__(self, ttl=INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._docs = {}  # kitap_id -> (katlanmış alanlar, sıralama için ad)
+        self._doc_grams = {}  # kitap_id -> parça kümesi (silme için)
+        self._postings = {}  # parça -> kitap_id kümesi
+        self._built_at = None
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+
+    # --- Kurulum ve güncelleme ---
+
+    @staticmethod
+    def _make_doc(ad, yazarlar, turler, yayinevi, isbn):
+        fields = tuple(fold_turkish(value) for value in (ad, yazarlar, turler, yayinevi, isbn))
+        grams = set()
+        for field in fields:
+            for word in _words(field):
+                grams.update(_word_grams(word))
+        return fields, grams
+
+    def build(self, rows):
+        """(kitap_id, ad, yazarlar, turler, yayinevi, isbn) satırlarından indeksi baştan kurar."""
+        docs, doc_grams, postings = {}, {}, {}
+        for kitap_id, ad, yazarlar, turler, yayinevi, isbn in rows:
+            fields, grams = self._make_doc(ad, yazarlar, turler, yayinevi, isbn)
+            docs[kitap_id] = (fields, fields[0])
+            doc_grams[kitap_id] = grams
+            for gram in grams:
+                postings.setdefault(gram, set()).add(kitap_id)
+
+        with self._lock:
+            self._docs, self._doc_grams, self._postings = docs, doc_grams, postings
+            self._built_at = time.monotonic()
+
+    def upsert(self, kitap_id, ad, yazarlar, turler, yayinevi, isbn):
+        """Tek bir kitabı indekse ekler veya günceller."""
+        kitap_id = int(kitap_id)  # Treeview'dan gelen kimlikler metin olabilir
+        fields, grams = self._make_doc(ad, yazarlar, turler, yayinevi, isbn)
+        with self._lock:
+            self._remove_locked(kitap_id)
+            self._docs[kitap_id] = (fields, fields[0])
+            self._doc_grams[kitap_id] = grams
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(kitap_id)
+
+    def remove(self, kitap_id):
+        """Kitabı indeksten çıkarır."""
+        with self._lock:
+            self._remove_locked(int(kitap_id))
+
+    def _remove_locked(self, kitap_id):
+        self._docs.pop(kitap_id, None)
+        for gram in self._doc_grams.pop(kitap_id, ()):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(kitap_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def invalidate(self):
+        """Bir sonraki aramada indeksin veritabanından yeniden kurulmasını sağlar."""
+        with self._lock:
+            self._built_at = None
+
+    @property
+    def is_stale(self):
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at > self.ttl
+
+    def ensure_fresh(self):
+        """İndeks hiç kurulmadıysa veya süresi dolduysa veritabanından kurar (işçi thread'de çağrılmalı)."""
+        if not self.is_stale:
+            return
+        with self._build_lock:
+            if self.is_stale:
+                self.build(_load_catalog_rows())
+
+    # --- Arama ---
+
+    def search(self, query, limit=MAX_RESULTS):
+        """
+        Sorguyla eşleşen kitapların kitap_id listesini puana göre azalan sırada döndürür.
+        Sorgudaki her kelime kitabın en az bir alanında geçmelidir. Sorgu boşsa veya
+        MIN_QUERY_LENGTH'ten uzun kelime içermiyorsa None döner (arama filtresi yok).
+        limit=None tüm eşleşmeleri döndürür (sonuç başka filtrelerle süzülecekse gerekir).
+        """
+        words = _words(fold_turkish(query))
+        if not any(len(word) >= MIN_QUERY_LENGTH for word in words):
+            return None
+
+        query_grams = set()
+        for word in words:
+            query_grams.update(_query_grams(word))
+
+        with self._lock:
+            postings = [self._postings.get(gram) for gram in query_grams]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for ids in postings[1:]:
+                candidates &= ids
+                if not candidates:
+                    return []
+            docs = [(kitap_id, self._docs[kitap_id]) for kitap_id in candidates]
+
+        scored = []
+        for kitap_id, (fields, title) in docs:
+            score = self._score(words, fields)
+            if score:
+                scored.append((-score, title, kitap_id))
+        scored.sort()
+        return [kitap_id for _, _, kitap_id in scored[:limit]]
+
+    @staticmethod
+    def _score(words, fields):
+        """Her kelimenin en iyi eşleştiği alana göre puan verir; eşleşmeyen kelime varsa 0 döner."""
+        total = 0
+        for word in words:
+            best = 0
+            for (_, weight), field in zip(FIELD_WEIGHTS, fields):
+                if word not in field:
+                    continue
+                if field == word:
+                    points = weight * 4
+                elif field.startswith(word):
+                    points = weight * 3
+                elif f" {word}" in field:
+                    points = weight * 2
+                else:
+                    points = weight
+                best = max(best, points)
+            if not best:
+                return 0
+            total += best
+        return total
+
+
+def _load_catalog_rows():
+    """İndeks için gereken kitap alanlarını tek sorguda çeker."""
+    conn = get_db_connection()
+    if conn is None:
+        raise ConnectionError("Veritabanına bağlanılamadı.")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+                       SELECT k.kitap_id,
+                              k.ad,
+                              (SELECT STRING_AGG(y.ad, ', ')
+                               FROM kitap_yazar ky
+                                        JOIN yazar y ON y.yazar_id = ky.yazar_id
+                               WHERE ky.kitap_id = k.kitap_id) AS yazarlar,
+                              (SELECT STRING_AGG(t.ad, ', ')
+                               FROM kitap_tur kt
+                                        JOIN tur t ON t.tur_id = kt.tur_id
+                               WHERE kt.kitap_id = k.kitap_id) AS turler,
+                              k.yayinevi,
+                              k.isbn
+                       FROM kitap k
+                       """)
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Süreç genelinde paylaşılan kitap arama indeksini döndürür."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = BookSearchIndex()
+        return _index
@@ -0,0 +1,199 @@
+"""
+Oturma planı yerleşimleri.
+
+Katlar, arka plan resimleri ve sandalye koordinatları sürümlü bir yerleşim dosyasında
+(seat_layouts.json) tutulur. Arka planlar plan boyutuna bir kez ölçeklenip diskte saklanır
+(python seat_layout.py ile önceden hazırlanabilir); çözülmüş resimler süreç boyunca bellekte
+kalır, böylece pencereyi yeniden açmak veya kat değiştirmek resmi yeniden ölçeklemez.
+
+Sandalye dikdörtgenleri sabit boyutlu ızgara hücrelerine dağıtılır; bir noktadaki sandalye
+yalnızca o noktanın hücresindeki birkaç aday kontrol edilerek bulunur. Böylece fare hareketi ve
+tıklama, plandaki sandalye sayısından bağımsız olarak sabit sürede çözülür.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+from PIL import Image
+
+LAYOUT_PATH = os.getenv('SEAT_LAYOUT_PATH', 'seat_layouts.json')
+PLAN_CACHE_DIR = os.getenv('PLAN_CACHE_DIR', 'plan_onbellek')
+DEFAULT_CELL_SIZE = 64  # piksel
+
+_layouts = {}  # mutlak yol -> (mtime, (sürüm, [Floor]))
+_layout_lock = threading.Lock()
+
+
+class SeatSpatialIndex:
+    """{sandalye: {"x", "y", "w", "h"}} koordinatları üzerinde ızgara kovası indeksi."""
+
+    def __init__(self, coordinates, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._rects = {}
+        self._cells = {}  # (sütun, satır) -> [sandalye]
+        for seat_id, rect in coordinates.items():
+            self.add(seat_id, rect["x"], rect["y"], rect["w"], rect["h"])
+
+    def add(self, seat_id, x, y, w, h):
+        """Sandalyeyi kapladığı tüm hücrelere ekler."""
+        self._rects[seat_id] = (x, y, x + w, y + h)
+        for cell in self._cells_for(x, y, x + w, y + h):
+            self._cells.setdefault(cell, []).append(seat_id)
+
+    def _cells_for(self, x1, y1, x2, y2):
+        size = self.cell_size
+        for column in range(int(x1 // size), int(x2 // size) + 1):
+            for row in range(int(y1 // size), int(y2 // size) + 1):
+                yield column, row
+
+    def seat_at(self, x, y):
+        """(x, y) noktasını içeren sandalyeyi veya None döndürür."""
+        for seat_id in self._cells.get((int(x // self.cell_size), int(y // self.cell_size)), ()):
+            x1, y1, x2, y2 = self._rects[seat_id]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                return seat_id
+        return None
+
+    def __len__(self):
+        return len(self._rects)
+
+
+class Floor:
+    """Oturma planındaki bir kat: arka plan resmi, tuval boyutu ve sandalye koordinatları."""
+
+    def __init__(self, floor_id, name, background, width, height, seats):
+        self.floor_id = floor_id
+        self.name = name
+        self.background = background
+        self.width = width
+        self.height = height
+        self.seats = seats  # sandalye -> {"x", "y", "w", "h"}
+        self._index = None
+
+    @property
+    def index(self):
+        """Katın konumsal indeksi (ilk kullanımda kurulur)."""
+        if self._index is None:
+            self._index = SeatSpatialIndex(self.seats)
+        return self._index
+
+
+def load_layouts(path=LAYOUT_PATH):
+    """
+    Yerleşim dosyasını okur ve (sürüm, [Floor]) döndürür. Dosya değişmedikçe (mtime) önceki
+    sonuç yeniden kullanılır.
+    """
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    with _layout_lock:
+        cached = _layouts.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        base = os.path.dirname(path)
+        floors = [Floor(kat["kimlik"], kat["ad"], os.path.join(base, kat["arka_plan"]),
+                        kat["genislik"], kat["yukseklik"], kat["sandalyeler"])
+                  for kat in data["katlar"]]
+        seen = set()
+        for floor in floors:
+            duplicates = seen.intersection(floor.seats)
+            if duplicates:
+                raise ValueError(f"Sandalye kimlikleri katlar arasında tekrar ediyor: {sorted(duplicates)}")
+            seen.update(floor.seats)
+
+        result = (data.get("surum", 1), floors)
+        _layouts[path] = (mtime, result)
+        return result
+
+
+class BackgroundImageCache:
+    """
+    Kat arka planlarını istenen çözünürlükte önceden ölçeklenmiş olarak sunar (thread-safe).
+    Ölçeklenmiş resimler diskte <dizin>/<ad>_<G>x<Y>_<anahtar>.png olarak saklanır; anahtar kaynak
+    dosyanın yolu, boyutu ve değişiklik zamanından türetilir, böylece resim değişince eski kopya
+    kullanılmaz. Çözülmüş resimler süreç boyunca bellekte tutulur.
+    """
+
+    def __init__(self, cache_dir=PLAN_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._images = {}  # (kaynak, boyut) -> PIL.Image
+        self._lock = threading.Lock()
+
+    def get(self, source, size):
+        """Kaynak resmin size=(genişlik, yükseklik) boyutuna ölçeklenmiş halini döndürür."""
+        key = (source, tuple(size))
+        with self._lock:
+            image = self._images.get(key)
+        if image is not None:
+            return image
+
+        cached_path = self._cached_path(source, size)
+        if os.path.exists(cached_path):
+            image = Image.open(cached_path)
+            image.load()
+        else:
+            image = self._render(source, size, cached_path)
+
+        with self._lock:
+            return self._images.setdefault(key, image)
+
+    def _cached_path(self, source, size):
+        stat = os.stat(source)
+        digest = hashlib.sha256(f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()
+        stem = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.cache_dir, f"{stem}_{size[0]}x{size[1]}_{digest[:12]}.png")
+
+    def _render(self, source, size, cached_path):
+        with Image.open(source) as original:
+            image = original.convert("RGBA").resize(tuple(size), Image.Resampling.LANCZOS)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Aynı dosyayı yazan başka bir süreç yarım dosya görmesin diye geçici dosya ile yazılır
+            temp_path = f"{cached_path}.{os.getpid()}.tmp"
+            image.save(temp_path, format="PNG", compress_level=1)
+            os.replace(temp_path, cached_path)
+        except OSError as e:
+            print(f"Ölçeklenmiş plan resmi kaydedilemedi: {e}")
+        return image
+
+
+_background_cache = None
+_background_cache_lock = threading.Lock()
+
+
+def get_background_cache():
+    """Süreç genelinde paylaşılan arka plan resmi önbelleğini döndürür."""
+    global _background_cache
+    with _background_cache_lock:
+        if _background_cache is None:
+            _background_cache = BackgroundImageCache()
+        return _background_cache
+
+
+def prerender_backgrounds(path=LAYOUT_PATH):
+    """Tüm katların arka planlarını plan boyutunda ölçekleyip disk önbelleğine yazar."""
+    version, floors = load_layouts(path)
+    cache = get_background_cache()
+    for floor in floors:
+        started = time.perf_counter()
+        cache.get(floor.background, (floor.width, floor.height))
+        print(f"{floor.name}: {floor.width}x{floor.height} hazır ({time.perf_counter() - started:.2f} sn)")
+    return version, floors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Oturma planı yerleşimlerini doğrular ve arka planları önceden ölçekler")
+    parser.add_argument("--layout", default=LAYOUT_PATH, help="Yerleşim dosyası")
+    args = parser.parse_args(argv)
+
+    version, floors = prerender_backgrounds(args.layout)
+    print(f"Yerleşim sürümü {version}: {len(floors)} kat, {sum(len(f.seats) for f in floors)} sandalye")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Masa doluluk modeli.
+
+Her masa ve gün için aktif rezervasyonlar başlangıç saatine göre sıralı, birleştirilmiş
+aralıklar olarak tutulur (dakika cinsinden, [başlangıç, bitiş)). Bir saat aralığının boş olup
+olmadığı bisect ile O(log n) sürede bulunur; böylece yarın 09:00'daki bir rezervasyon masayı
+bugün dolu göstermez.
+
+Rezervasyon penceresinin tamamı (bugün ve sonraki BOOKING_DAYS - 1 gün) tek bir aralık
+sorgusuyla yüklenir. Sonraki yenilemeler masa_rezervasyon.surum (rowversion) sütunu üzerinden
+yalnızca son belirteçten (token) bu yana değişen satırları okur; silinen satırlar
+masa_rezervasyon_silinen tablosundan gelir (bkz. migrations/002_masa_rezervasyon_degisiklik.sql).
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+
+BOOKING_DAYS = 7  # DateSelectionPopup'ta sunulan gün sayısı
+OPENING_HOUR = 9
+CLOSING_HOUR = 20  # Son rezervasyon bu saatte biter
+
+_ACTIVE = "mr.iptal_durumu = 0 AND (mr.durum IS NULL OR mr.durum != 'Tamamlandı')"
+
+
+def to_minutes(value):
+    """Dakika, time, 'HH:MM' veya 'HH:MM:SS' değerini gece yarısından itibaren dakikaya çevirir."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, (time, datetime)):
+        return value.hour * 60 + value.minute
+    hours, minutes = str(value).split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes):
+    """Dakikayı 'HH:MM' metnine çevirir."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def booking_dates(today=None):
+    """Rezervasyon yapılabilecek günleri döndürür."""
+    today = today or date.today()
+    return [today + timedelta(days=i) for i in range(BOOKING_DAYS)]
+
+
+class SeatOccupancy:
+    """Masa bazında sıralı doluluk aralıkları. Yalnızca Tk thread'inde değiştirilmelidir."""
+
+    def __init__(self, window_start=None, token=0):
+        self.window_start = window_start or date.today()
+        self.token = token  # Bu görünüme yansıtılmış son rowversion
+        self._busy = {}  # (masa numarası, tarih) -> ([başlangıçlar], [bitişler]), çakışmasız ve sıralı
+        self._reservations = {}  # rezervasyon_id -> (masa, tarih, başlangıç, bitiş, kullanici_id, kullanıcı adı)
+        self._by_seat = {}  # masa numarası -> {rezervasyon_id}
+
+    def add(self, reservation_id, seat_id, day, start, end, kullanici_id=None, reserved_by=None):
+        """Rezervasyonu ekler (varsa eski halinin yerine); çakışan veya bitişik aralıklar birleştirilir."""
+        self.remove(reservation_id)
+        start, end = to_minutes(start), to_minutes(end)
+        if end <= start:
+            return
+        self._reservations[reservation_id] = (seat_id, day, start, end, kullanici_id, reserved_by)
+        self._by_seat.setdefault(seat_id, set()).add(reservation_id)
+        self._insert_interval(seat_id, day, start, end)
+
+    def _insert_interval(self, seat_id, day, start, end):
+        starts, ends = self._busy.setdefault((seat_id, day), ([], []))
+        # Yeni aralıkla kesişen veya ona bitişik aralıkların dilimi [lo, hi)
+        lo = bisect_left(ends, start)
+        hi = bisect_right(starts, end)
+        if lo < hi:
+            start = min(start, starts[lo])
+            end = max(end, ends[hi - 1])
+        starts[lo:hi] = [start]
+        ends[lo:hi] = [end]
+
+    def remove(self, reservation_id):
+        """Rezervasyonu çıkarır ve etkilenen masayı (yoksa None) döndürür."""
+        reservation = self._reservations.pop(reservation_id, None)
+        if reservation is None:
+            return None
+        seat_id, day = reservation[:2]
+        self._by_seat[seat_id].discard(reservation_id)
+        # Birleştirilmiş aralıklar bölünemediği için o günün aralıkları yeniden kurulur
+        self._busy.pop((seat_id, day), None)
+        for other_id in self._by_seat[seat_id]:
+            _, other_day, start, end, _, _ = self._reservations[other_id]
+            if other_day == day:
+                self._insert_interval(seat_id, day, start, end)
+        return seat_id
+
+    def apply_changes(self, rows, token):
+        """
+        fetch_changes() satırlarını uygular ve rengi değişebilecek masaları küme olarak döndürür.
+        Satır: (rezervasyon_id, masa, tarih, başlangıç, bitiş, kullanici_id, kullanıcı adı, aktif)
+        """
+        affected = set()
+        if token <= self.token:
+            # Daha yeni bir okuma zaten uygulanmış; eski satırlar onu geri almamalı
+            return affected
+        window = booking_dates(self.window_start)
+        for reservation_id, seat_id, day, start, end, kullanici_id, reserved_by, active in rows:
+            removed = self.remove(reservation_id)
+            if removed is not None:
+                affected.add(removed)
+            if active and window[0] <= day <= window[-1]:
+                self.add(reservation_id, seat_id, day, start, end, kullanici_id, reserved_by)
+                affected.add(seat_id)
+        self.token = token
+        return affected
+
+    def is_free(self, seat_id, day, start, end):
+        """Masa [start, end) aralığında boşsa True döner."""
+        start, end = to_minutes(start), to_minutes(end)
+        intervals = self._busy.get((seat_id, day))
+        if not intervals:
+            return True
+        starts, ends = intervals
+        # Bitişten önce başlayan son aralık, start'tan sonra bitiyorsa çakışır
+        index = bisect_left(starts, end)
+        return index == 0 or ends[index - 1] <= start
+
+    def busy_intervals(self, seat_id, day):
+        """Günün dolu aralıklarını [(başlangıç, bitiş)] dakika olarak döndürür."""
+        starts, ends = self._busy.get((seat_id, day), ([], []))
+        return list(zip(starts, ends))
+
+    def reservation_at(self, seat_id, moment):
+        """Verilen anda masayı tutan rezervasyonu (tarih, başlangıç, bitiş, kullanıcı adı) veya None döndürür."""
+        minute = to_minutes(moment)
+        for reservation_id in self._by_seat.get(seat_id, ()):
+            _, day, start, end, _, reserved_by = self._reservations[reservation_id]
+            if day == moment.date() and start <= minute < end:
+                return day, start, end, reserved_by
+        return None
+
+    def active_seat_for(self, kullanici_id, now=None):
+        """Kullanıcının henüz bitmemiş rezervasyonunun masasını (yoksa None) döndürür."""
+        now = now or datetime.now()
+        minute = to_minutes(now)
+        for seat_id, day, _, end, owner, _ in self._reservations.values():
+            if owner == kullanici_id and (day > now.date() or (day == now.date() and end > minute)):
+                return seat_id
+        return None
+
+    def free_start_hours(self, seat_id, day, now=None):
+        """Başlangıç olarak seçilebilecek boş saatleri ('HH:00') döndürür."""
+        now = now or datetime.now()
+        options = []
+        for hour in range(OPENING_HOUR, CLOSING_HOUR):
+            if day == now.date() and time(hour) <= now.time():
+                continue
+            if self.is_free(seat_id, day, hour * 60, (hour + 1) * 60):
+                options.append(f"{hour:02d}:00")
+        return options
+
+    def free_end_hours(self, seat_id, day, start):
+        """Başlangıçtan itibaren kesintisiz boş kalan bitiş saatlerini döndürür."""
+        start_hour = to_minutes(start) // 60
+        options = []
+        for hour in range(start_hour + 1, CLOSING_HOUR + 1):
+            if not self.is_free(seat_id, day, (hour - 1) * 60, hour * 60):
+                break
+            options.append(f"{hour:02d}:00")
+        return options
+
+
+def _change_token(cursor):
+    """
+    Güvenli okuma sınırı: henüz commit edilmemiş işlemlerin rowversion'larından küçük olan
+    en büyük değer. Bu sınıra kadar okunan değişiklikler sonradan araya satır almaz.
+    """
+    cursor.execute("SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT) - 1")
+    return cursor.fetchone()[0]
+
+
+def load_occupancy(cursor, today=None):
+    """Rezervasyon penceresindeki aktif masa rezervasyonlarını tek sorguda yükler."""
+    days = booking_dates(today)
+    # Belirteç sorgudan önce alınır; arada commit edilen satırlar sonraki değişiklik okumasında yeniden gelir
+    token = _change_token(cursor)
+    cursor.execute(f"""
+                   SELECT mr.masa_rezervasyon_id, m.numara, mr.tarih, mr.saat_baslangic, mr.saat_bitis,
+                          mr.kullanici_id, k.isim
+                   FROM masa_rezervasyon mr
+                            JOIN masa m ON mr.masa_id = m.masa_id
+                            JOIN kullanici k ON mr.kullanici_id = k.kullanici_id
+                   WHERE mr.tarih BETWEEN ? AND ?
+                     AND {_ACTIVE}
+                   """, (days[0], days[-1]))
+    occupancy = SeatOccupancy(window_start=days[0], token=token)
+    for row in cursor.fetchall():
+        occupancy.add(*row)
+    return occupancy
+
+
+def fetch_changes(cursor, since):
+    """
+    'since' belirtecinden sonra değişen veya silinen rezervasyonları okur.
+    (satırlar, yeni belirteç) döndürür; satırlar SeatOccupancy.apply_changes() biçimindedir.
+    """
+    token = _change_token(cursor)
+    if token <= since:
+        return [], since
+    cursor.execute(f"""
+                   SELECT mr.masa_rezervasyon_id, m.numara, mr.tarih, mr.saat_baslangic, mr.saat_bitis,
+                          mr.kullanici_id, k.isim,
+                          CASE WHEN {_ACTIVE} THEN 1 ELSE 0 END
+                   FROM masa_rezervasyon mr
+                            JOIN masa m ON mr.masa_id = m.masa_id
+                            JOIN kullanici k ON mr.kullanici_id = k.kullanici_id
+                   WHERE mr.surum > CAST(CAST(? AS BIGINT) AS BINARY(8))
+                     AND mr.surum <= CAST(CAST(? AS BIGINT) AS BINARY(8))
+                   UNION ALL
+                   SELECT s.masa_rezervasyon_id, NULL, NULL, NULL, NULL, NULL, NULL, 0
+                   FROM masa_rezervasyon_silinen s
+                   WHERE s.surum > CAST(CAST(? AS BIGINT) AS BINARY(8))
+                     AND s.surum <= CAST(CAST(? AS BIGINT) AS BINARY(8))
+                   """, (since, token, since, token))
+    return cursor.fetchall(), token
@@ -0,0 +1,159 @@
+"""
+Oturma planı sandalye çizimi.
+
+İki çizim yolu aynı arayüzü sunar (show_floor / set_seat / flush):
+
+* OverlaySeatPainter: Sandalye durumları Pillow ile arka plan resminin üzerine tek bir görüntü
+  olarak birleştirilir. Her durum (dolgu, kenarlık) için sandalye resmi bir kez çizilip önbelleğe
+  alınır; bir sandalyenin durumu değiştiğinde yalnızca o sandalyenin dikdörtgeni yeniden
+  birleştirilir ve Tk görüntüsüne "put -to" ile yazılır. Tuvalde tek bir öğe olduğundan yenileme
+  sırasında titreme olmaz.
+* PolygonSeatPainter: Her sandalye ayrı bir tuval poligonudur (eski yol). SEAT_RENDER_MODE=polygon
+  ile seçilir.
+"""
+import os
+import tkinter as tk
+
+from PIL import Image, ImageDraw, ImageTk
+
+SEAT_RENDER_MODE = os.getenv('SEAT_RENDER_MODE', 'overlay')  # overlay | polygon
+SEAT_RADIUS = 4
+
+
+def _ppm(image):
+    """RGB resmi Tk'nın doğrudan okuyabileceği ikili PPM verisine çevirir."""
+    return f"P6 {image.width} {image.height} 255\n".encode() + image.tobytes()
+
+
+class OverlaySeatPainter:
+    """Sandalyeleri arka plan üzerine birleştirilmiş tek bir görüntü olarak çizer."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.item = canvas.create_image(0, 0, anchor="nw")
+        self._surfaces = {}  # kat kimliği -> _FloorSurface
+        self._surface = None
+        self._sprites = {}  # (w, h, dolgu, kenarlık, kalınlık) -> RGBA resim
+
+    def show_floor(self, floor, background):
+        """Katın yüzeyini gösterir; daha önce açılmış katların birleşik görüntüsü yeniden kullanılır."""
+        surface = self._surfaces.get(floor.floor_id)
+        if surface is None:
+            surface = self._surfaces[floor.floor_id] = _FloorSurface(floor, background)
+        self._surface = surface
+        self.canvas.itemconfig(self.item, image=surface.photo)
+
+    def set_seat(self, seat_id, fill, outline=None, width=0):
+        """Sandalyenin durumunu ayarlar; değişiklik flush() ile ekrana yazılır."""
+        surface = self._surface
+        state = (fill, outline, width)
+        if surface.states.get(seat_id, (None, None, 0)) != state:
+            surface.states[seat_id] = state
+            surface.dirty.add(seat_id)
+
+    def flush(self):
+        """Durumu değişen sandalyelerin bölgelerini yeniden birleştirip görüntüye yazar."""
+        surface = self._surface
+        if surface is None or not surface.dirty:
+            return
+        for seat_id in surface.dirty:
+            rect = surface.floor.seats[seat_id]
+            x, y, w, h = rect["x"], rect["y"], rect["w"], rect["h"]
+            region = surface.background.crop((x, y, x + w, y + h))
+            fill, outline, width = surface.states[seat_id]
+            if fill is not None or outline is not None:
+                sprite = self._sprite(w, h, fill, outline, width)
+                region.paste(sprite, (0, 0), sprite)
+            surface.composite.paste(region, (x, y))
+            surface.blit(region, x, y)
+        surface.dirty.clear()
+
+    def _sprite(self, w, h, fill, outline, width):
+        key = (w, h, fill, outline, width)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+            ImageDraw.Draw(sprite).rounded_rectangle((0, 0, w - 1, h - 1), radius=min(SEAT_RADIUS, w // 2, h // 2),
+                                                      fill=fill, outline=outline, width=width)
+            self._sprites[key] = sprite
+        return sprite
+
+
+class _FloorSurface:
+    """Bir katın arka planı, birleşik görüntüsü, Tk görüntüsü ve sandalye durumları."""
+
+    def __init__(self, floor, background):
+        self.floor = floor
+        self.background = background.convert("RGB")
+        self.composite = self.background.copy()
+        self.photo = ImageTk.PhotoImage(self.composite)
+        self.states = {}
+        self.dirty = set()
+        self._partial = True
+
+    def blit(self, region, x, y):
+        """Bölgeyi Tk görüntüsüne yazar; Tk ikili PPM kabul etmezse görüntünün tamamı yenilenir."""
+        if self._partial:
+            try:
+                self.photo.tk.call(str(self.photo), "put", _ppm(region), "-format", "ppm", "-to", x, y)
+                return
+            except tk.TclError as e:
+                print(f"Kısmi görüntü güncellemesi desteklenmiyor, tam güncellemeye geçiliyor: {e}")
+                self._partial = False
+        self.photo.paste(self.composite)
+
+
+class PolygonSeatPainter:
+    """Her sandalyeyi ayrı bir tuval poligonu olarak çizer."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.item = canvas.create_image(0, 0, anchor="nw")
+        self._photos = {}  # kat kimliği -> PhotoImage
+        self._drawing_ids = {}
+        self._states = {}
+
+    def show_floor(self, floor, background):
+        photo = self._photos.get(floor.floor_id)
+        if photo is None:
+            photo = self._photos[floor.floor_id] = ImageTk.PhotoImage(background)
+        self.canvas.itemconfig(self.item, image=photo)
+
+        self.canvas.delete("sandalye")
+        self._drawing_ids = {}
+        self._states = {}
+        for seat_id, rect in floor.seats.items():
+            self._drawing_ids[seat_id] = self._add_rounded_seat_area(seat_id, rect["x"], rect["y"], rect["w"],
+                                                                     rect["h"], radius=SEAT_RADIUS)
+
+    def _add_rounded_seat_area(self, seat_id, x, y, w, h, radius=5):
+        """Yuvarlak köşeli dikdörtgen şeklinde bir sandalye alanı çizer."""
+        radius = min(radius, w // 2, h // 2)
+        points = [
+            x + radius, y,
+            x + w - radius, y,
+            x + w, y + radius,
+            x + w, y + h - radius,
+            x + w - radius, y + h,
+            x + radius, y + h,
+            x, y + h - radius,
+            x, y + radius
+        ]
+        return self.canvas.create_polygon(points, outline="", fill=self.canvas["bg"], tags=(seat_id, "sandalye"))
+
+    def set_seat(self, seat_id, fill, outline=None, width=0):
+        state = (fill, outline, width)
+        if self._states.get(seat_id) != state:
+            self._states[seat_id] = state
+            self.canvas.itemconfig(self._drawing_ids[seat_id], fill=fill or self.canvas["bg"],
+                                   outline=outline or "", width=width)
+
+    def flush(self):
+        pass
+
+
+def create_seat_painter(canvas, mode=SEAT_RENDER_MODE):
+    """Yapılandırılan çizim yolunu döndürür."""
+    if mode == "polygon":
+        return PolygonSeatPainter(canvas)
+    return OverlaySeatPainter(canvas)
@@ -0,0 +1,66 @@
+"""
+Oturum açmış kullanıcının bilgileri.
+
+Kullanıcının kimliği, rolü, adı ve ceza durumu tek bir UserSession nesnesinde tutulur ve tüm
+pencerelere bu nesne verilir; pencereler kullanıcıyı adıyla yeniden sorgulamaz (ad değişebilir,
+kimlik değişmez). Bilgiler auth_service'in tek sorgusuyla doldurulur ve yenilenir. Kullanıcı
+adı değiştiğinde oturum geçersiz (stale) işaretlenir; ana pencere bir sonraki dönüşte oturumu
+veritabanından yeniler.
+
+Oturum yalnızca Tk thread'inde değiştirilmelidir; fetch() işçi thread'de çalıştırılabilir.
+"""
+from auth_service import load_user_status
+
+PENALTY_LIMIT = 10  # Bu puanın üzerindeki kullanıcılar rezervasyon yapamaz
+
+
+class UserSession:
+    """Giriş yapan kullanıcının oturum boyunca paylaşılan bilgileri."""
+
+    def __init__(self):
+        self.kullanici_id = None
+        self.isim = None
+        self.rol = None
+        self.ceza_puani = 0
+        self.stale = False  # True ise bilgiler veritabanından yenilenmeli
+
+    @property
+    def is_authenticated(self):
+        return self.kullanici_id is not None
+
+    @property
+    def is_admin(self):
+        return self.rol == 'admin'
+
+    @property
+    def can_reserve(self):
+        return self.ceza_puani <= PENALTY_LIMIT
+
+    def start(self, user):
+        """auth_service.AuthenticatedUser bilgilerini oturuma yazar."""
+        self.kullanici_id = user.kullanici_id
+        self.isim = user.isim
+        self.rol = user.rol
+        self.ceza_puani = user.ceza_puani
+        self.stale = False
+
+    def restore(self, kullanici_id, isim, rol):
+        """Hatırlanan girişten oturumu başlatır; ceza durumu henüz bilinmediği için oturum stale kalır."""
+        self.kullanici_id = kullanici_id
+        self.isim = isim
+        self.rol = rol
+        self.ceza_puani = 0
+        self.stale = True
+
+    def fetch(self):
+        """Kullanıcıyı tek sorguyla yeniden yükler (bloklayan çağrı); oturumu değiştirmez, sonucu start()'a verin."""
+        return load_user_status(self.kullanici_id)
+
+    def rename(self, isim):
+        """Veritabanında değiştirilen kullanıcı adını yansıtır ve oturumu geçersiz kılar."""
+        self.isim = isim
+        self.stale = True
+
+    def clear(self):
+        """Çıkışta oturumu boşaltır."""
+        self.__init__()
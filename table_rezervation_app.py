@@ -1,11 +1,19 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
-import os
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 import pyodbc
 from database import get_db_connection
+from background import run_in_background, get_executor
+from penalty_sweeper import fetch_penalty_notices, mark_notices_shown, save_notices_seen
+from reservations import reserve_seat, SeatReservationResult
+from seat_layout import load_layouts, get_background_cache
+from seat_overlay import create_seat_painter
+from seat_occupancy import SeatOccupancy, load_occupancy, fetch_changes, booking_dates, format_minutes
+
+# Rezervasyon değişikliklerinin yoklanma aralığı (ms); yalnızca değişen satırlar okunur
+CHANGE_POLL_MS = 5000
+
 class DateSelectionPopup(ctk.CTkToplevel):
     """Kullanıcının rezervasyon için bir tarih seçmesi için açılan pencere."""
 
@@ -22,9 +30,7 @@ class DateSelectionPopup(ctk.CTkToplevel):
         ctk.CTkLabel(self, text="Rezervasyon Tarihini Seçin").pack(pady=10)
 
         # Bugün ve sonraki 6 gün için tarih seçenekleri oluştur
-        today = date.today()
-        dates = [today + timedelta(days=i) for i in range(7)]
-        date_options = [d.strftime("%d/%m/%Y") for d in dates]
+        date_options = [d.strftime("%d/%m/%Y") for d in booking_dates()]
 
         self.date_combobox = ctk.CTkComboBox(self, values=date_options)
         self.date_combobox.set(date_options[0])
@@ -52,26 +58,31 @@ class DateSelectionPopup(ctk.CTkToplevel):
 class TimeSelectionPopup(ctk.CTkToplevel):
     """Kullanıcının başlangıç ve bitiş saatlerini seçmesi için açılan pencere."""
 
-    def __init__(self, parent, seat_id, masa_adi, selected_date, on_confirm):
+    def __init__(self, parent, seat_id, masa_adi, selected_date, on_confirm, occupancy=None):
         super().__init__(parent)
         self.title("Saat Seçimi")
-        self.geometry("300x200")
+        self.geometry("300x230")
         self.seat_id = seat_id
         self.selected_date = selected_date
+        self.selected_day = datetime.strptime(selected_date, "%d/%m/%Y").date()
+        self.occupancy = occupancy or SeatOccupancy()
         self.on_confirm = on_confirm
         self.parent = parent
 
         self.grab_set()
         self.transient(parent)
 
-        ctk.CTkLabel(self, text=f"'{masa_adi}' için saat seçin\nTarih: {self.selected_date}").pack(pady=10)
+        busy = self.occupancy.busy_intervals(seat_id, self.selected_day)
+        busy_text = ", ".join(f"{format_minutes(s)}-{format_minutes(e)}" for s, e in busy) or "Yok"
+        ctk.CTkLabel(self, text=f"'{masa_adi}' için saat seçin\nTarih: {self.selected_date}\n"
+                                f"Dolu saatler: {busy_text}").pack(pady=10)
 
         time_options = self.generate_time_options()
-        self.start_time = ctk.CTkComboBox(self, values=time_options)
-        self.start_time.set("Başlangıç")
+        self.start_time = ctk.CTkComboBox(self, values=time_options, command=self._on_start_selected)
+        self.start_time.set("Başlangıç" if time_options else "Boş saat yok")
         self.start_time.pack(pady=5)
 
-        self.end_time = ctk.CTkComboBox(self, values=time_options)
+        self.end_time = ctk.CTkComboBox(self, values=[])
         self.end_time.set("Bitiş")
         self.end_time.pack(pady=5)
 
@@ -87,15 +98,20 @@ class TimeSelectionPopup(ctk.CTkToplevel):
         self.destroy()
 
     def generate_time_options(self):
-        """Saat seçeneklerini 09:00'dan 20:00'a kadar oluşturur."""
-        return [f"{h:02d}:00" for h in range(9, 21)]
+        """Seçilen gün için masanın boş olduğu başlangıç saatlerini (09:00 - 19:00) oluşturur."""
+        return self.occupancy.free_start_hours(self.seat_id, self.selected_day)
+
+    def _on_start_selected(self, start):
+        """Bitiş seçeneklerini, başlangıçtan sonraki ilk dolu saate kadar sınırlar."""
+        self.end_time.configure(values=self.occupancy.free_end_hours(self.seat_id, self.selected_day, start))
+        self.end_time.set("Bitiş")
 
     def confirm(self):
         """Seçilen saatleri kontrol eder ve ana fonksiyona iletir."""
         start = self.start_time.get()
         end = self.end_time.get()
 
-        if start == "Başlangıç" or end == "Bitiş":
+        if start in ("Başlangıç", "Boş saat yok") or end == "Bitiş":
             messagebox.showerror("Hata", "Lütfen başlangıç ve bitiş saatlerini seçin.")
             return
 
@@ -116,6 +132,10 @@ class TimeSelectionPopup(ctk.CTkToplevel):
                 messagebox.showerror("Hata", "Geçmiş bir saat için rezervasyon yapamazsınız.")
                 return
 
+            if not self.occupancy.is_free(self.seat_id, selected_date_dt, start_dt, end_dt):
+                messagebox.showerror("Hata", "Seçilen saat aralığında masa dolu.")
+                return
+
         except ValueError:
             messagebox.showerror("Hata", "Geçersiz saat veya tarih formatı.")
             return
@@ -126,134 +146,57 @@ class TimeSelectionPopup(ctk.CTkToplevel):
         self.destroy()
 
 class TableReservationApp(ctk.CTkFrame):
-    def __init__(self, master, current_user, on_return_to_main=None):
+    def __init__(self, master, session, on_return_to_main=None):
         super().__init__(master)
         self.pack(fill="both", expand=True)
 
-        self.current_user = current_user
+        self.session = session  # session.UserSession; kullanıcı adıyla yeniden sorgulanmaz
+        self.current_user = session.isim
+        self.kullanici_id = session.kullanici_id
         self.on_return_to_main = on_return_to_main
-        self.seat_drawing_ids = {}
+        self.painter = None  # Sandalye çizim yolu (seat_overlay)
+        self.floors = []  # seat_layouts.json'daki katlar
+        self.current_floor = None
+        self._hovered_seat_id = None
+        self._selected_seat_id = None
         self.after_id = None  # Zamanlayıcı ID'si için
+        self.change_after_id = None  # Değişiklik yoklama zamanlayıcısı
 
-        self.seat_coordinates = {
-            "sesli_oda_1_sandalye_1": {"x": 135, "y": 100, "w": 30, "h": 30},
-            "sesli_oda_1_sandalye_2": {"x": 85, "y": 60, "w": 30, "h": 30},
-            "sesli_oda_1_sandalye_3": {"x": 30, "y": 100, "w": 30, "h": 30},
-            "sesli_oda_1_sandalye_4": {"x": 85, "y": 145, "w": 30, "h": 30},
-            "sesli_oda_2_sandalye_1": {"x": 135, "y": 270, "w": 30, "h": 30},
-            "sesli_oda_2_sandalye_2": {"x": 85, "y": 230, "w": 30, "h": 30},
-            "sesli_oda_2_sandalye_3": {"x": 30, "y": 270, "w": 30, "h": 30},
-            "sesli_oda_2_sandalye_4": {"x": 85, "y": 315, "w": 30, "h": 30},
-            "sesli_oda_3_sandalye_1": {"x": 135, "y": 440, "w": 30, "h": 30},
-            "sesli_oda_3_sandalye_2": {"x": 85, "y": 400, "w": 30, "h": 30},
-            "sesli_oda_3_sandalye_3": {"x": 30, "y": 440, "w": 30, "h": 30},
-            "sesli_oda_3_sandalye_4": {"x": 85, "y": 485, "w": 30, "h": 30},
-            "sesli_oda_4_sandalye_1": {"x": 135, "y": 610, "w": 30, "h": 30},
-            "sesli_oda_4_sandalye_2": {"x": 85, "y": 570, "w": 30, "h": 22},
-            "sesli_oda_4_sandalye_3": {"x": 30, "y": 610, "w": 30, "h": 30},
-            "sesli_oda_4_sandalye_4": {"x": 85, "y": 655, "w": 30, "h": 30},
-            "masa_1_sandalye_1": {"x": 330, "y": 95, "w": 30, "h": 30},
-            "masa_1_sandalye_2": {"x": 400, "y": 95, "w": 30, "h": 30},
-            "masa_1_sandalye_3": {"x": 470, "y": 95, "w": 30, "h": 30},
-            "masa_1_sandalye_4": {"x": 540, "y": 95, "w": 30, "h": 30},
-            "masa_1_sandalye_5": {"x": 610, "y": 95, "w": 30, "h": 30},
-            "masa_1_sandalye_6": {"x": 680, "y": 95, "w": 30, "h": 30},
-            "masa_1_sandalye_7": {"x": 750, "y": 95, "w": 30, "h": 30},
-            "masa_1_sandalye_8": {"x": 750, "y": 175, "w": 30, "h": 30},
-            "masa_1_sandalye_9": {"x": 330, "y": 175, "w": 30, "h": 30},
-            "masa_1_sandalye_10": {"x": 400, "y": 175, "w": 30, "h": 30},
-            "masa_1_sandalye_11": {"x": 470, "y": 175, "w": 30, "h": 30},
-            "masa_1_sandalye_12": {"x": 540, "y": 175, "w": 30, "h": 30},
-            "masa_1_sandalye_13": {"x": 610, "y": 175, "w": 30, "h": 30},
-            "masa_1_sandalye_14": {"x": 680, "y": 175, "w": 30, "h": 30},
-            "masa_1_sandalye_15": {"x": 750, "y": 175, "w": 30, "h": 30},
-            "masa_2_sandalye_1": {"x": 330, "y": 250, "w": 30, "h": 30},
-            "masa_2_sandalye_2": {"x": 400, "y": 250, "w": 30, "h": 30},
-            "masa_2_sandalye_3": {"x": 470, "y": 250, "w": 30, "h": 30},
-            "masa_2_sandalye_4": {"x": 540, "y": 250, "w": 30, "h": 30},
-            "masa_2_sandalye_5": {"x": 610, "y": 250, "w": 30, "h": 30},
-            "masa_2_sandalye_6": {"x": 680, "y": 250, "w": 30, "h": 30},
-            "masa_2_sandalye_7": {"x": 750, "y": 250, "w": 30, "h": 30},
-            "masa_2_sandalye_8": {"x": 750, "y": 330, "w": 30, "h": 30},
-            "masa_2_sandalye_9": {"x": 330, "y": 330, "w": 30, "h": 30},
-            "masa_2_sandalye_10": {"x": 400, "y": 330, "w": 30, "h": 30},
-            "masa_2_sandalye_11": {"x": 470, "y": 330, "w": 30, "h": 30},
-            "masa_2_sandalye_12": {"x": 540, "y": 330, "w": 30, "h": 30},
-            "masa_2_sandalye_13": {"x": 610, "y": 330, "w": 30, "h": 30},
-            "masa_2_sandalye_14": {"x": 680, "y": 330, "w": 30, "h": 30},
-            "masa_2_sandalye_15": {"x": 750, "y": 330, "w": 30, "h": 30},
-            "masa_3_sandalye_1": {"x": 330, "y": 400, "w": 30, "h": 30},
-            "masa_3_sandalye_2": {"x": 400, "y": 400, "w": 30, "h": 30},
-            "masa_3_sandalye_3": {"x": 470, "y": 400, "w": 30, "h": 30},
-            "masa_3_sandalye_4": {"x": 540, "y": 400, "w": 30, "h": 30},
-            "masa_3_sandalye_5": {"x": 610, "y": 400, "w": 30, "h": 30},
-            "masa_3_sandalye_6": {"x": 680, "y": 400, "w": 30, "h": 30},
-            "masa_3_sandalye_7": {"x": 750, "y": 400, "w": 30, "h": 30},
-            "masa_3_sandalye_8": {"x": 750, "y": 480, "w": 30, "h": 30},
-            "masa_3_sandalye_9": {"x": 330, "y": 480, "w": 30, "h": 30},
-            "masa_3_sandalye_10": {"x": 400, "y": 480, "w": 30, "h": 30},
-            "masa_3_sandalye_11": {"x": 470, "y": 480, "w": 30, "h": 30},
-            "masa_3_sandalye_12": {"x": 540, "y": 480, "w": 30, "h": 30},
-            "masa_3_sandalye_13": {"x": 610, "y": 480, "w": 30, "h": 30},
-            "masa_3_sandalye_14": {"x": 680, "y": 480, "w": 30, "h": 30},
-            "masa_3_sandalye_15": {"x": 750, "y": 480, "w": 30, "h": 30},
-            "masa_4_sandalye_1": {"x": 330, "y": 545, "w": 30, "h": 30},
-            "masa_4_sandalye_2": {"x": 400, "y": 545, "w": 30, "h": 30},
-            "masa_4_sandalye_3": {"x": 470, "y": 545, "w": 30, "h": 30},
-            "masa_4_sandalye_4": {"x": 540, "y": 545, "w": 30, "h": 30},
-            "masa_4_sandalye_5": {"x": 610, "y": 545, "w": 30, "h": 30},
-            "masa_4_sandalye_6": {"x": 680, "y": 545, "w": 30, "h": 30},
-            "masa_4_sandalye_7": {"x": 750, "y": 545, "w": 30, "h": 30},
-            "masa_4_sandalye_8": {"x": 750, "y": 625, "w": 30, "h": 30},
-            "masa_4_sandalye_9": {"x": 330, "y": 625, "w": 30, "h": 30},
-            "masa_4_sandalye_10": {"x": 400, "y": 625, "w": 30, "h": 30},
-            "masa_4_sandalye_11": {"x": 470, "y": 625, "w": 30, "h": 30},
-            "masa_4_sandalye_12": {"x": 540, "y": 625, "w": 30, "h": 30},
-            "masa_4_sandalye_13": {"x": 610, "y": 625, "w": 30, "h": 30},
-            "masa_4_sandalye_14": {"x": 680, "y": 625, "w": 30, "h": 30},
-            "masa_4_sandalye_15": {"x": 750, "y": 625, "w": 30, "h": 30},
-            "bireysel_1": {"x": 975, "y": 90, "w": 30, "h": 30},
-            "bireysel_2": {"x": 1075, "y": 90, "w": 30, "h": 30},
-            "bireysel_3": {"x": 975, "y": 250, "w": 30, "h": 30},
-            "bireysel_4": {"x": 1075, "y": 250, "w": 30, "h": 30},
-            "bireysel_5": {"x": 970, "y": 405, "w": 30, "h": 30},
-            "bireysel_6": {"x": 1070, "y": 405, "w": 30, "h": 30},
-            "bireysel_7": {"x": 970, "y": 560, "w": 30, "h": 30},
-            "bireysel_8": {"x": 1070, "y": 560, "w": 30, "h": 30},
-            "bilgisayar_1": {"x": 1240, "y": 125, "w": 30, "h": 30},
-            "bilgisayar_2": {"x": 1240, "y": 245, "w": 30, "h": 30},
-            "bilgisayar_3": {"x": 1240, "y": 365, "w": 30, "h": 30},
-            "bilgisayar_4": {"x": 1240, "y": 480, "w": 30, "h": 30},
-            "bilgisayar_5": {"x": 1240, "y": 600, "w": 30, "h": 30},
-        }
-
-        # Gerekli verileri başlangıçta yükle
-        self.kullanici_id = self._get_user_id_from_username(self.current_user)
-        self.masa_data = self._load_all_masa_data()
+        # Veriler arka planda yüklenene kadar boş durumla başla
+        self.masa_data = {}
+        self.occupancy = SeatOccupancy()
+        self._occupancy_loaded = False
+        self._seat_colors = {}  # masa -> son boyanan renk
+        self.user_active_reservation_seat_id = None
+        self._welcome_shown = False
+        self._state_error_shown = False  # Kesinti boyunca hata penceresi yalnızca bir kez gösterilir
+
+        # UI bileşenlerini oluştur
+        self._create_ui_components()
+
+        # Gerekli verileri arka planda yükle
+        run_in_background(self, "initial_load", self._load_all_masa_data,
+                          on_success=self._on_initial_data_loaded,
+                          on_error=self._on_initial_data_error)
+
+    def _on_initial_data_loaded(self, masa_data):
+        self.masa_data = masa_data
 
         # Veri yükleme hatalarını kontrol et
-        if self.kullanici_id is None or not self.masa_data:
+        if not self.masa_data:
             self._handle_initial_load_error()
             return
 
-        # Uygulama başladığında ceza kontrolü yap
-        self._check_and_apply_penalties()
-
-        # Periyodik olarak ceza kontrolü yapmak için zamanlayıcı başlat
+        # Ceza bildirimlerini kontrol et ve periyodik zamanlayıcıları başlat
         self.start_periodic_check()
+        self.change_after_id = self.after(CHANGE_POLL_MS, self._poll_reservation_changes)
 
-        self.reserved_seats_data = self._load_reservations_from_db()
-        self.user_active_reservation_seat_id = self._load_user_active_reservation_name_from_db()
-
-        # UI bileşenlerini oluştur
-        self._create_ui_components()
+    def _on_initial_data_error(self, error):
+        messagebox.showerror("Veritabanı Hatası", f"Başlangıç verileri yüklenirken hata oluştu: {error}")
+        self._handle_initial_load_error()
 
     def _handle_initial_load_error(self):
         """Uygulama başlamadan önce oluşan veri yükleme hatalarını yönetir."""
-        if self.kullanici_id is None:
-            messagebox.showerror("Kullanıcı Hatası",
-                                 f"'{self.current_user}' kullanıcısı veritabanında bulunamadı. "
-                                 "Lütfen tekrar giriş yapın.")
         if not self.masa_data:
             messagebox.showerror("Veritabanı Hatası",
                                  "Masa verileri veritabanından yüklenemedi. "
@@ -278,26 +221,36 @@ class TableReservationApp(ctk.CTkFrame):
         )
         back_button.pack(pady=10, padx=10, anchor="nw")
 
-        image_path = "oturma_plan.png"
-        if not os.path.exists(image_path):
-            messagebox.showerror("Hata", f"'{image_path}' dosyası bulunamadı.")
+        try:
+            _, self.floors = load_layouts()
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Hata", f"Oturma planı yüklenemedi: {e}")
             self._go_back_to_main_menu()
             return
 
-        canvas_width = 1400
-        canvas_height = 750
-        self.bg_image_pil = Image.open(image_path).resize((canvas_width, canvas_height), Image.Resampling.LANCZOS)
-        self.bg_photo_image = ImageTk.PhotoImage(self.bg_image_pil)
+        if len(self.floors) > 1:
+            self.floor_selector = ctk.CTkSegmentedButton(self, values=[floor.name for floor in self.floors],
+                                                         command=self._on_floor_selected)
+            self.floor_selector.set(self.floors[0].name)
+            self.floor_selector.pack(pady=(0, 5))
 
         appearance_mode = ctk.get_appearance_mode().lower()
         index = 0 if appearance_mode == "light" else 1
         theme_fg_color = ctk.ThemeManager.theme["CTk"]["fg_color"][index]
 
-        self.canvas = tk.Canvas(self, width=canvas_width, height=canvas_height, highlightthickness=0, bg=theme_fg_color)
+        self.canvas = tk.Canvas(self, highlightthickness=0, bg=theme_fg_color)
         self.canvas.pack(padx=20, pady=10)
-        self.canvas.create_image(0, 0, anchor="nw", image=self.bg_photo_image)
+        self.painter = create_seat_painter(self.canvas)
+        self.canvas.bind("<Motion>", self._on_canvas_motion)
+        self.canvas.bind("<Leave>", lambda e: self._set_hovered_seat(None))
+        self.canvas.bind("<Button-1>", self._on_canvas_click)
 
-        self._create_seat_areas()
+        try:
+            self._show_floor(self.floors[0])
+        except OSError as e:
+            messagebox.showerror("Hata", f"Oturma planı resmi açılamadı: {e}")
+            self._go_back_to_main_menu()
+            return
         self._create_buttons()
 
         user_info_frame = ctk.CTkFrame(self)
@@ -305,8 +258,16 @@ class TableReservationApp(ctk.CTkFrame):
         ctk.CTkLabel(user_info_frame, text=f"Kullanıcı: {self.current_user}", font=ctk.CTkFont(size=14)).pack(
             side="left", padx=10)
 
-        self._update_seat_visuals()
+        # Veriler gelene kadar yükleniyor durumunu göster
+        self.status_label = ctk.CTkLabel(user_info_frame, text="⏳ Rezervasyonlar yükleniyor...",
+                                         font=ctk.CTkFont(size=14), text_color="gray60")
+        self.status_label.pack(side="left", padx=10)
 
+    def _show_welcome_message(self):
+        """İlk veri yüklemesinden sonra aktif rezervasyon bilgisini bir kez gösterir."""
+        if self._welcome_shown:
+            return
+        self._welcome_shown = True
         if self.user_active_reservation_seat_id:
             okunabilir_masa_adi = self.user_active_reservation_seat_id.replace("_", " ").title()
             self._display_message(
@@ -321,106 +282,112 @@ class TableReservationApp(ctk.CTkFrame):
             # Ana pencereye dönüş callback fonksiyonunu çağır
             self.on_return_to_main()
 
-    def _get_user_id_from_username(self, username: str) -> int | None:
-        """Veritabanından kullanıcı adına göre kullanıcı ID'sini çeker."""
-        conn = None
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT kullanici_id FROM kullanici WHERE isim = ?", (username,))
-            result = cursor.fetchone()
-
-            if result:
-                try:
-                    return int(result[0])
-                except (ValueError, IndexError):
-                    messagebox.showerror("Veri Tipi Hatası",
-                                         f"Veritabanında '{username}' kullanıcısının ID'si geçersiz bir formatta. "
-                                         "Lütfen veritabanındaki 'kullanici_id' sütununu kontrol edin.")
-                    return None
-
-            messagebox.showerror("Kullanıcı Bulunamadı", f"'{username}' adında bir kullanıcı bulunamadı.")
-            return None
-
-        except pyodbc.Error as e:
-            messagebox.showerror("Veritabanı Hatası", f"Kullanıcı ID çekilirken veritabanı hatası oluştu: {e}")
-            return None
-        finally:
-            if conn:
-                conn.close()
     def start_periodic_check(self):
-        """Her 60 saniyede bir ceza kontrolü yapar"""
-        self._check_and_apply_penalties()
+        """Her 60 saniyede bir yeni ceza bildirimlerini ve rezervasyon durumunu kontrol eder"""
+        self._check_penalty_notices()
         self.after_id = self.after(60000, self.start_periodic_check)  # 60 saniye
 
+    def _poll_reservation_changes(self):
+        """Rezervasyon değişikliklerini CHANGE_POLL_MS aralıkla yoklar."""
+        self._refresh_reservations()
+        self.change_after_id = self.after(CHANGE_POLL_MS, self._poll_reservation_changes)
+
     def destroy(self):
-        """Pencere kapatıldığında zamanlayıcıyı durdur"""
+        """Pencere kapatıldığında zamanlayıcıyı ve bekleyen arka plan işlerini durdur"""
         if self.after_id:
             self.after_cancel(self.after_id)
+        if self.change_after_id:
+            self.after_cancel(self.change_after_id)
+        get_executor().cancel(self)
         super().destroy()
 
-    def _check_and_apply_penalties(self):
-        """Rezervasyon süresi geçmiş olanlara ceza uygular."""
-        try:
-            conn = get_db_connection()
-            with conn:
-                with conn.cursor() as cursor:
-                    current_datetime = datetime.now()
-                    cursor.execute("""
-                                   SELECT mr.masa_rezervasyon_id, mr.kullanici_id, mr.tarih, mr.saat_bitis, m.numara
-                                   FROM masa_rezervasyon mr
-                                            JOIN masa m ON mr.masa_id = m.masa_id
-                                   WHERE mr.iptal_durumu = 0
-                                     AND (mr.durum IS NULL OR mr.durum != 'Tamamlandı')
-                                     AND (mr.tarih < CONVERT(date, GETDATE())
-                                       OR (mr.tarih = CONVERT(date, GETDATE())
-                                           AND mr.saat_bitis <= CONVERT(time, GETDATE())))
-                                   """)
-                    reservations = cursor.fetchall()
-
-                    for masa_rezervasyon_id, kullanici_id, tarih, bitis_saati, masa_numara in reservations:
-                        reservation_end = datetime.combine(tarih, bitis_saati)
-
-                        if reservation_end < current_datetime:
-                            # Kullanıcıya 5 puan ceza ver
-                            cursor.execute("""
-                                           UPDATE kullanici
-                                           SET ceza_puani = ISNULL(ceza_puani, 0) + 5
-                                           WHERE kullanici_id = ?
-                                           """, (kullanici_id,))
-
-                            # Ceza kaydını tabloya yaz
-                            cursor.execute("""
-                                                                       INSERT INTO cezalar (kullanici_id, aciklama, tarih)
-                                                                       VALUES (?, ?, ?)
-                                                                       """, (
-                                kullanici_id,
-                                f"Masa rezervasyonuna gelinmedi - Tarih: {tarih}, Saat: {bitis_saati} - Ceza Puani: 5",
-                                current_datetime.date()
-                            ))
-                            # Rezervasyonu 'Ceza' durumuna geçir
-                            cursor.execute("""
-                                           UPDATE masa_rezervasyon
-                                           SET durum        = 'Ceza',
-                                               iptal_durumu = 1
-                                           WHERE masa_rezervasyon_id = ?
-                                           """, (masa_rezervasyon_id,))
-
-                            # Eğer bu kullanıcı giriş yapan kullanıcıysa popup göster
-                            if kullanici_id == self.kullanici_id:
-                                self._display_message(
-                                    f"{masa_numara.replace('_', ' ').title()} rezervasyonuna gitmediğiniz için 5 puan ceza aldınız.",
-                                    title="Ceza Uygulandı",
-                                    error=True
-                                )
-
-                    conn.commit()
-        except Exception as e:
-            print(f"Ceza uygulama hatası: {e}")
-        finally:
-            self.reserved_seats_data = self._load_reservations_from_db()
-            self.user_active_reservation_seat_id = self._load_user_active_reservation_name_from_db()
-            self._update_seat_visuals()
+    def _check_penalty_notices(self):
+        """
+        Ceza tarama servisinin bu kullanıcı için yazdığı yeni masa cezalarını okur ve görünümü yeniler.
+        Cezaların kendisi penalty_sweeper.py tarafından tek bir yerde uygulanır.
+        """
+        if not self.masa_data:
+            return  # Başlangıç verileri henüz yüklenmedi
+        run_in_background(self, "reservations", self._fetch_notices_and_state, self.kullanici_id,
+                          self._change_request(),
+                          on_success=self._on_penalty_notices,
+                          on_error=self._on_reservation_state_error)
+
+    def _fetch_notices_and_state(self, kullanici_id, change_request):
+        """İşçi thread'de çalışır."""
+        notices = fetch_penalty_notices(kullanici_id, kind="masa")
+        return notices, self._fetch_reservation_state(change_request)
+
+    def _on_penalty_notices(self, result):
+        notices, state = result
+        self._apply_reservation_state(state)
+        # Başlayan veya biten rezervasyonlar için tüm masalar kontrol edilir (yalnızca değişenler boyanır)
+        self._update_seat_visuals()
+        for notice in notices:
+            self._display_message(notice.aciklama, title="Ceza Uygulandı", error=True)
+        if notices:
+            # Yalnızca gösterilen kayıtlar görülmüş sayılır
+            mark_notices_shown(notices)
+            run_in_background(self, "penalty_notices_seen", save_notices_seen, self.kullanici_id, "masa", notices,
+                              on_error=lambda e: print(f"Ceza bildirimleri kaydedilirken hata: {e}"))
+        self._show_welcome_message()
+
+    def _refresh_reservations(self):
+        """Son okumadan bu yana değişen rezervasyonları arka planda çeker."""
+        if not self.masa_data:
+            return  # Başlangıç verileri henüz yüklenmedi
+        run_in_background(self, "reservation_changes", self._fetch_reservation_state, self._change_request(),
+                          on_success=self._apply_reservation_state,
+                          on_error=self._on_reservation_state_error)
+
+    def _change_request(self):
+        """İşçi thread'e verilecek okuma durumu; doluluk modeli yalnızca Tk thread'inde okunur."""
+        if not self._occupancy_loaded or self.occupancy.window_start != date.today():
+            return None  # İlk yükleme veya gün değişimi: pencerenin tamamı yeniden okunur
+        return self.occupancy.token
+
+    def _fetch_reservation_state(self, since):
+        """Tam doluluk modelini veya since belirtecinden sonraki değişiklikleri çeker (işçi thread'de çalışır)."""
+        conn = get_db_connection()
+        if conn is None:
+            raise ConnectionError("Veritabanına bağlanılamadı.")
+        with conn:
+            cursor = conn.cursor()
+            if since is None:
+                return load_occupancy(cursor), None
+            return None, fetch_changes(cursor, since)
+
+    def _apply_reservation_state(self, state):
+        """Çekilen rezervasyon durumunu arayüze uygular ve yalnızca etkilenen masaları boyar (Tk thread'inde)."""
+        occupancy, changes = state
+        previous_seat = self.user_active_reservation_seat_id
+        if occupancy is not None:
+            if self._occupancy_loaded and occupancy.token < self.occupancy.token:
+                return
+            self.occupancy = occupancy
+            self._occupancy_loaded = True
+            affected = None
+        else:
+            affected = self.occupancy.apply_changes(*changes)
+
+        self.user_active_reservation_seat_id = self.occupancy.active_seat_for(self.kullanici_id)
+        if affected is not None:
+            affected.update(seat for seat in (previous_seat, self.user_active_reservation_seat_id) if seat)
+        self.status_label.configure(text="", text_color="gray60")
+        self._state_error_shown = False
+        self._update_seat_visuals(affected)
+
+    def _on_reservation_state_error(self, error):
+        """
+        Yoklama hatalarını durum etiketinde gösterir; zamanlayıcılar sessizce yeniden dener.
+        Hata penceresi bir kesinti boyunca yalnızca ilk hatada açılır (after() pencere açıkken de
+        çalıştığından her yoklamada yeni pencere üst üste binerdi).
+        """
+        print(f"Rezervasyonlar yüklenemedi: {error}")
+        self.status_label.configure(text="⚠ Bağlantı hatası, yeniden deneniyor...", text_color="#ef4444")
+        if not self._state_error_shown:
+            self._state_error_shown = True
+            messagebox.showerror("Veritabanı Hatası", f"Rezervasyonlar yüklenirken hata oluştu: {error}")
 
     def _load_all_masa_data(self) -> dict:
         """Veritabanından tüm masa numaralarını ve ID'lerini yükler."""
@@ -435,69 +402,7 @@ class TableReservationApp(ctk.CTkFrame):
                 masa_data[numara] = masa_id
             return masa_data
         except Exception as e:
-            messagebox.showerror("Veritabanı Hatası", f"Masa verileri yüklenirken hata oluştu: {e}")
-            return {}
-        finally:
-            if conn:
-                conn.close()
-
-    def _load_user_active_reservation_name_from_db(self) -> str | None:
-        """Mevcut kullanıcının aktif rezervasyonunu veritabanından çekerek masa adını döndürür."""
-        conn = None
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                           SELECT m.numara
-                           FROM masa_rezervasyon mr
-                                    JOIN masa m ON mr.masa_id = m.masa_id
-                           WHERE mr.kullanici_id = ?
-                             AND mr.iptal_durumu = 0
-                             AND (mr.durum IS NULL OR mr.durum != 'Tamamlandı')
-                             AND (mr.tarih > CONVERT(date, GETDATE())
-                               OR (mr.tarih = CONVERT(date, GETDATE())
-                                   AND mr.saat_bitis > CONVERT(time, GETDATE())))
-                           """, (self.kullanici_id,))
-            result = cursor.fetchone()
-            if result:
-                return result[0]
-            return None
-        except Exception as e:
-            messagebox.showerror("Veritabanı Hatası", f"Kullanıcının aktif rezervasyonu çekilirken hata oluştu: {e}")
-            return None
-        finally:
-            if conn:
-                conn.close()
-
-    def _load_reservations_from_db(self) -> dict:
-        """Veritabanından tüm aktif masa rezervasyonlarını yükler."""
-        reservations = {}
-        conn = None
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                           SELECT mr.saat_baslangic, mr.saat_bitis, m.numara, k.isim, mr.tarih
-                           FROM masa_rezervasyon mr
-                                    JOIN masa m ON mr.masa_id = m.masa_id
-                                    JOIN kullanici k ON mr.kullanici_id = k.kullanici_id
-                           WHERE mr.iptal_durumu = 0
-                             AND (mr.durum IS NULL OR mr.durum != 'Tamamlandı')
-                             AND (mr.tarih > CONVERT(date, GETDATE())
-                               OR (mr.tarih = CONVERT(date, GETDATE())
-                                   AND mr.saat_bitis > CONVERT(time, GETDATE())))
-                           """)
-            for row in cursor.fetchall():
-                start_time, end_time, seat_numara, username, res_date = row
-                reservations[seat_numara] = {
-                    "start_time": str(start_time),
-                    "end_time": str(end_time),
-                    "reserved_by": username,
-                    "date": res_date
-                }
-            return reservations
-        except Exception as e:
-            messagebox.showerror("Veritabanı Hatası", f"Rezervasyonlar yüklenirken hata oluştu: {e}")
+            print(f"Masa verileri yüklenirken hata oluştu: {e}")
             return {}
         finally:
             if conn:
@@ -512,8 +417,8 @@ class TableReservationApp(ctk.CTkFrame):
 
     def _seat_clicked(self, seat_id):
         """Bir sandalye alanına tıklandığında çalışır."""
-        # Rezervasyon işleminden önce ceza kontrolü yap
-        self._check_and_apply_penalties()
+        # Rezervasyon işleminden önce görünümü tazele
+        self._refresh_reservations()
 
         masa_adi_okunakli = seat_id.replace("_", " ").title()
 
@@ -523,20 +428,6 @@ class TableReservationApp(ctk.CTkFrame):
                                  f"'{masa_adi_okunakli}' için masa ID bulunamadı. Veritabanındaki 'masa' tablosunu kontrol edin.")
             return
 
-        if seat_id in self.reserved_seats_data:
-            reservation_info = self.reserved_seats_data[seat_id]
-            reserved_by = reservation_info.get("reserved_by", "Bilinmeyen Kullanıcı")
-            self._display_message(
-                f"Bu sandalye dolu:\n"
-                f"Kullanıcı: {reserved_by}\n"
-                f"Tarih: {reservation_info['date'].strftime('%d/%m/%Y')}\n"
-                f"Başlangıç: {reservation_info['start_time']}\n"
-                f"Bitiş: {reservation_info['end_time']}",
-                title="Sandalye Dolu",
-                error=True
-            )
-            return
-
         if self.user_active_reservation_seat_id:
             self._display_message(
                 f"Sayın {self.current_user}, zaten '{self.user_active_reservation_seat_id.replace('_', ' ').title()}' numaralı sandalyede aktif bir rezervasyonunuz var.",
@@ -546,56 +437,67 @@ class TableReservationApp(ctk.CTkFrame):
             return
 
         def on_date_selected(selected_date):
-            TimeSelectionPopup(self.master, seat_id, masa_adi_okunakli, selected_date, self._on_time_confirmed)
+            TimeSelectionPopup(self.master, seat_id, masa_adi_okunakli, selected_date, self._on_time_confirmed,
+                               occupancy=self.occupancy)
 
         self._reset_all_seat_outlines()
-        if seat_id in self.seat_drawing_ids:
-            drawing_id = self.seat_drawing_ids[seat_id]
-            self.canvas.itemconfig(drawing_id, outline="#00A86B", width=3)
+        if seat_id in self.current_floor.seats:
+            self._selected_seat_id = seat_id
+            self._repaint_seats([seat_id])
             DateSelectionPopup(self.master, on_date_selected)
 
     def _on_time_confirmed(self, seat_id, selected_date, start, end):
-        """Saat seçimi onaylandıktan sonra rezervasyon işlemini yapar."""
-        try:
-            # 'with' ifadesiyle bağlantı yönetimi
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
+        """Saat seçimi onaylandıktan sonra rezervasyon işlemini arka planda yapar."""
+        masa_id_for_reservation = self.masa_data.get(seat_id)
+        if masa_id_for_reservation is None:
+            messagebox.showerror("Hata", f"'{seat_id}' için masa ID bulunamadı. Rezervasyon yapılamadı.")
+            return
 
-                masa_id_for_reservation = self.masa_data.get(seat_id)
-                if masa_id_for_reservation is None:
-                    messagebox.showerror("Hata", f"'{seat_id}' için masa ID bulunamadı. Rezervasyon yapılamadı.")
-                    return
+        try:
+            # Tarih ve saat stringlerini SQL Server'ın kabul edeceği formata dönüştürme
+            rezervasyon_tarihi_str = datetime.strptime(selected_date, "%d/%m/%Y").strftime("%Y-%m-%d")
+            baslangic_saati_str = datetime.strptime(start, "%H:%M").strftime("%H:%M:%S")
+            bitis_saati_str = datetime.strptime(end, "%H:%M").strftime("%H:%M:%S")
+        except ValueError as e:
+            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}")
+            return
 
-                # Tarih ve saat stringlerini SQL Server'ın kabul edeceği formata dönüştürme
-                rezervasyon_tarihi_str = datetime.strptime(selected_date, "%d/%m/%Y").strftime("%Y-%m-%d")
-                baslangic_saati_str = datetime.strptime(start, "%H:%M").strftime("%H:%M:%S")
-                bitis_saati_str = datetime.strptime(end, "%H:%M").strftime("%H:%M:%S")
+        def insert_reservation():
+            # Çakışma kontrolü ve kayıt sunucuda tek işlemde yapılır
+            return reserve_seat(self.kullanici_id, masa_id_for_reservation, rezervasyon_tarihi_str,
+                                baslangic_saati_str, bitis_saati_str)
 
-                cursor.execute("""
-                               INSERT INTO masa_rezervasyon (kullanici_id, masa_id, tarih, saat_baslangic, saat_bitis,
-                                                             iptal_durumu)
-                               VALUES (?, ?, ?, ?, ?, ?)
-                               """,
-                               (self.kullanici_id, masa_id_for_reservation, rezervasyon_tarihi_str, baslangic_saati_str,
-                                bitis_saati_str, False))
+        def on_success(outcome):
+            result, detail = outcome
+            self._refresh_reservations()
+            if result is SeatReservationResult.OK:
+                self._display_message(f"Rezervasyonunuz başarıyla yapıldı: {selected_date} {start} - {end}")
+            elif result is SeatReservationResult.CONFLICT:
+                cakisan_baslangic, cakisan_bitis = detail
+                self._display_message(
+                    f"Bu masa {selected_date} tarihinde {str(cakisan_baslangic)[:5]} - {str(cakisan_bitis)[:5]} "
+                    f"saatleri arasında dolu. Lütfen başka bir saat veya masa seçin.", error=True)
+            elif result is SeatReservationResult.USER_HAS_ACTIVE:
+                self._display_message("Zaten aktif bir rezervasyonunuz bulunmaktadır.", error=True)
+            else:
+                self._display_message("Masa veya kullanıcı bulunamadı. Rezervasyon yapılamadı.", error=True)
 
-                conn.commit()
+        def on_error(e):
+            if isinstance(e, pyodbc.Error):
+                # Sadece bilinen 'HY000' hatasını göz ardı et, diğerlerini göster
+                if "HY000" not in str(e):
+                    messagebox.showerror("Veritabanı Hatası", f"Rezervasyon kaydedilirken hata oluştu.\nDetay: {e}")
+            else:
+                messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}")
 
-                self.reserved_seats_data = self._load_reservations_from_db()
-                self.user_active_reservation_seat_id = self._load_user_active_reservation_name_from_db()
-                self._update_seat_visuals()
-                self._display_message(f"Rezervasyonunuz başarıyla yapıldı: {selected_date} {start} - {end}")
+        run_in_background(self, "reserve_seat", insert_reservation, on_success=on_success, on_error=on_error)
 
-        except pyodbc.Error as e:
-            # Sadece bilinen 'HY000' hatasını göz ardı et, diğerlerini göster
-            if "HY000" not in str(e):
-                messagebox.showerror("Veritabanı Hatası", f"Rezervasyon kaydedilirken hata oluştu.\nDetay: {e}")
-        except Exception as e:
-            messagebox.showerror("Hata", f"Beklenmedik bir hata oluştu: {e}")
     def _reset_all_seat_outlines(self):
-        """Tüm sandalye kenarlıklarını varsayılan duruma döndürür."""
-        for drawing_id in self.seat_drawing_ids.values():
-            self.canvas.itemconfig(drawing_id, outline="", width=0)
+        """Seçili sandalyenin kenarlığını kaldırır (yalnızca vurgulu sandalye yeniden çizilir)."""
+        previous = self._selected_seat_id
+        self._selected_seat_id = None
+        if previous is not None:
+            self._repaint_seats([previous])
 
     def _show_past_reservations(self):
         """Geçmiş rezervasyonları gösteren yeni bir pencere açar."""
@@ -615,8 +517,8 @@ class TableReservationApp(ctk.CTkFrame):
 
     def _cancel_my_reservation(self):
         """Kullanıcının aktif rezervasyonunu iptal eder."""
-        # İptal işleminden önce ceza kontrolü yap
-        self._check_and_apply_penalties()
+        # İptal işleminden önce görünümü tazele
+        self._refresh_reservations()
 
         if not self.user_active_reservation_seat_id:
             self._display_message("Aktif bir rezervasyonunuz bulunmamaktadır.", error=True)
@@ -628,15 +530,14 @@ class TableReservationApp(ctk.CTkFrame):
         if not confirm:
             return
 
-        try:
+        masa_id_to_cancel = self.masa_data.get(self.user_active_reservation_seat_id)
+        if masa_id_to_cancel is None:
+            messagebox.showerror("Hata", f"İptal edilecek sandalye ID'si için masa ID bulunamadı.")
+            return
+
+        def cancel_reservation():
             with get_db_connection() as conn:  # 'with' ifadesiyle bağlantıyı güvenle yönetiyoruz.
                 cursor = conn.cursor()
-
-                masa_id_to_cancel = self.masa_data.get(self.user_active_reservation_seat_id)
-                if masa_id_to_cancel is None:
-                    messagebox.showerror("Hata", f"İptal edilecek sandalye ID'si için masa ID bulunamadı.")
-                    return
-
                 cursor.execute("""
                                UPDATE masa_rezervasyon
                                SET iptal_durumu = 1
@@ -646,86 +547,100 @@ class TableReservationApp(ctk.CTkFrame):
                                """, (self.kullanici_id, masa_id_to_cancel))
                 conn.commit()
 
-            self.reserved_seats_data = self._load_reservations_from_db()
-            self.user_active_reservation_seat_id = self._load_user_active_reservation_name_from_db()
+        def on_success(_):
+            self._refresh_reservations()
             self._display_message(f"'{masa_adi_okunakli}' numaralı rezervasyonunuz iptal edildi.")
-            self._update_seat_visuals()
 
-        except Exception as e:
-            messagebox.showerror("Veritabanı Hatası", f"Rezervasyon iptal edilirken hata oluştu: {e}")
+        run_in_background(self, "cancel_seat", cancel_reservation, on_success=on_success,
+                          on_error=lambda e: messagebox.showerror("Veritabanı Hatası",
+                                                                  f"Rezervasyon iptal edilirken hata oluştu: {e}"))
 
-    def _update_seat_visuals(self):
-        """Sandalyelerin renklerini ve kenarlıklarını rezervasyon durumuna göre günceller."""
+    def _update_seat_visuals(self, seat_ids=None):
+        """
+        Sandalyelerin renklerini rezervasyon durumuna göre günceller. seat_ids verilirse yalnızca
+        o sandalyelere bakılır; rengi değişmeyen sandalyeler yeniden boyanmaz.
+        """
         UNRESERVED_COLOR = "#66BB6A"  # Yeşil
         MY_RESERVATION_COLOR = "#42A5F5"  # Mavi
         RESERVED_COLOR = "#FF7043"  # Turuncu
 
-        for seat_id, drawing_id in self.seat_drawing_ids.items():
-            self.canvas.itemconfig(drawing_id, outline="", width=0)
-
-            if seat_id in self.reserved_seats_data:
-                if self.reserved_seats_data[seat_id].get("reserved_by") == self.current_user:
-                    self.canvas.itemconfig(drawing_id, fill=MY_RESERVATION_COLOR)
-                else:
-                    self.canvas.itemconfig(drawing_id, fill=RESERVED_COLOR)
+        if self.current_floor is None:
+            return
+        seats = self.current_floor.seats
+        now = datetime.now()
+        changed = []
+        for seat_id in seats if seat_ids is None else seat_ids:
+            if seat_id not in seats:
+                continue
+
+            # Sadece şu an süren rezervasyonlar masayı dolu gösterir
+            if seat_id == self.user_active_reservation_seat_id:
+                color = MY_RESERVATION_COLOR
+            elif self.occupancy.reservation_at(seat_id, now):
+                color = RESERVED_COLOR
             else:
-                self.canvas.itemconfig(drawing_id, fill=UNRESERVED_COLOR)
-
-    def _create_seat_areas(self):
-        """Resim üzerindeki tıklanabilir sandalye alanlarını çizer."""
-        for seat_id, coords in self.seat_coordinates.items():
-            self._add_rounded_seat_area(seat_id, coords["x"], coords["y"], coords["w"], coords["h"], radius=4)
-
-    def _add_rounded_seat_area(self, seat_id, x, y, w, h, radius=5):
-        """Yuvarlak köşeli dikdörtgen şeklinde tıklanabilir bir sandalye alanı oluşturur."""
-        radius = min(radius, w // 2, h // 2)
-        points = [
-            x + radius, y,
-            x + w - radius, y,
-            x + w, y + radius,
-            x + w, y + h - radius,
-            x + w - radius, y + h,
-            x + radius, y + h,
-            x, y + h - radius,
-            x, y + radius
-        ]
-
-        drawing_id = self.canvas.create_polygon(
-            points,
-            outline="",
-            fill=self.canvas["bg"],
-            tags=seat_id
-        )
+                color = UNRESERVED_COLOR
+            if self._seat_colors.get(seat_id) != color:
+                self._seat_colors[seat_id] = color
+                changed.append(seat_id)
+        self._repaint_seats(changed)
+
+    def _repaint_seats(self, seat_ids):
+        """Sandalyelerin dolgu ve kenarlığını çizim yoluna iletir ve değişenleri tek seferde ekrana yazar."""
+        for seat_id in seat_ids:
+            if seat_id == self._selected_seat_id:
+                outline, width = "#00A86B", 3
+            elif seat_id == self._hovered_seat_id and self._hover_allowed(seat_id):
+                outline, width = "#64B5F6", 2
+            else:
+                outline, width = None, 0
+            self.painter.set_seat(seat_id, self._seat_colors.get(seat_id), outline, width)
+        self.painter.flush()
+
+    def _on_floor_selected(self, name):
+        floor = next(floor for floor in self.floors if floor.name == name)
+        try:
+            self._show_floor(floor)
+        except OSError as e:
+            messagebox.showerror("Hata", f"Oturma planı resmi açılamadı: {e}")
+
+    def _show_floor(self, floor):
+        """Katın arka planını ve sandalye alanlarını çizer; daha önce açılan katların resimleri yeniden kullanılır."""
+        if floor is self.current_floor:
+            return
+        background = get_background_cache().get(floor.background, (floor.width, floor.height))
+
+        self._set_hovered_seat(None)
+        self._seat_colors = {}
+        self._selected_seat_id = None
+
+        self.current_floor = floor
+        self.canvas.configure(width=floor.width, height=floor.height)
+        self.painter.show_floor(floor, background)
+        self._update_seat_visuals()
+
+    def _seat_at_event(self, event):
+        return self.current_floor.index.seat_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+
+    def _on_canvas_click(self, event):
+        seat_id = self._seat_at_event(event)
+        if seat_id is not None:
+            self._seat_clicked(seat_id)
+
+    def _on_canvas_motion(self, event):
+        self._set_hovered_seat(self._seat_at_event(event))
+
+    def _set_hovered_seat(self, seat_id):
+        """Fare başka bir sandalyeye geçtiğinde eskisinin vurgusunu kaldırıp yenisini vurgular."""
+        previous = self._hovered_seat_id
+        if seat_id == previous:
+            return
+        self._hovered_seat_id = seat_id
+        self._repaint_seats([seat for seat in (previous, seat_id) if seat is not None])
 
-        self.seat_drawing_ids[seat_id] = drawing_id
-        self.canvas.tag_bind(drawing_id, "<Button-1>", lambda e, sid=seat_id: self._seat_clicked(sid))
-        self.canvas.tag_bind(drawing_id, "<Enter>", self._on_seat_hover_enter)
-        self.canvas.tag_bind(drawing_id, "<Leave>", self._on_seat_hover_leave)
-
-    def _on_seat_hover_enter(self, event):
-        """Masanın üzerine gelindiğinde kenarlığı vurgular."""
-        drawing_id = self.canvas.find_closest(event.x, event.y)[0]
-        for seat_id, d_id in self.seat_drawing_ids.items():
-            if d_id == drawing_id:
-                if (seat_id in self.reserved_seats_data and
-                    self.reserved_seats_data[seat_id].get("reserved_by") != self.current_user) or \
-                        (self.user_active_reservation_seat_id and self.user_active_reservation_seat_id != seat_id):
-                    return
-                self.canvas.itemconfig(drawing_id, outline="#64B5F6", width=2)
-                break
-
-    def _on_seat_hover_leave(self, event):
-        """Masanın üzerinden ayrıldığında kenarlığı kaldırır."""
-        drawing_id = self.canvas.find_closest(event.x, event.y)[0]
-        for seat_id, d_id in self.seat_drawing_ids.items():
-            if d_id == drawing_id:
-                # Seçili sandalyeyi vurgulayan kenarlık varsa onu koru
-                current_outline_color = self.canvas.itemcget(drawing_id, "outline")
-                if current_outline_color == "#00a86b":  # Vurgulu kenarlık rengi
-                    return
-                # Değilse, varsayılan duruma döndür
-                self.canvas.itemconfig(drawing_id, outline="", width=0)
-                break
+    def _hover_allowed(self, seat_id):
+        """Kullanıcının başka bir masada aktif rezervasyonu varsa diğer masalar vurgulanmaz."""
+        return not self.user_active_reservation_seat_id or self.user_active_reservation_seat_id == seat_id
 
 class PastReservationsPopup(ctk.CTkToplevel):
     def __init__(self, parent, user_id):
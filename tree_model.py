@@ -0,0 +1,117 @@
+"""
+ttk.Treeview için anahtarlı satır modeli.
+
+Listeyi her yenilemede tamamen silip yeniden doldurmak yerine satırlar birincil anahtarla
+(kitap_id, kitap_rezervasyon_id, masa_rezervasyon_id ...) Treeview öğe kimliğine (iid)
+eşlenir. sync() eski ve yeni satır kümelerini karşılaştırır ve yalnızca eklenen, değişen,
+silinen veya yeri değişen satırlar için Tk çağrısı yapar. Böylece seçim ve kaydırma
+konumu korunur.
+"""
+from bisect import bisect_left
+
+# Bilgi mesajı satırının ("Kayıt bulunamadı" vb.) öğe kimliği
+MESSAGE_IID = "__mesaj__"
+
+
+def _stable_positions(old_positions):
+    """
+    Eski sıradaki konumların en uzun artan alt dizisini bulur. Bu satırlar yerinde
+    bırakılır, diğerleri taşınır; böylece en az sayıda move() çağrısı yapılır.
+    """
+    tails, tails_idx, parents = [], [], [None] * len(old_positions)
+    for i, pos in enumerate(old_positions):
+        j = bisect_left(tails, pos)
+        if j == len(tails):
+            tails.append(pos)
+            tails_idx.append(i)
+        else:
+            tails[j] = pos
+            tails_idx[j] = i
+        parents[i] = tails_idx[j - 1] if j > 0 else None
+
+    stable = set()
+    i = tails_idx[-1] if tails_idx else None
+    while i is not None:
+        stable.add(i)
+        i = parents[i]
+    return stable
+
+
+class KeyedTreeModel:
+    """Bir Treeview'daki satırları birincil anahtara göre artımlı olarak günceller."""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._rows = {}  # iid -> (values, tags)
+
+    def sync(self, rows):
+        """
+        Treeview'ı verilen satırlarla eşitler. rows: (anahtar, values, tags) üçlüleri,
+        görünmesi istenen sırada. Yapılan Tk değişikliklerinin sayısını döndürür.
+        """
+        tree = self.tree
+        desired, order = {}, []
+        for key, values, tags in rows:
+            iid = str(key)
+            if iid in desired:
+                continue
+            desired[iid] = (tuple(values), tuple(tags))
+            order.append(iid)
+
+        existing = tree.get_children()
+        stale = [iid for iid in existing if iid not in desired]
+        if stale:
+            tree.delete(*stale)
+        for iid in stale:
+            self._rows.pop(iid, None)
+
+        current = [iid for iid in existing if iid in desired]
+        current_set = set(current)
+        # Dışarıdan silinmiş satırların eski kaydı kalmasın
+        for iid in list(self._rows):
+            if iid not in current_set:
+                del self._rows[iid]
+
+        position = {iid: index for index, iid in enumerate(current)}
+        kept = [(i, position[iid]) for i, iid in enumerate(order) if iid in position]
+        stable = {kept[k][0] for k in _stable_positions([pos for _, pos in kept])}
+
+        changes = len(stale)
+        previous = None
+        remaining = len(current)  # Henüz sırası gelmemiş mevcut satır sayısı
+
+        def target_index():
+            # Sonrasında yerinde kalacak satır yoksa sona eklemek yeterli (index() çağrısı gerekmez)
+            if remaining == 0:
+                return "end"
+            return tree.index(previous) + 1 if previous is not None else 0
+
+        for i, iid in enumerate(order):
+            values, tags = desired[iid]
+            if iid not in current_set:
+                tree.insert("", target_index(), iid=iid, values=values, tags=tags)
+                changes += 1
+            else:
+                remaining -= 1
+                if i not in stable:
+                    # Önce ayır ki hedef sıra, öğenin eski yerinden etkilenmesin
+                    tree.detach(iid)
+                    tree.move(iid, "", target_index())
+                    changes += 1
+                if self._rows.get(iid) != (values, tags):
+                    tree.item(iid, values=values, tags=tags)
+                    changes += 1
+            self._rows[iid] = (values, tags)
+            previous = iid
+        return changes
+
+    def show_message(self, values, tags=()):
+        """Tüm satırları kaldırıp yalnızca bir bilgi satırı gösterir."""
+        self.sync([(MESSAGE_IID, values, tags)])
+
+    def clear(self):
+        self.sync([])
+
+    def is_empty(self):
+        """Treeview'da bilgi satırı dışında satır yoksa True döner."""
+        return all(iid == MESSAGE_IID for iid in self.tree.get_children())
@@ -0,0 +1,136 @@
+"""
+Kullanıcı adı uygunluk kontrolü.
+
+Kayıt ve kullanıcı bilgileri ekranlarında her tuş basışında veritabanına gitmek yerine tüm
+kullanıcı adlarının katlanmış (bkz. username_key), sıralı bir anlık görüntüsü bellekte tutulur.
+Görüntüde olmayan bir ad bisect ile anında "uygun" yanıtlanır; yalnızca görüntüde bulunan
+(olası çakışma) adlar veritabanında doğrulanır.
+
+Anahtar hiçbir büyük/küçük harf ve aksan duyarsız harmanlamadan daha katı olmamalıdır; aksi
+halde sunucunun eşit saydığı iki ad görüntüde farklı görünür ve alınmış bir ad "uygun"
+yanıtlanır. Bu yüzden anahtar Türkçe ve Latin harmanlamalarının birleşimidir: ı/i/I/İ tek
+harfe, aksanlı harfler (ş, ğ, ç, ö, ü) aksansız karşılıklarına indirgenir ve sondaki boşluklar
+atılır (SQL Server '=' karşılaştırması gibi). Daha kaba anahtar yalnızca fazladan doğrulama
+sorgusuna yol açar.
+
+Görüntü süreç genelinde paylaşılır, SNAPSHOT_TTL_SECONDS dolduğunda yeniden yüklenir ve bu
+süreçte yapılan kayıt/ad değişikliklerinden anında güncellenir.
+
+Görüntü eskiyse arada başka bir istemcinin aldığı ad "uygun" görünebilir; kontrol yalnızca
+kullanıcıya bilgi içindir, kesin benzersizlik kontrolü kayıt ve ad değiştirme sırasında yapılır.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from database import get_db_connection
+from search_index import fold_turkish
+
+SNAPSHOT_TTL_SECONDS = 300
+
+
+def username_key(name):
+    """Adın görüntü anahtarı; sunucu harmanlamasının eşit sayabileceği adlar aynı anahtarı alır."""
+    folded = fold_turkish(str(name).rstrip()).replace("ı", "i")
+    decomposed = unicodedata.normalize("NFKD", folded)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class UsernameDirectory:
+    """username_key ile katlanmış kullanıcı adlarının sıralı, thread-safe anlık görüntüsü."""
+
+    def __init__(self, ttl=SNAPSHOT_TTL_SECONDS):
+        self.ttl = ttl
+        self._names = []  # Sıralı, tekrarsız katlanmış adlar
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def build(self, names):
+        """Görüntüyü ad listesinden baştan kurar."""
+        folded = sorted({username_key(name) for name in names if name})
+        with self._lock:
+            self._names = folded
+            self._loaded_at = time.monotonic()
+
+    def add(self, name):
+        """Bu süreçte alınan adı görüntüye ekler."""
+        folded = username_key(name)
+        with self._lock:
+            index = bisect_left(self._names, folded)
+            if index == len(self._names) or self._names[index] != folded:
+                insort(self._names, folded)
+
+    @property
+    def is_stale(self):
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.ttl
+
+    def ensure_fresh(self):
+        """Görüntü hiç yüklenmediyse veya süresi dolduysa veritabanından yükler (işçi thread'de çağrılmalı)."""
+        if not self.is_stale:
+            return
+        with self._load_lock:
+            if self.is_stale:
+                self.build(_load_usernames())
+
+    def might_exist(self, name):
+        """Görüntüye göre ad alınmış olabilirse True döner."""
+        folded = username_key(name)
+        with self._lock:
+            index = bisect_left(self._names, folded)
+            return index < len(self._names) and self._names[index] == folded
+
+    def lookup(self, name):
+        """
+        Veritabanına gitmeden verilebilecek yanıt: görüntü güncel ve ad görüntüde yoksa True
+        (uygun), aksi halde None (check() ile doğrulanmalı). Tk thread'inde çağrılabilir.
+        """
+        if self.is_stale or self.might_exist(name):
+            return None
+        return True
+
+    def check(self, name, exclude_id=None):
+        """
+        Ad kullanılabilirse True döner. Görüntüde olmayan adlar için veritabanına gidilmez;
+        exclude_id verilirse o kullanıcının kendi adı çakışma sayılmaz. Bloklayan bir çağrıdır.
+        """
+        self.ensure_fresh()
+        if not self.might_exist(name):
+            return True
+        return not _name_taken(name, exclude_id)
+
+
+def _load_usernames():
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT isim FROM kullanici")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _name_taken(name, exclude_id=None):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+                       SELECT CASE
+                                  WHEN EXISTS (SELECT 1
+                                               FROM kullanici
+                                               WHERE isim = ?
+                                                 AND (? IS NULL OR kullanici_id != ?)) THEN 1
+                                  ELSE 0 END
+                       """, (name, exclude_id, exclude_id))
+        return bool(cursor.fetchone()[0])
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def get_username_directory():
+    """Süreç genelinde paylaşılan kullanıcı adı görüntüsünü döndürür."""
+    global _directory
+    with _directory_lock:
+        if _directory is None:
+            _directory = UsernameDirectory()
+        return _directory